@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for Cobertura coverage report parsing.
+Compares parse time and peak RSS of the streaming parser against a full DOM parse.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import defusedxml.ElementTree as SafeET
+
+from coverage_ai.coverage_processor import CoverageProcessor
+
+
+def generate_report(path, num_files, lines_per_file):
+    """Write a synthetic Cobertura report; the target file sits in the middle of the report."""
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" ?>\n<coverage>\n<sources><source>/project</source></sources>\n<packages>\n')
+        for i in range(num_files):
+            f.write(f'<package name="pkg{i}"><classes><class name="mod{i}.py" filename="pkg{i}/mod{i}.py">')
+            f.write("<methods/><lines>")
+            for line in range(1, lines_per_file + 1):
+                f.write(f'<line number="{line}" hits="{line % 3}"/>')
+            f.write("</lines></class></classes></package>\n")
+        f.write("</packages>\n</coverage>\n")
+
+
+def parse_with_dom(report_path, filename):
+    """The previous implementation: parse the whole DOM, then search every class."""
+    root = SafeET.parse(report_path).getroot()
+    covered, missed = set(), set()
+    for cls in root.findall(".//class"):
+        name_attr = cls.get("filename")
+        if name_attr and name_attr.endswith(filename):
+            for line in cls.findall(".//line"):
+                if int(line.get("hits")) > 0:
+                    covered.add(int(line.get("number")))
+                else:
+                    missed.add(int(line.get("number")))
+    return sorted(covered), sorted(missed - covered)
+
+
+def run_child(parser, report_path, src_file_path):
+    """Parse once in this process and print the elapsed time and peak RSS as JSON."""
+    start_time = time.perf_counter()
+    if parser == "dom":
+        parse_with_dom(report_path, os.path.basename(src_file_path))
+    else:
+        processor = CoverageProcessor(
+            report_path, src_file_path, "cobertura", generate_log_files=False
+        )
+        processor.parse_coverage_report()
+    elapsed_ms = (time.perf_counter() - start_time) * 1000
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+    print(json.dumps({"elapsed_ms": elapsed_ms, "peak_rss_mb": peak_rss_mb}))
+
+
+def measure(parser, report_path, src_file_path):
+    """Run a parser in a fresh process, so that peak RSS is measured for that parser only."""
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", parser, report_path, src_file_path],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark_cobertura_parsing(num_files, lines_per_file):
+    """Benchmark both parsers on a synthetic report"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        report_path = os.path.join(temp_dir, "coverage.xml")
+        generate_report(report_path, num_files, lines_per_file)
+        report_size_mb = os.path.getsize(report_path) / (1024 * 1024)
+        target = num_files // 2
+        src_file_path = f"/project/pkg{target}/mod{target}.py"
+
+        print("🚀 Benchmarking Cobertura Report Parsing")
+        print("=" * 60)
+        print(f"Report: {num_files} files x {lines_per_file} lines ({report_size_mb:.1f} MB)")
+        print(f"Target: {src_file_path}\n")
+        print(f"{'Parser':<12} {'Time':>12} {'Peak RSS':>12}")
+
+        results = {}
+        for parser in ("dom", "streaming"):
+            results[parser] = measure(parser, report_path, src_file_path)
+            print(
+                f"{parser:<12} {results[parser]['elapsed_ms']:>10.1f}ms "
+                f"{results[parser]['peak_rss_mb']:>10.1f}MB"
+            )
+
+        print("\n" + "=" * 60)
+        print(
+            f"Speedup: {results['dom']['elapsed_ms'] / results['streaming']['elapsed_ms']:.1f}x, "
+            f"peak RSS: {results['streaming']['peak_rss_mb']:.1f}MB instead of {results['dom']['peak_rss_mb']:.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--lines", type=int, default=500)
+    parser.add_argument("--child", nargs=3, metavar=("PARSER", "REPORT", "SOURCE"))
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+    else:
+        benchmark_cobertura_parsing(args.files, args.lines)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for HTTP connection reuse of LLM calls.
+Sends chat completions through AICaller.call_model to a local stub server that delays every new connection
+(standing in for the TCP and TLS handshake to a remote gateway), with a new HTTP client per call and with the
+shared keep-alive clients of HTTPSessionPool.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+import litellm
+
+from coverage_ai.ai_caller import AICaller
+from coverage_ai.http_session_pool import HTTPSessionPool
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """An OpenAI-compatible chat completions endpoint answering with a canned response."""
+
+    protocol_version = "HTTP/1.1"
+    handshake_sec = 0.0
+    connection_count = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        with StubHandler.lock:
+            StubHandler.connection_count += 1
+        time.sleep(self.handshake_sec)
+        super().setup()
+        # Send the headers and the body without waiting for delayed ACKs
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "new_tests: []"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_calls(api_base, num_calls, session_pool):
+    """Send `num_calls` prompts with AICaller, and return the elapsed seconds and the new connections."""
+    prompt = {"system": "", "user": "Write tests"}
+    StubHandler.connection_count = 0
+    with patch.object(HTTPSessionPool, "get_shared", return_value=session_pool):
+        # As the cover-agent entry points do
+        HTTPSessionPool.install_shared()
+        ai_caller = AICaller(
+            model="openai/stub",
+            api_base=api_base,
+            enable_retry=False,
+            logger=logging.getLogger("benchmark_http_pool"),
+            generate_log_files=False,
+        )
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(num_calls):
+            if session_pool is None:
+                # A new client per call: every call opens its own connection
+                litellm.client_session = httpx.Client()
+                litellm.in_memory_llm_clients_cache.flush_cache()
+            ai_caller.call_model(prompt, stream=False)
+    elapsed = time.perf_counter() - start_time
+    return elapsed, StubHandler.connection_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP connection reuse of LLM calls")
+    parser.add_argument("--calls", type=int, default=50, help="Number of LLM calls")
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=30.0,
+        help="Delay of every new connection, standing in for a TLS handshake",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub")  # The stub server ignores it
+    StubHandler.handshake_sec = args.handshake_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    print("🚀 HTTP Connection Reuse Benchmark")
+    print("=" * 60)
+    print(f"Calls: {args.calls}, new connection delay: {args.handshake_ms:.0f}ms")
+    print(f"HTTP/2 available: {HTTPSessionPool.http2_available()}")
+
+    session_pool = HTTPSessionPool()
+    run_calls(api_base, 1, session_pool)  # Warm up litellm
+    results = {
+        "New client per call": run_calls(api_base, args.calls, None),
+        "Shared keep-alive client": run_calls(api_base, args.calls, session_pool),
+    }
+    session_pool.close()
+    server.shutdown()
+
+    for name, (elapsed, connections) in results.items():
+        print(
+            f"{name:<26} {elapsed * 1000:9.1f}ms total  "
+            f"{elapsed * 1000 / args.calls:7.2f}ms/call  {connections:4d} connections"
+        )
+    baseline, pooled = results["New client per call"][0], results["Shared keep-alive client"][0]
+    print("=" * 60)
+    print(f"Speedup: {baseline / pooled:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
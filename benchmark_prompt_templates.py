@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for rendering the prompt templates of the settings.
+Compares the render time per call type when every call creates an environment and compiles the system and
+user templates (the previous behaviour of DefaultAgentCompletion._build_prompt) with PromptTemplateRegistry,
+which compiles each template once.
+"""
+
+import argparse
+import time
+
+from jinja2 import Environment, StrictUndefined, meta
+
+from coverage_ai.prompt_templates import PromptTemplateRegistry
+from coverage_ai.settings.config_loader import get_settings
+
+CALL_TYPES = [
+    "test_generation_prompt",
+    "analyze_test_run_failure",
+    "analyze_suite_test_insert_line",
+    "analyze_test_against_context",
+    "analyze_suite_test_headers_indentation",
+    "adapt_test_command_for_a_single_test_via_ai",
+]
+
+
+def make_variables(environment, sources, file_lines):
+    """Give every variable referenced by the templates a synthetic file content of `file_lines` lines."""
+    content = "\n".join(
+        f"def function_{i}(value):\n    return value + {i}" for i in range(file_lines // 2)
+    )
+    variables = {}
+    for source in sources:
+        for name in meta.find_undeclared_variables(environment.parse(source)):
+            variables[name] = content
+    return variables
+
+
+def render_with_previous_loop(call_type, sources, variables):
+    """The previous implementation: a new environment, and both templates compiled, on every call."""
+    environment = Environment(undefined=StrictUndefined, autoescape=True)
+    return [environment.from_string(source).render(**variables) for source in sources]
+
+
+def render_with_registry(call_type, sources, variables):
+    """The current implementation: the compiled templates of the shared registry."""
+    templates = PromptTemplateRegistry.get_shared(autoescape=True)
+    return [
+        templates.render(f"{call_type}.{part}", source, variables)
+        for part, source in zip(("system", "user"), sources)
+    ]
+
+
+def timed(func, call_type, sources, variables, calls):
+    """Return the mean time of a call, in milliseconds."""
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        func(call_type, sources, variables)
+    return (time.perf_counter() - start_time) * 1000 / calls
+
+
+def benchmark_prompt_templates(calls, file_lines):
+    """Benchmark both renderers for every call type of the settings"""
+    environment = Environment()
+
+    print("🚀 Benchmarking Prompt Template Rendering")
+    print("=" * 60)
+    print(f"Calls per type: {calls}, synthetic file contents: {file_lines} lines\n")
+    print(f"{'Call type':<46} {'Previous':>10} {'Registry':>10} {'Speedup':>8}")
+
+    total_previous = total_current = 0.0
+    for call_type in CALL_TYPES:
+        settings = get_settings().get(call_type)
+        sources = [settings.system, settings.user]
+        variables = make_variables(environment, sources, file_lines)
+        assert render_with_previous_loop(call_type, sources, variables) == (
+            render_with_registry(call_type, sources, variables)
+        )
+
+        previous_ms = timed(
+            render_with_previous_loop, call_type, sources, variables, calls
+        )
+        current_ms = timed(render_with_registry, call_type, sources, variables, calls)
+        total_previous += previous_ms
+        total_current += current_ms
+        print(
+            f"{call_type:<46} {previous_ms:>8.3f}ms {current_ms:>8.3f}ms "
+            f"{previous_ms / current_ms:>7.1f}x"
+        )
+
+    print("\n" + "=" * 60)
+    print(f"Speedup (all call types): {total_previous / total_current:.1f}x")
+    print(f"Registry: {PromptTemplateRegistry.get_shared(autoescape=True).stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--file-lines", type=int, default=200)
+    args = parser.parse_args()
+
+    benchmark_prompt_templates(args.calls, args.file_lines)
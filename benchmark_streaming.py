@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for streamed LLM responses.
+Compares the time to read the last token of a synthetic stream with the previous streaming loop
+(per-chunk sleep, per-chunk echo, stream_chunk_builder) and with AICaller.call_model.
+"""
+
+import argparse
+import contextlib
+import io
+import time
+
+from unittest.mock import patch
+
+import litellm
+
+from litellm.types.utils import Delta, ModelResponseStream, StreamingChoices, Usage
+
+from coverage_ai.ai_caller import AICaller
+
+
+def generate_chunks(num_chunks):
+    """Build a synthetic stream of one-token chunks, followed by a final chunk with the token usage."""
+    chunks = [
+        ModelResponseStream(
+            choices=[StreamingChoices(delta=Delta(content=f"tok{i} "), index=0)]
+        )
+        for i in range(num_chunks)
+    ]
+    final_chunk = ModelResponseStream(choices=[])
+    final_chunk.usage = Usage(
+        prompt_tokens=100, completion_tokens=num_chunks, total_tokens=100 + num_chunks
+    )
+    chunks.append(final_chunk)
+    return chunks
+
+
+def read_with_previous_loop(chunks, messages):
+    """The previous implementation: echo and sleep per chunk, then rebuild the response from all chunks."""
+    collected = []
+    for chunk in chunks:
+        collected.append(chunk)
+        if chunk.choices:
+            print(chunk.choices[0].delta.content or "", end="", flush=True)
+        time.sleep(0.01)  # Optional: Delay to simulate more 'natural' response pacing
+    model_response = litellm.stream_chunk_builder(collected, messages=messages)
+    return model_response["choices"][0]["message"]["content"]
+
+
+def read_with_ai_caller(chunks, prompt):
+    """The current implementation: AICaller.call_model with a patched litellm.completion."""
+    ai_caller = AICaller(
+        model="gpt-4o", enable_retry=False, generate_log_files=False
+    )
+    with patch("coverage_ai.ai_caller.litellm.completion", return_value=iter(chunks)):
+        response, _, _ = ai_caller.call_model(prompt)
+    return response
+
+
+def timed(func, *args):
+    """Run a reader with stdout captured, and return its elapsed time in milliseconds."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        func(*args)
+        return (time.perf_counter() - start_time) * 1000
+
+
+def benchmark_streaming(num_chunks):
+    """Benchmark both readers on the same synthetic stream"""
+    prompt = {"system": "", "user": "Write the tests."}
+    messages = [{"role": "user", "content": prompt["user"]}]
+    chunks = generate_chunks(num_chunks)
+
+    print("🚀 Benchmarking Streamed LLM Responses")
+    print("=" * 60)
+    print(f"Stream: {num_chunks} chunks\n")
+    print(f"{'Reader':<12} {'Time to last token':>20}")
+
+    results = {
+        "previous": timed(read_with_previous_loop, chunks, messages),
+        "current": timed(read_with_ai_caller, chunks, prompt),
+    }
+    for reader, elapsed_ms in results.items():
+        print(f"{reader:<12} {elapsed_ms:>18.1f}ms")
+
+    print("\n" + "=" * 60)
+    print(
+        f"Speedup: {results['previous'] / results['current']:.1f}x "
+        f"({results['previous'] - results['current']:.0f}ms less per response)"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chunks", type=int, default=500)
+    args = parser.parse_args()
+
+    benchmark_streaming(args.chunks)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for parsing LLM responses.
+Parses the responses recorded in stored_responses/ with the previous parser (yaml.safe_load, then removing
+last lines one at a time with a full reparse each) and with load_yaml: as recorded, as JSON (structured
+output), and with a malformed line inserted so that the YAML fixing fallbacks run.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import random
+import time
+
+import yaml
+
+from coverage_ai.utils import YAML_FAST_LOADER, load_yaml, orjson
+
+KEYS_FIX_YAML = ["test_tags", "test_code", "test_name", "test_behavior"]
+MALFORMED_LINES = ["broken: 'unterminated quote", "  - key: [unclosed", "hope this helps!"]
+
+
+def load_stored_responses(responses_dir):
+    """Return the recorded responses of every response file that parses."""
+    responses = []
+    for path in sorted(glob.glob(f"{responses_dir}/*.yml")):
+        try:
+            with open(path, "r") as f:
+                data = yaml.load(f, Loader=YAML_FAST_LOADER)
+        except yaml.YAMLError:
+            print(f"Skipping {path}: invalid YAML")
+            continue
+        for caller_name, entries in data.items():
+            if caller_name == "metadata" or not isinstance(entries, dict):
+                continue
+            for entry in entries.values():
+                if isinstance(entry, dict) and isinstance(entry.get("response"), str):
+                    responses.append(entry["response"])
+    return responses
+
+
+def make_malformed(responses, seed):
+    """Insert a malformed line at a random position of every multi-line response."""
+    rng = random.Random(seed)
+    malformed = []
+    for response in responses:
+        lines = response.split("\n")
+        if len(lines) < 3:
+            continue
+        position = rng.randrange(1, len(lines))
+        lines.insert(position, rng.choice(MALFORMED_LINES))
+        malformed.append("\n".join(lines))
+    return malformed
+
+
+def load_with_previous_parser(response_text):
+    """The previous implementation: yaml.safe_load, then remove last lines one at a time."""
+    response_text = response_text.strip().removeprefix("```yaml").rstrip("`")
+    try:
+        return yaml.safe_load(response_text)
+    except Exception:
+        pass
+    lines = response_text.split("\n")
+    for i in range(1, len(lines)):
+        try:
+            data = yaml.safe_load("\n".join(lines[:-i]))
+            if "language" in data:
+                return data
+        except Exception:
+            pass
+    return None
+
+
+def load_with_load_yaml(response_text):
+    return load_yaml(response_text, keys_fix_yaml=KEYS_FIX_YAML)
+
+
+def timed(func, texts, repeat):
+    """Return the mean time to parse all texts, in milliseconds."""
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start_time) * 1000 / repeat
+
+
+def benchmark_yaml_parsing(responses_dir, repeat, seed):
+    """Benchmark both parsers on the recorded responses"""
+    logging.disable(logging.CRITICAL)
+    responses = load_stored_responses(responses_dir)
+    as_json = []
+    for response in responses:
+        data = load_with_load_yaml(response)
+        if isinstance(data, (dict, list)):
+            as_json.append(json.dumps(data))
+    malformed = make_malformed(responses, seed)
+
+    print("🚀 Benchmarking LLM Response Parsing")
+    print("=" * 60)
+    print(f"Responses: {len(responses)} recorded, {len(malformed)} malformed")
+    print(f"libyaml loader: {YAML_FAST_LOADER is not yaml.SafeLoader}, orjson: {orjson is not None}\n")
+    print(f"{'Responses':<12} {'Parser':<12} {'Time':>12}")
+
+    results = {}
+    for name, texts, repeat_count in (
+        ("recorded", responses, repeat),
+        ("json", as_json, repeat),
+        ("malformed", malformed, 1),
+    ):
+        previous_ms = timed(load_with_previous_parser, texts, repeat_count)
+        current_ms = timed(load_with_load_yaml, texts, repeat_count)
+        results[name] = (previous_ms, current_ms)
+        print(f"{name:<12} {'previous':<12} {previous_ms:>10.1f}ms")
+        print(f"{name:<12} {'load_yaml':<12} {current_ms:>10.1f}ms")
+
+    print("\n" + "=" * 60)
+    for name, (previous_ms, current_ms) in results.items():
+        print(f"Speedup ({name}): {previous_ms / current_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--responses-dir", default="stored_responses")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    benchmark_yaml_parsing(args.responses_dir, args.repeat, args.seed)
@@ -1,13 +1,12 @@
 import os
 from time import sleep
 
-from jinja2 import Environment, StrictUndefined
-
 from coverage_ai.lsp_logic.file_map.file_map import FileMap
 from coverage_ai.lsp_logic.multilspy import LanguageServer
 from coverage_ai.lsp_logic.multilspy.multilspy_config import MultilspyConfig
 from coverage_ai.lsp_logic.multilspy.multilspy_logger import MultilspyLogger
 
+from coverage_ai.prompt_templates import PromptTemplateRegistry
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.utils import load_yaml
 
@@ -34,15 +33,21 @@ async def analyze_context(test_file, context_files, args, ai_caller):
             "test_file_content": open(test_file, "r").read(),
             "context_files_names_rel": context_files_rel_filtered_list_str,
         }
-        environment = Environment(undefined=StrictUndefined)
-        system_prompt = environment.from_string(
-            get_settings().analyze_test_against_context.system
-        ).render(variables)
-        user_prompt = environment.from_string(
-            get_settings().analyze_test_against_context.user
-        ).render(variables)
-        response, prompt_token_count, response_token_count = ai_caller.call_model(
-            prompt={"system": system_prompt, "user": user_prompt}, stream=False
+        templates = PromptTemplateRegistry.get_shared()
+        system_prompt = templates.render(
+            "analyze_test_against_context.system",
+            get_settings().analyze_test_against_context.system,
+            variables,
+        )
+        user_prompt = templates.render(
+            "analyze_test_against_context.user",
+            get_settings().analyze_test_against_context.user,
+            variables,
+        )
+        response, prompt_token_count, response_token_count = (
+            await ai_caller.acall_model(
+                prompt={"system": system_prompt, "user": user_prompt}, stream=False
+            )
         )
         response_dict = load_yaml(response)
         if int(response_dict.get("is_this_a_unit_test", 0)) == 1:
@@ -7,33 +7,86 @@ from typing import Optional
 
 import litellm
 
-from tenacity import retry, stop_after_attempt, wait_fixed
 from wandb.sdk.data_types.trace_tree import Trace
 
 from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.http_session_pool import HTTPSessionPool
 from coverage_ai.record_replay_manager import RecordReplayManager
+from coverage_ai.request_limiter import RequestLimiter
+from coverage_ai.response_cache import ResponseCache
+from coverage_ai.retry_scheduler import RetryScheduler
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.utils import get_original_caller
 
 
-def conditional_retry(func):
+def scheduled_retry(func):
+    """Retry the calls of an AICaller with retries enabled with the shared `RetryScheduler`."""
+
     @wraps(func)
     def wrapper(self, *args, **kwargs):
         if not self.enable_retry:
             return func(self, *args, **kwargs)
+        return RetryScheduler.get_shared().call(
+            self.model, lambda: func(self, *args, **kwargs)
+        )
 
-        model_retries = get_settings().get("default").get("model_retries", 3)
+    return wrapper
 
-        @retry(stop=stop_after_attempt(model_retries), wait=wait_fixed(1))
-        def retry_wrapper():
-            return func(self, *args, **kwargs)
 
-        return retry_wrapper()
+class StreamAssembler:
+    """
+    Assembles a streamed LLM response: the delta text of every chunk is appended to a single buffer, and
+    token usage is read from the final chunk (sent when the request asks for `include_usage`).
 
-    return wrapper
+    Echoing the response to the console is optional, and throttled: pending text is printed at most once
+    every `echo_interval_sec` seconds instead of once per chunk.
+    """
+
+    def __init__(self, echo: bool = False, echo_interval_sec: float = 0.05):
+        self.echo = echo
+        self.echo_interval_sec = echo_interval_sec
+        self.usage = None
+        self.chunk_count = 0
+        self._parts = []
+        self._pending_echo = []
+        self._last_echo_time = 0.0
+
+    def add(self, chunk):
+        """Add a streamed chunk."""
+        if chunk.choices:
+            text = chunk.choices[0].delta.content
+            if text:
+                self._parts.append(text)
+                if self.echo:
+                    self._pending_echo.append(text)
+                    now = time.monotonic()
+                    if now - self._last_echo_time >= self.echo_interval_sec:
+                        self._flush_echo()
+                        self._last_echo_time = now
+        usage = getattr(chunk, "usage", None)
+        if usage:
+            self.usage = usage
+        self.chunk_count += 1
+
+    def _flush_echo(self):
+        print("".join(self._pending_echo), end="", flush=True)
+        self._pending_echo = []
+
+    def finish(self) -> str:
+        """Print any text not echoed yet, and return the full response text."""
+        if self.echo:
+            self._flush_echo()
+            print("\n")
+        return "".join(self._parts)
 
 
 class AICaller:
+    # Appended to the prompts of callers asking for structured output (see `llm_structured_output`)
+    STRUCTURED_OUTPUT_INSTRUCTION = (
+        "Answer with a single JSON object instead of YAML, with the same keys and structure as the YAML "
+        "output described above."
+    )
+
     def __init__(
         self,
         model: str,
@@ -46,6 +99,7 @@ class AICaller:
         record_replay_manager: Optional[RecordReplayManager] = None,
         logger: Optional[CustomLogger] = None,
         generate_log_files: bool = True,
+        response_cache: Optional[ResponseCache] = None,
     ):
         """
         Initializes an instance of the AICaller class.
@@ -53,6 +107,8 @@ class AICaller:
         Parameters:
             model (str): The name of the model to be used.
             api_base (str): The base API URL to use in case the model is set to Ollama or Hugging Face.
+            response_cache (ResponseCache, optional): The cache of LLM responses. Defaults to the cache
+                                                      configured in `[llm_response_cache]`, if enabled.
         """
         self.model = model
         self.api_base = api_base
@@ -67,21 +123,182 @@ class AICaller:
         self.logger = logger or CustomLogger.get_logger(
             __name__, generate_log_files=generate_log_files
         )
+        self.response_cache = response_cache or self._create_response_cache()
+        # Async calls reuse the keep-alive connections of the HTTP clients shared by the process
+        # (`[llm_http]`). The synchronous client is installed once by the entry points.
+        self.http_session_pool = HTTPSessionPool.get_shared()
+        # Prompt tokens read from the provider's prompt cache: in the last response, and in all responses
+        self.last_cached_prompt_tokens = 0
+        self.total_cached_prompt_tokens = 0
+        # Tokens of the responses answered from the response cache, which were not sent to the provider again
+        self.total_saved_prompt_tokens = 0
+        self.total_saved_completion_tokens = 0
 
-    @conditional_retry  # You can access self.enable_retry here
-    def call_model(self, prompt: dict, stream=True):
+    @staticmethod
+    def _create_response_cache() -> Optional[ResponseCache]:
+        """Create the response cache configured in `[llm_response_cache]`, or return None if it is disabled."""
+        settings = get_settings().get("llm_response_cache", {})
+        if not settings.get("enabled", False):
+            return None
+        return ResponseCache(
+            settings.get("path", ".coverage_ai_cache/llm_responses.sqlite"),
+            ttl_sec=settings.get("ttl_sec", 604800),
+            max_entries=settings.get("max_entries", 1000),
+        )
+
+    @scheduled_retry  # You can access self.enable_retry here
+    def call_model(
+        self,
+        prompt: dict,
+        stream=True,
+        cache_prefix: Optional[str] = None,
+        caller_name: Optional[str] = None,
+    ):
         """
         Call the language model with the provided prompt and retrieve the response.
 
         Parameters:
             prompt (dict): The prompt to be sent to the language model.
             stream (bool, optional): Whether to stream the response or not. Defaults to True.
+            cache_prefix (str, optional): A prefix of the user prompt that stays the same across calls. It is
+                                          marked as a prompt caching breakpoint for providers that need one
+                                          (see `_build_messages`).
+            caller_name (str, optional): The name of the calling function, used to cache and record the
+                                         response. Defaults to the caller found on the call stack, which
+                                         must be passed when calling from another thread.
+
+        Returns:
+            tuple: A tuple containing the response generated by the language model, the number of tokens used from the prompt, and the total number of tokens in the response.
+        """
+        caller_name = caller_name or get_original_caller()
+        messages = self._build_messages(prompt, cache_prefix)
+        completion_params = self._build_completion_params(messages, stream, caller_name)
+        stream = completion_params["stream"]
+
+        cache_key = self._get_cache_key(caller_name, completion_params)
+        cached_response = self._get_cached_response(cache_key, prompt, caller_name)
+        if cached_response:
+            return cached_response
+
+        try:
+            self.logger.info(f"📣 Calling LLM from {caller_name}()...")
+            response = litellm.completion(**completion_params)
+        except Exception as e:
+            self.logger.error(f"Error calling LLM model: {e}")
+            raise e
+
+        # A stream that failed after some chunks gives a truncated response, which must not be cached
+        complete = True
+        if stream:
+            assembler = StreamAssembler(
+                echo=get_settings().get("llm_streaming.echo", True),
+                echo_interval_sec=get_settings().get(
+                    "llm_streaming.echo_interval_sec", 0.05
+                ),
+            )
+            self.logger.info("Streaming results from LLM model...")
+            try:
+                for chunk in response:
+                    assembler.add(chunk)
+            except Exception as e:
+                self.logger.error(f"Error calling LLM model during streaming: {e}")
+                if self.enable_retry or not assembler.chunk_count:
+                    raise e
+                complete = False
+            content, prompt_tokens, completion_tokens = self._build_streamed_response(
+                assembler, messages
+            )
+        else:
+            # Non-streaming response is a CompletionResponse object
+            content, prompt_tokens, completion_tokens = self._read_response(response)
+
+        if complete:
+            self._cache_response(cache_key, content, prompt_tokens, completion_tokens)
+        self._log_and_record_response(
+            prompt, content, prompt_tokens, completion_tokens, caller_name
+        )
+
+        # Returns: Response, Prompt token count, and Completion token count
+        return content, prompt_tokens, completion_tokens
+
+    async def acall_model(
+        self, prompt: dict, stream=False, cache_prefix: Optional[str] = None
+    ):
+        """
+        Call the language model without blocking the event loop.
+
+        Requests of every AICaller on the event loop share a limiter (see `RequestLimiter`): at most
+        `llm_concurrency.max_concurrent_requests` requests are in flight, and requests to a provider are
+        spaced out according to its requests per minute. Failed requests are retried like `call_model`.
+
+        Parameters:
+            prompt (dict): The prompt to be sent to the language model.
+            stream (bool, optional): Whether to stream the response or not. Streamed chunks are collected
+                                     without being printed, since concurrent responses would interleave.
+                                     Defaults to False.
+            cache_prefix (str, optional): A prefix of the user prompt that stays the same across calls, as
+                                          in `call_model`.
 
         Returns:
             tuple: A tuple containing the response generated by the language model, the number of tokens used from the prompt, and the total number of tokens in the response.
         """
         caller_name = get_original_caller()
+        messages = self._build_messages(prompt, cache_prefix)
+        completion_params = self._build_completion_params(messages, stream, caller_name)
+
+        cache_key = self._get_cache_key(caller_name, completion_params)
+        cached_response = self._get_cached_response(cache_key, prompt, caller_name)
+        if cached_response:
+            return cached_response
 
+        settings = get_settings().get("llm_concurrency", {})
+        limiter = RequestLimiter.for_current_loop(
+            max_concurrent_requests=settings.get("max_concurrent_requests", 4),
+            requests_per_minute=settings.get("requests_per_minute", 0),
+            provider_requests_per_minute=settings.get("provider_requests_per_minute", {}),
+        )
+
+        if self.http_session_pool:
+            self.http_session_pool.install_async()
+
+        async def attempt():
+            async with limiter.request(self.model):
+                try:
+                    self.logger.info(f"📣 Calling LLM from {caller_name}()...")
+                    response = await litellm.acompletion(**completion_params)
+                    if completion_params["stream"]:
+                        assembler = StreamAssembler()
+                        async for chunk in response:
+                            assembler.add(chunk)
+                        return self._build_streamed_response(assembler, messages)
+                    return self._read_response(response, echo=False)
+                except Exception as e:
+                    self.logger.error(f"Error calling LLM model: {e}")
+                    raise e
+
+        content, prompt_tokens, completion_tokens = (
+            await RetryScheduler.get_shared().acall(
+                self.model, attempt, max_attempts=None if self.enable_retry else 1
+            )
+        )
+
+        self._cache_response(cache_key, content, prompt_tokens, completion_tokens)
+        self._log_and_record_response(
+            prompt, content, prompt_tokens, completion_tokens, caller_name
+        )
+        return content, prompt_tokens, completion_tokens
+
+    def _build_messages(self, prompt: dict, cache_prefix: Optional[str] = None) -> list:
+        """
+        Build the chat messages of a {"system": ..., "user": ...} prompt.
+
+        OpenAI-compatible providers cache repeated prompt prefixes on their own. Anthropic models only cache
+        up to an explicit breakpoint, so for them a `cache_prefix` of the user prompt is sent as a separate
+        content block marked with `cache_control` (when `llm_prompt_cache.enabled`).
+
+        Raises:
+            KeyError: If the prompt does not contain 'system' and 'user' keys.
+        """
         if "system" not in prompt or "user" not in prompt:
             raise KeyError(
                 "The prompt dictionary must contain 'system' and 'user' keys."
@@ -103,6 +320,46 @@ class AICaller:
                     {"role": "user", "content": prompt["user"]},
                 ]
 
+        if (
+            cache_prefix
+            and prompt["user"].startswith(cache_prefix)
+            and self._uses_cache_breakpoints()
+        ):
+            messages[-1]["content"] = [
+                {
+                    "type": "text",
+                    "text": cache_prefix,
+                    "cache_control": {"type": "ephemeral"},
+                },
+                {"type": "text", "text": prompt["user"][len(cache_prefix) :]},
+            ]
+        return messages
+
+    def _uses_cache_breakpoints(self) -> bool:
+        """Whether the model only caches prompt prefixes marked with `cache_control` (Anthropic models)."""
+        if not get_settings().get("llm_prompt_cache.enabled", True):
+            return False
+        return "claude" in self.model or self.model.startswith("anthropic/")
+
+    def _track_cached_tokens(self, usage) -> int:
+        """
+        Read the number of prompt tokens served from the provider's prompt cache, and add it to the counters.
+        litellm reports it in `prompt_tokens_details.cached_tokens`, and Anthropic in `cache_read_input_tokens`.
+        """
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if not isinstance(cached_tokens, int):
+            cached_tokens = getattr(usage, "cache_read_input_tokens", None)
+        if not isinstance(cached_tokens, int):
+            cached_tokens = 0
+        self.last_cached_prompt_tokens = cached_tokens
+        self.total_cached_prompt_tokens += cached_tokens
+        return cached_tokens
+
+    def _build_completion_params(
+        self, messages: list, stream: bool, caller_name: Optional[str] = None
+    ) -> dict:
+        """Build the litellm completion parameters for the model. The returned "stream" may be turned off."""
         # Default completion parameters
         completion_params = {
             "model": self.model,
@@ -114,7 +371,6 @@ class AICaller:
 
         # Model-specific adjustments
         if self.model in ["o1-preview", "o1-mini", "o1", "o3-mini"]:
-            stream = False  # o1 doesn't support streaming
             completion_params["temperature"] = 1
             completion_params["stream"] = False  # o1 doesn't support streaming
             completion_params["max_completion_tokens"] = 2 * self.max_tokens
@@ -129,43 +385,144 @@ class AICaller:
         ):
             completion_params["api_base"] = self.api_base
 
+        # Ask for the token usage in the final streamed chunk, when the provider supports it
+        if completion_params["stream"] and self._supports_stream_usage():
+            completion_params["stream_options"] = {"include_usage": True}
+
+        # Ask for a JSON object instead of YAML, for the callers listed in `llm_structured_output.callers`
+        if self._uses_structured_output(caller_name):
+            completion_params["response_format"] = {"type": "json_object"}
+            completion_params["messages"] = self._add_json_instruction(messages)
+        return completion_params
+
+    def _uses_structured_output(self, caller_name: Optional[str]) -> bool:
+        """Whether the response of a caller is requested as a JSON object (when the provider supports it)."""
+        settings = get_settings().get("llm_structured_output", {})
+        if not settings.get("enabled", False):
+            return False
+        if caller_name not in settings.get("callers", []):
+            return False
+        return self._supports_openai_param("response_format")
+
+    def _add_json_instruction(self, messages: list) -> list:
+        """Return the messages with an instruction to answer in JSON appended to the last message."""
+        messages = [dict(message) for message in messages]
+        content = messages[-1]["content"]
+        if isinstance(content, list):
+            messages[-1]["content"] = content + [
+                {"type": "text", "text": self.STRUCTURED_OUTPUT_INSTRUCTION}
+            ]
+        else:
+            messages[-1]["content"] = (
+                content + "\n\n" + self.STRUCTURED_OUTPUT_INSTRUCTION
+            )
+        return messages
+
+    def _get_cache_key(self, caller_name: str, completion_params: dict) -> Optional[str]:
+        """
+        Return the response cache key of a request, or None if the response of this caller is not cached.
+        Only the callers listed in `llm_response_cache.cached_callers` are cached (every caller if the list is
+        empty), so that test generation keeps sampling new responses.
+        """
+        if not self.response_cache:
+            return None
+        cached_callers = get_settings().get("llm_response_cache.cached_callers", [])
+        if cached_callers and caller_name not in cached_callers:
+            return None
+        return ResponseCache.make_key(
+            self.model, completion_params["temperature"], completion_params["messages"]
+        )
+
+    def _get_cached_response(
+        self, cache_key: Optional[str], prompt: dict, caller_name: str
+    ) -> Optional[tuple]:
+        """
+        Return the cached response of a request as (content, 0, 0), if any: a cached response uses no tokens.
+        Its original token counts are added to `total_saved_prompt_tokens` and `total_saved_completion_tokens`.
+        """
+        if not cache_key:
+            return None
+        cached_response = self.response_cache.get(cache_key)
+        if not cached_response:
+            return None
+        content, prompt_tokens, completion_tokens = cached_response
+        self.logger.info(
+            f"♻️ Using the cached LLM response for {caller_name}() "
+            f"({prompt_tokens + completion_tokens} tokens saved)"
+        )
+        self.last_cached_prompt_tokens = 0
+        self.total_saved_prompt_tokens += prompt_tokens
+        self.total_saved_completion_tokens += completion_tokens
+        self._log_and_record_response(prompt, *cached_response, caller_name)
+        return content, 0, 0
+
+    def _cache_response(
+        self,
+        cache_key: Optional[str],
+        content: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+    ):
+        """Store a response in the response cache. Cache errors are logged and ignored."""
+        if not cache_key:
+            return
         try:
-            self.logger.info(f"📣 Calling LLM from {caller_name}()...")
-            response = litellm.completion(**completion_params)
+            self.response_cache.put(
+                cache_key, self.model, content, prompt_tokens, completion_tokens
+            )
         except Exception as e:
-            self.logger.error(f"Error calling LLM model: {e}")
-            raise e
+            self.logger.error(f"Error caching LLM response: {e}")
 
-        if stream:
-            chunks = []
-            self.logger.info("Streaming results from LLM model...")
-            try:
-                for chunk in response:
-                    print(chunk.choices[0].delta.content or "", end="", flush=True)
-                    chunks.append(chunk)
-                    # Optional: Delay to simulate more 'natural' response pacing
-                    time.sleep(0.01)
+    def _supports_stream_usage(self) -> bool:
+        """Whether the provider of the model can report token usage in the final streamed chunk."""
+        return self._supports_openai_param("stream_options")
 
-            except Exception as e:
-                self.logger.error(f"Error calling LLM model during streaming: {e}")
-                if self.enable_retry:
-                    raise e
-            model_response = litellm.stream_chunk_builder(chunks, messages=messages)
-            print("\n")
-            # Build the final response from the streamed chunks
-            content = model_response["choices"][0]["message"]["content"]
-            usage = model_response["usage"]
-            prompt_tokens = int(usage["prompt_tokens"])
-            completion_tokens = int(usage["completion_tokens"])
-        else:
-            # Non-streaming response is a CompletionResponse object
-            content = response.choices[0].message.content
+    def _supports_openai_param(self, param: str) -> bool:
+        """Whether the provider of the model accepts an OpenAI completion parameter."""
+        try:
+            supported_params = litellm.get_supported_openai_params(model=self.model)
+        except Exception:
+            return False
+        return param in (supported_params or [])
+
+    def _build_streamed_response(
+        self, assembler: StreamAssembler, messages: list
+    ) -> tuple:
+        """
+        Build the final response content and token counts of a streamed response. Token counts are
+        estimated with the model's tokenizer when the stream did not report usage.
+        """
+        content = assembler.finish()
+        self._track_cached_tokens(assembler.usage)
+        if assembler.usage:
+            return (
+                content,
+                int(assembler.usage.prompt_tokens),
+                int(assembler.usage.completion_tokens),
+            )
+        prompt_tokens = litellm.token_counter(model=self.model, messages=messages)
+        completion_tokens = litellm.token_counter(model=self.model, text=content)
+        return content, int(prompt_tokens), int(completion_tokens)
+
+    def _read_response(self, response, echo: bool = True) -> tuple:
+        """Read the content and token counts of a non-streaming response, printing the content if `echo`."""
+        content = response.choices[0].message.content
+        if echo:
             self.logger.info("Printing results from LLM model...")
             print(content)
-            usage = response.usage
-            prompt_tokens = int(usage.prompt_tokens)
-            completion_tokens = int(usage.completion_tokens)
+        usage = response.usage
+        self._track_cached_tokens(usage)
+        return content, int(usage.prompt_tokens), int(usage.completion_tokens)
 
+    def _log_and_record_response(
+        self,
+        prompt: dict,
+        content: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        caller_name: str,
+    ):
+        """Log the response to W&B (if configured) and record it in record mode."""
         if "WANDB_API_KEY" in os.environ:
             try:
                 root_span = Trace(
@@ -192,6 +549,3 @@ class AICaller:
                 completion_tokens,
                 caller_name,
             )
-
-        # Returns: Response, Prompt token count, and Completion token count
-        return content, prompt_tokens, completion_tokens
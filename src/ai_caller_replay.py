@@ -26,14 +26,21 @@ class AICallerReplay:
         self.logger = logger or CustomLogger.get_logger(
             __name__, generate_log_files=generate_log_files
         )
-
-    def call_model(self, prompt: dict, stream=True) -> tuple[str, int, int]:
+        self.last_cached_prompt_tokens = 0
+        self.total_cached_prompt_tokens = 0
+        self.total_saved_prompt_tokens = 0
+        self.total_saved_completion_tokens = 0
+
+    def call_model(
+        self, prompt: dict, stream=True, cache_prefix: Optional[str] = None
+    ) -> tuple[str, int, int]:
         """
         Replay a recorded response for the given prompt.
 
         Parameters:
             prompt (dict): The prompt to find a matching recorded response for
             stream (bool, optional): Whether to stream the response. Defaults to True.
+            cache_prefix (str, optional): Ignored: replayed responses do not use prompt caching.
 
         Returns:
             tuple: (content, prompt_tokens, completion_tokens)
@@ -68,6 +75,22 @@ class AICallerReplay:
 
         return content, prompt_tokens, completion_tokens
 
+    async def acall_model(
+        self, prompt: dict, stream=False, cache_prefix: Optional[str] = None
+    ) -> tuple[str, int, int]:
+        """
+        Replay a recorded response for the given prompt, with the same interface as AICaller.acall_model.
+
+        Parameters:
+            prompt (dict): The prompt to find a matching recorded response for
+            stream (bool, optional): Whether to stream the response. Defaults to False.
+            cache_prefix (str, optional): Ignored: replayed responses do not use prompt caching.
+
+        Returns:
+            tuple: (content, prompt_tokens, completion_tokens)
+        """
+        return self.call_model(prompt, stream=stream)
+
     @staticmethod
     def stream_recorded_llm_response(content: str) -> None:
         """
@@ -13,7 +13,10 @@ from coverage_ai.ai_caller_replay import AICallerReplay
 from coverage_ai.custom_logger import CustomLogger
 from coverage_ai.default_agent_completion import DefaultAgentCompletion
 from coverage_ai.record_replay_manager import RecordReplayManager
+from coverage_ai.retry_scheduler import RetryScheduler
+from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.settings.config_schema import CoverAgentConfig
+from coverage_ai.speculative_caller import ModelRouter, SpeculativeCaller
 from coverage_ai.unit_test_db import UnitTestDB
 from coverage_ai.unit_test_generator import UnitTestGenerator
 from coverage_ai.unit_test_validator import UnitTestValidator
@@ -62,10 +65,14 @@ class CoverAgent:
         self._duplicate_test_file()
 
         # Configure the AgentCompletion object
+        self.speculative_caller = None
         if agent_completion:
             self.agent_completion = agent_completion
         else:
             self.ai_caller = self._initialize_ai_caller()
+            self.speculative_caller = self._create_speculative_caller(self.ai_caller)
+            if self.speculative_caller:
+                self.ai_caller = self.speculative_caller
             self.agent_completion = DefaultAgentCompletion(
                 caller=self.ai_caller, generate_log_files=self.generate_log_files
             )
@@ -200,6 +207,58 @@ class CoverAgent:
             ai_caller_params["record_mode"] = False
             return AICaller(**ai_caller_params)
 
+    def _create_speculative_caller(self, ai_caller) -> Optional[SpeculativeCaller]:
+        """
+        Create the caller racing the models configured in `[speculative_generation]` against the main model,
+        or return None if speculative generation is disabled or responses are replayed.
+        """
+        settings = get_settings().get("speculative_generation", {})
+        if not settings.get("enabled", False) or not isinstance(ai_caller, AICaller):
+            return None
+        models = [
+            model
+            for model in dict.fromkeys(settings.get("models", []))
+            if model != ai_caller.model
+        ]
+        if not models:
+            self.logger.warning(
+                "Speculative generation is enabled, but no other model is configured."
+            )
+            return None
+
+        callers = [ai_caller] + [
+            AICaller(
+                model=model,
+                api_base=ai_caller.api_base,
+                max_tokens=ai_caller.max_tokens,
+                source_file=ai_caller.source_file,
+                test_file=ai_caller.test_file,
+                record_mode=ai_caller.record_mode,
+                record_replay_manager=ai_caller.record_replay_manager,
+                generate_log_files=self.generate_log_files,
+                response_cache=ai_caller.response_cache,
+            )
+            for model in models
+        ]
+        self.logger.info(
+            f"Speculative generation: racing {ai_caller.model} against {', '.join(models)}"
+        )
+        return SpeculativeCaller(
+            callers,
+            is_useful=self._has_new_tests,
+            router=ModelRouter(
+                path=settings.get("stats_path", ""),
+                min_samples=settings.get("min_samples", 8),
+            ),
+            max_models=settings.get("max_models", 0),
+            generate_log_files=self.generate_log_files,
+        )
+
+    def _has_new_tests(self, response: str) -> bool:
+        """Return whether a test generation response parses as YAML with new tests."""
+        tests_dict = self.test_gen.parse_tests_response(response)
+        return isinstance(tests_dict, dict) and bool(tests_dict.get("new_tests"))
+
     def _validate_paths(self):
         """
         Validate all required file paths and initialize the test database.
@@ -288,15 +347,43 @@ class CoverAgent:
             coverage_report (dict): Current coverage metrics
         """
         self.log_coverage()
+        token_count_before = (
+            self.test_gen.total_input_token_count
+            + self.test_gen.total_output_token_count
+        )
+        line_coverage = self.test_validator.last_line_coverage
+        if self.speculative_caller:
+            self.speculative_caller.language = language
         generated_tests_dict = self.test_gen.generate_tests(
-            failed_test_runs, language, test_framework, coverage_report
+            failed_test_runs,
+            language,
+            test_framework,
+            coverage_report,
+            missed_lines=line_coverage.missed_lines if line_coverage else None,
         )
 
         try:
-            test_results = [
-                self.test_validator.validate_test(test)
-                for test in generated_tests_dict.get("new_tests", [])
-            ]
+            test_results = self.test_validator.validate_tests(
+                generated_tests_dict.get("new_tests", [])
+            )
+            if self.speculative_caller:
+                self._record_model_acceptance(
+                    self.speculative_caller.last_model, language, test_results
+                )
+                test_results += self._validate_late_responses(language)
+
+            # Log the marginal coverage of this iteration against the tokens spent to generate it
+            newly_covered_line_count = sum(
+                len(result.get("newly_covered_lines", [])) for result in test_results
+            )
+            token_count = (
+                self.test_gen.total_input_token_count
+                + self.test_gen.total_output_token_count
+                - token_count_before
+            )
+            self.logger.info(
+                f"Newly covered lines: {newly_covered_line_count} ({token_count} tokens spent)"
+            )
 
             # Insert results into database
             if self.has_test_db():
@@ -309,6 +396,58 @@ class CoverAgent:
                 f"Failed to validate the tests within {generated_tests_dict}. Error: {e}"
             )
 
+    def _validate_late_responses(self, language: str) -> list:
+        """
+        Validate the tests of the slower models of the last speculative generation call as their responses
+        arrive, and cancel the remaining calls once the desired coverage is reached.
+
+        Returns:
+            list: The validation results of the late tests.
+        """
+        test_results = []
+        try:
+            for model, response, _, _ in self.speculative_caller.late_responses():
+                if self.test_validator.current_coverage >= (
+                    self.test_validator.desired_coverage / 100
+                ):
+                    break
+                generated_tests = self.test_gen.parse_tests_response(response).get(
+                    "new_tests", []
+                )
+                self.logger.info(
+                    f"Validating {len(generated_tests)} more tests generated by {model}"
+                )
+                results = self.test_validator.validate_tests(generated_tests)
+                self._record_model_acceptance(model, language, results)
+                test_results += results
+        finally:
+            self.speculative_caller.cancel_pending()
+            self._add_unreported_speculative_tokens()
+        return test_results
+
+    def _add_unreported_speculative_tokens(self):
+        """
+        Add the tokens of the speculative calls whose responses were not returned to the test generator (late
+        responses, useful or not, and cancelled calls that finished) to the test generation token counts.
+        """
+        prompt_token_count, response_token_count = (
+            self.speculative_caller.pop_unreported_tokens()
+        )
+        self.test_gen.total_input_token_count += prompt_token_count
+        self.test_gen.total_output_token_count += response_token_count
+
+    def _record_model_acceptance(self, model: str, language: str, test_results: list):
+        """Record how many of the tests generated by a model were accepted."""
+        accepted = sum(result.get("status") == "PASS" for result in test_results)
+        self.speculative_caller.router.record_validation(
+            model, language, len(test_results), accepted
+        )
+        self.logger.info(
+            f"{model}: {accepted}/{len(test_results)} tests accepted "
+            f"(acceptance rate for {language}: "
+            f"{self.speculative_caller.router.acceptance_rate(model, language):.0%})"
+        )
+
     def has_test_db(self) -> bool:
         """
         Check if the test database is initialized.
@@ -366,6 +505,11 @@ class CoverAgent:
             else:
                 self.logger.info(failure_message)
 
+        # Count the tokens of the speculative calls still running, which the interpreter waits for anyway
+        if self.speculative_caller:
+            self.speculative_caller.close()
+            self._add_unreported_speculative_tokens()
+
         # Log token usage
         self.logger.info(
             f"Total number of input tokens used for LLM model {self.config.model}: "
@@ -375,6 +519,26 @@ class CoverAgent:
             f"Total number of output tokens used for LLM model {self.config.model}: "
             f"{self.test_gen.total_output_token_count + self.test_validator.total_output_token_count}"
         )
+        if hasattr(self, "ai_caller"):
+            self.logger.info(
+                f"Total number of input tokens read from the prompt cache of LLM model {self.config.model}: "
+                f"{self.ai_caller.total_cached_prompt_tokens}"
+            )
+            saved_token_count = (
+                self.ai_caller.total_saved_prompt_tokens
+                + self.ai_caller.total_saved_completion_tokens
+            )
+            if saved_token_count:
+                self.logger.info(
+                    f"Total number of tokens saved by the LLM response cache: {saved_token_count}"
+                )
+        for model, stats in RetryScheduler.get_shared().stats().items():
+            if stats["retries"] or stats["wait_sec"]:
+                self.logger.info(
+                    f"LLM retries for {model}: {stats['retries']} retries of {stats['attempts']} attempts, "
+                    f"{stats['rate_limited']} rate limited, {stats['throttled']} refused by the retry "
+                    f"budget, {stats['wait_sec']:.1f}s spent waiting"
+                )
 
         # Only generate report if file generation is enabled
         if self.generate_log_files:
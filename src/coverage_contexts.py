@@ -0,0 +1,128 @@
+import os
+import sqlite3
+
+from typing import Dict, Iterable, List, Set
+
+
+def numbits_to_lines(numbits: bytes) -> List[int]:
+    """
+    Decode a coverage.py "numbits" blob into the line numbers it holds.
+
+    Each bit of the blob stands for one line number: bit N of byte B is line B * 8 + N.
+
+    Args:
+        numbits (bytes): The encoded line numbers.
+
+    Returns:
+        List[int]: The sorted line numbers.
+    """
+    lines = []
+    for byte_index, byte in enumerate(numbits):
+        for bit in range(8):
+            if byte & (1 << bit):
+                lines.append(byte_index * 8 + bit)
+    return lines
+
+
+def context_node_id(context: str) -> str:
+    """
+    Extract the node id of the test function from a pytest-cov dynamic context.
+
+    pytest-cov labels the data of each test phase as "<node id>|<phase>", e.g.
+    "tests/test_app.py::TestApp::test_add[1-2]|run". The phase and the parameters are removed, so the
+    phases and parametrized cases of a test function share one node id. The empty context holds the
+    lines executed outside of any test (imports, collection).
+
+    Args:
+        context (str): The coverage context label.
+
+    Returns:
+        str: The node id ("tests/test_app.py::TestApp::test_add" in the example above), or "" for the
+             empty context.
+    """
+    return context.split("|", 1)[0].split("[", 1)[0]
+
+
+def node_ids_match(node_id: str, other_node_id: str) -> bool:
+    """
+    Check whether two pytest node ids name the same test, when their paths may be relative to different
+    directories (pytest's rootdir, or the directory the test command runs in).
+
+    Args:
+        node_id (str): A node id, e.g. "tests/test_app.py::TestApp::test_add".
+        other_node_id (str): Another node id, e.g. "project/tests/test_app.py::TestApp::test_add".
+
+    Returns:
+        bool: Whether one node id is the other with a longer path.
+    """
+    if not node_id or not other_node_id:
+        return node_id == other_node_id
+    shorter, longer = sorted((node_id, other_node_id), key=len)
+    return longer == shorter or longer.endswith("/" + shorter)
+
+
+def load_line_contexts(data_file: str) -> Dict[str, Dict[str, Set[int]]]:
+    """
+    Read the lines executed by every coverage context from a coverage.py data file.
+
+    The data file is read directly with sqlite3, so coverage.py does not need to be installed
+    alongside Cover Agent. Both line data and branch (arc) data are supported.
+
+    Args:
+        data_file (str): Path to the coverage.py data file (usually ".coverage").
+
+    Returns:
+        Dict[str, Dict[str, Set[int]]]: Mapping of measured file path -> context label -> executed lines.
+
+    Raises:
+        FileNotFoundError: If the data file does not exist.
+        ValueError: If the file is not a coverage.py data file.
+    """
+    if not os.path.isfile(data_file):
+        raise FileNotFoundError(f"Coverage data file {data_file} not found.")
+
+    connection = sqlite3.connect(f"file:{data_file}?mode=ro", uri=True)
+    try:
+        files = dict(connection.execute("select id, path from file"))
+        contexts = dict(connection.execute("select id, context from context"))
+        line_contexts = {path: {} for path in files.values()}
+
+        for file_id, context_id, numbits in connection.execute(
+            "select file_id, context_id, numbits from line_bits"
+        ):
+            line_contexts[files[file_id]].setdefault(contexts[context_id], set()).update(
+                numbits_to_lines(numbits)
+            )
+        for file_id, context_id, from_line, to_line in connection.execute(
+            "select file_id, context_id, fromno, tono from arc"
+        ):
+            lines = line_contexts[files[file_id]].setdefault(contexts[context_id], set())
+            lines.update(line for line in (from_line, to_line) if line > 0)
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"{data_file} is not a valid coverage data file: {e}")
+    finally:
+        connection.close()
+
+    return line_contexts
+
+
+def lines_by_test(
+    line_contexts: Dict[str, Dict[str, Set[int]]], file_paths: Iterable[str]
+) -> Dict[str, Set[tuple]]:
+    """
+    Group the executed lines of the given files by test function node id (see `context_node_id`).
+
+    Args:
+        line_contexts (Dict[str, Dict[str, Set[int]]]): The output of load_line_contexts.
+        file_paths (Iterable[str]): The measured files to take into account.
+
+    Returns:
+        Dict[str, Set[tuple]]: Mapping of test node id -> set of (file path, line number).
+    """
+    grouped = {}
+    for file_path in file_paths:
+        for context, lines in line_contexts.get(file_path, {}).items():
+            grouped.setdefault(context_node_id(context), set()).update(
+                (file_path, line) for line in lines
+            )
+    return grouped
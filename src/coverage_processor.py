@@ -1,17 +1,26 @@
 import csv
 import json
+import mmap
 import os
 import re
-import xml.etree.ElementTree as ET
 import defusedxml.ElementTree as SafeET
 
 from typing import List, Optional, Tuple, Union
 
 from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.file_coverage import FileCoverage
+from coverage_ai.file_hash_cache import FileHashCache
+from coverage_ai.lru_cache import LRUCache
+from coverage_ai.report_cache import ReportCache
 from coverage_ai.settings.config_schema import CoverageType
 
 
 class CoverageProcessor:
+    # Package and class names extracted from JaCoCo source files, keyed by (extension, SHA-256 of the source)
+    _package_and_class_cache = LRUCache(max_entries=256)
+    # The SHA-256 of the source files, only computed again when a file's size, mtime or inode changes
+    _source_hash_cache = FileHashCache(algorithm="sha256")
+
     def __init__(
         self,
         file_path: str,
@@ -21,6 +30,7 @@ class CoverageProcessor:
         diff_coverage_report_path: str = None,
         logger: Optional[CustomLogger] = None,
         generate_log_files: bool = True,
+        report_cache_size: int = 8,
     ):
         """
         Initializes a CoverageProcessor object.
@@ -31,12 +41,14 @@ class CoverageProcessor:
             coverage_type (CoverageType): The type of coverage report being processed.
             logger (CustomLogger): The logger object for logging messages.
             generate_log_files (bool): Whether or not to generate logs.
+            report_cache_size (int): The number of parsed reports to keep in the report cache. 0 disables it.
 
         Attributes:
             file_path (str): The path to the coverage report file.
             src_file_path (str): The fully qualified path of the file for which coverage data is being processed.
             coverage_type (CoverageType): The type of coverage report being processed.
             logger (CustomLogger): The logger object for logging messages.
+            report_cache (ReportCache): The parsed reports, keyed by report version and parse target.
 
         Returns:
             None
@@ -52,9 +64,14 @@ class CoverageProcessor:
         )
         self.use_report_coverage_feature_flag = use_report_coverage_feature_flag
         self.diff_coverage_report_path = diff_coverage_report_path
+        self.report_cache = ReportCache(report_cache_size)
+        # Offsets of the SF records of the last LCOV report, with the report's (mtime_ns, size)
+        self._lcov_index = None
+        # Line statuses of every (package, class) of the last JaCoCo report, with the report's version
+        self._jacoco_index = None
     def process_coverage_report(
         self, time_of_test_command: int
-    ) -> Tuple[list, list, float]:
+    ) -> Union[FileCoverage, dict]:
         """
         Verifies the coverage report's existence and update time, and then
         parses the report based on its type to extract coverage data.
@@ -63,7 +80,7 @@ class CoverageProcessor:
             time_of_test_command (int): The time the test command was run, in milliseconds.
 
         Returns:
-            Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
+            FileCoverage: The covered and missed lines of the file (see `parse_coverage_report`).
         """
         self.verify_report_update(time_of_test_command)
         return self.parse_coverage_report()
@@ -90,19 +107,63 @@ class CoverageProcessor:
                 f"The coverage report file was not updated after the test command. file_mod_time_ms: {file_mod_time_ms}, time_of_test_command: {time_of_test_command}. {file_mod_time_ms > time_of_test_command}"
             )
 
-    def parse_coverage_report(self) -> Tuple[list, list, float]:
+    def parse_coverage_report(self) -> Union[FileCoverage, dict]:
         """
         Parses a code coverage report to extract covered and missed line numbers for a specific file,
         and calculates the coverage percentage, based on the specified coverage report type.
 
+        Parsed reports are cached by (path, size, mtime_ns) of the report and by what is extracted from
+        it, so parsing a report that has not changed since the last parse is free.
+
         Returns:
-            Tuple[list, list, float]: A tuple containing lists of covered and missed line numbers, and the coverage percentage.
+            FileCoverage: The covered and missed lines of the file, which unpacks like a tuple of lists of
+                          covered and missed line numbers and the coverage percentage. When the report coverage
+                          feature flag is set, a dict mapping filenames to their FileCoverage instead.
+        """
+        cache_key = self._report_cache_key()
+        if cache_key is not None:
+            parsed_report = self.report_cache.get(cache_key)
+            if parsed_report is not None:
+                self.logger.debug(f"Using cached coverage report {cache_key[0]}")
+                return dict(parsed_report) if isinstance(parsed_report, dict) else parsed_report
+
+        parsed_report = self._parse_coverage_report()
+        if cache_key is not None:
+            self.report_cache.put(cache_key, parsed_report)
+            if isinstance(parsed_report, dict):
+                parsed_report = dict(parsed_report)
+        return parsed_report
+
+    def _report_cache_key(self) -> Optional[tuple]:
         """
+        Build the report cache key of the current report: (path, size, mtime_ns, coverage type, source
+        file, feature flag). None if the report cannot be read, in which case parsing reports the error.
+        """
+        if self.coverage_type == "diff_cover_json" and not self.use_report_coverage_feature_flag:
+            report_path = self.diff_coverage_report_path
+        else:
+            report_path = self.file_path
+        try:
+            report_path = os.path.abspath(report_path)
+            stat = os.stat(report_path)
+        except (OSError, TypeError):
+            return None
+        return (
+            report_path,
+            stat.st_size,
+            stat.st_mtime_ns,
+            self.coverage_type,
+            os.path.abspath(self.src_file_path),
+            self.use_report_coverage_feature_flag,
+        )
+
+    def _parse_coverage_report(self) -> Union[FileCoverage, dict]:
+        """Parse the report with the parser of its coverage type, without the report cache."""
         if self.use_report_coverage_feature_flag:
             if self.coverage_type == "cobertura":
                 return self.parse_coverage_report_cobertura()
             elif self.coverage_type == "lcov":
-                return self.parse_coverage_report_lcov()
+                return self.parse_coverage_report_lcov(all_files=True)
             elif self.coverage_type == "jacoco":
                 return self.parse_coverage_report_jacoco()
             else:
@@ -128,69 +189,81 @@ class CoverageProcessor:
 
     def parse_coverage_report_cobertura(
         self, filename: str = None
-    ) -> Union[Tuple[list, list, float], dict]:
+    ) -> Union[FileCoverage, dict]:
         """
         Parses a Cobertura XML code coverage report to extract covered and missed line numbers
         for a specific file or for all files (if filename is None). Aggregates coverage data from
         multiple <class> entries that share the same filename.
 
+        The report is streamed with iterparse, and every <class> element is cleared once its lines
+        are read, so memory stays bounded on very large reports. When a filename is given and the
+        classes of the source file itself are found (their path, relative to one of the report
+        <sources>, is src_file_path), parsing stops at the end of the <package> that holds them,
+        and other files that only share the same basename are ignored.
+
         Args:
             filename (str, optional): Filename to process. If None, process all files.
 
         Returns:
-            If filename is provided, returns (covered_lines, missed_lines, coverage_percent).
-            If filename is None, returns a dict: { filename: (covered_lines, missed_lines, coverage_percent) }.
+            If filename is provided, returns the FileCoverage of that file.
+            If filename is None, returns a dict: { filename: FileCoverage }.
         """
-        tree = SafeET.parse(self.file_path)
-        root = tree.getroot()
+        src_file_path = os.path.abspath(self.src_file_path)
+        sources = []
+        file_map = {}  # filename -> ({covered}, {missed})
+        exact_lines = None  # ({covered}, {missed}) of the classes of src_file_path itself
+
+        with open(self.file_path, "rb") as report_file:
+            for _, elem in SafeET.iterparse(report_file):
+                tag = elem.tag
+                if tag == "class":
+                    cls_filename = elem.get("filename")
+                    class_lines = None
+                    if not cls_filename:
+                        pass
+                    elif filename is None:
+                        class_lines = file_map.setdefault(cls_filename, (set(), set()))
+                    elif cls_filename.endswith(filename):
+                        if self._is_source_file(cls_filename, sources, src_file_path):
+                            if exact_lines is None:
+                                exact_lines = (set(), set())
+                            class_lines = exact_lines
+                        else:
+                            class_lines = file_map.setdefault(filename, (set(), set()))
+                    if class_lines is not None:
+                        covered, missed = class_lines
+                        for line in elem.iter("line"):
+                            if int(line.get("hits")) > 0:
+                                covered.add(int(line.get("number")))
+                            else:
+                                missed.add(int(line.get("number")))
+                    elem.clear()
+                elif tag == "package":
+                    elem.clear()
+                    if exact_lines is not None:
+                        # All the classes of the source file live in a single package
+                        break
+                elif tag == "source" and elem.text:
+                    sources.append(elem.text.strip())
 
         if filename:
-            # Collect coverage for all <class> elements matching the given filename
-            all_covered, all_missed = [], []
-            for cls in root.findall(".//class"):
-                name_attr = cls.get("filename")
-                if name_attr and name_attr.endswith(filename):
-                    c_covered, c_missed, _ = self.parse_coverage_data_for_class(cls)
-                    all_covered.extend(c_covered)
-                    all_missed.extend(c_missed)
-
-            # Deduplicate and compute coverage
-            covered_set = set(all_covered)
-            missed_set = set(all_missed) - covered_set
-            total_lines = len(covered_set) + len(missed_set)
-            coverage_percentage = (len(covered_set) / total_lines) if total_lines else 0
-
-            return list(covered_set), list(missed_set), coverage_percentage
-
-        else:
-            # Collect coverage for every <class>, grouping by filename
-            coverage_data = {}
-            file_map = {}  # filename -> ([covered], [missed])
-
-            for cls in root.findall(".//class"):
-                cls_filename = cls.get("filename")
-                if cls_filename:
-                    c_covered, c_missed, _ = self.parse_coverage_data_for_class(cls)
-                    if cls_filename not in file_map:
-                        file_map[cls_filename] = ([], [])
-                    file_map[cls_filename][0].extend(c_covered)
-                    file_map[cls_filename][1].extend(c_missed)
-
-            # Convert raw lists to sets, compute coverage, store results
-            for f_name, (c_covered, c_missed) in file_map.items():
-                covered_set = set(c_covered)
-                missed_set = set(c_missed) - covered_set
-                total_lines = len(covered_set) + len(missed_set)
-                coverage_percentage = (
-                    (len(covered_set) / total_lines) if total_lines else 0
-                )
-                coverage_data[f_name] = (
-                    list(covered_set),
-                    list(missed_set),
-                    coverage_percentage,
-                )
-
-            return coverage_data
+            covered, missed = exact_lines or file_map.get(filename, (set(), set()))
+            return FileCoverage.from_lines(covered, missed)
+
+        return {
+            f_name: FileCoverage.from_lines(covered, missed)
+            for f_name, (covered, missed) in file_map.items()
+        }
+
+    @staticmethod
+    def _is_source_file(cls_filename: str, sources: List[str], src_file_path: str) -> bool:
+        """Check whether a Cobertura class filename, relative to one of the report sources, is src_file_path."""
+        if os.path.isabs(cls_filename):
+            return os.path.abspath(cls_filename) == src_file_path
+        return any(
+            os.path.abspath(os.path.join(source, cls_filename)) == src_file_path
+            for source in sources
+        )
 
     def parse_coverage_data_for_class(self, cls) -> Tuple[list, list, float]:
         """
@@ -220,125 +293,284 @@ class CoverageProcessor:
 
         return lines_covered, lines_missed, coverage_percentage
 
-    def parse_coverage_report_lcov(self):
+    # Start of an LCOV record, and the line hits of a record
+    LCOV_SOURCE_FILE_PATTERN = re.compile(rb"^[ \t]*SF:(.*?)[ \t]*\r?$", re.MULTILINE)
+    LCOV_LINE_HITS_PATTERN = re.compile(rb"^[ \t]*DA:(\d+),(\d+)", re.MULTILINE)
 
-        lines_covered, lines_missed = [], []
-        filename = os.path.basename(self.src_file_path)
-        try:
-            with open(self.file_path, "r") as file:
-                for line in file:
-                    line = line.strip()
-                    if line.startswith("SF:"):
-                        if line.endswith(filename):
-                            for line in file:
-                                line = line.strip()
-                                if line.startswith("DA:"):
-                                    line_number = line.replace("DA:", "").split(",")[0]
-                                    hits = line.replace("DA:", "").split(",")[1]
-                                    if int(hits) > 0:
-                                        lines_covered.append(int(line_number))
-                                    else:
-                                        lines_missed.append(int(line_number))
-                                elif line.startswith("end_of_record"):
-                                    break
+    def parse_coverage_report_lcov(
+        self, all_files: bool = False
+    ) -> Union[FileCoverage, dict]:
+        """
+        Parses an LCOV report to extract the covered and missed line numbers of the source file.
+
+        The report is scanned once to index the byte offsets of its `SF:` records. The index is kept
+        until the report changes (mtime or size), and only the records of the requested files are parsed.
+        The source file is matched by path components: the report path that shares the longest trailing
+        run of components with src_file_path wins, so files that only share a basename are not confused.
 
+        Args:
+            all_files (bool): Whether to return the coverage of every file in the report.
+
+        Returns:
+            If all_files is False, returns the FileCoverage of the source file.
+            If all_files is True, returns a dict: { report file path: FileCoverage }.
+        """
+        try:
+            with open(self.file_path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_size == 0:
+                    return {} if all_files else FileCoverage()
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    index = self._get_lcov_index(data, (stat.st_mtime_ns, stat.st_size))
+                    if all_files:
+                        return {
+                            path: self._parse_lcov_records(data, records)
+                            for path, records in index.items()
+                        }
+                    path = self._match_report_path(index, self.src_file_path)
+                    if path is None:
+                        return FileCoverage()
+                    return self._parse_lcov_records(data, index[path])
         except (FileNotFoundError, IOError) as e:
             self.logger.error(f"Error reading file {self.file_path}: {e}")
             raise
 
-        total_lines = len(lines_covered) + len(lines_missed)
-        coverage_percentage = (
-            (len(lines_covered) / total_lines) if total_lines > 0 else 0
-        )
+    def _get_lcov_index(self, data: mmap.mmap, report_version: tuple) -> dict:
+        """
+        Return the byte ranges of the records of every file in an LCOV report, building the index if the
+        report changed since it was last indexed.
 
-        return lines_covered, lines_missed, coverage_percentage
+        Args:
+            data (mmap.mmap): The content of the report.
+            report_version (tuple): The (mtime_ns, size) of the report.
 
-    def parse_coverage_report_jacoco(self) -> Tuple[list, list, float]:
+        Returns:
+            dict: Mapping of report file path -> list of (start, end) byte offsets of its records.
+        """
+        if self._lcov_index is not None and self._lcov_index[0] == report_version:
+            return self._lcov_index[1]
+
+        index = {}
+        previous = None
+        for match in self.LCOV_SOURCE_FILE_PATTERN.finditer(data):
+            if previous is not None:
+                index[previous[0]][-1] = (previous[1], match.start())
+            path = match.group(1).decode("utf-8", errors="replace")
+            index.setdefault(path, []).append(None)
+            previous = (path, match.end())
+        if previous is not None:
+            index[previous[0]][-1] = (previous[1], len(data))
+
+        self._lcov_index = (report_version, index)
+        return index
+
+    def _parse_lcov_records(self, data: mmap.mmap, records: list) -> FileCoverage:
+        """Parse the line hits of the LCOV records of one file. A line is covered if any record hit it."""
+        covered, missed = set(), set()
+        for start, end in records:
+            for line_number, hits in self.LCOV_LINE_HITS_PATTERN.findall(data, start, end):
+                if int(hits) > 0:
+                    covered.add(int(line_number))
+                else:
+                    missed.add(int(line_number))
+        return FileCoverage.from_lines(covered, missed)
+
+    @staticmethod
+    def _match_report_path(report_paths, src_file_path: str) -> Optional[str]:
+        """
+        Find the report path of the source file.
+
+        A report path whose components are all the trailing components of src_file_path (e.g. a path
+        relative to the project root) is preferred. Otherwise, the report path that shares the most
+        trailing components with src_file_path wins. Ties go to the first path in the report.
+
+        Args:
+            report_paths (Iterable[str]): The file paths in the report.
+            src_file_path (str): The path of the source file.
+
+        Returns:
+            str: The matching report path, or None if no report path has the basename of src_file_path.
+        """
+        src_parts = os.path.abspath(src_file_path).replace("\\", "/").split("/")
+        best_path, best_score = None, (False, 0)
+        for path in report_paths:
+            path_parts = os.path.normpath(path).replace("\\", "/").split("/")
+            if os.path.isabs(path):
+                path_parts = os.path.abspath(path).replace("\\", "/").split("/")
+            matched = 0
+            for path_part, src_part in zip(reversed(path_parts), reversed(src_parts)):
+                if path_part != src_part:
+                    break
+                matched += 1
+            score = (matched == len(path_parts), matched)
+            if matched and score > best_score:
+                best_path, best_score = path, score
+        return best_path
+
+    def parse_coverage_report_jacoco(self) -> FileCoverage:
         """
         Parses a JaCoCo XML code coverage report to extract covered and missed line numbers for a specific file,
         and calculates the coverage percentage.
 
-        Returns: Tuple[list, list, float]: A tuple containing empty lists of covered and missed line numbers,
-        and the coverage percentage. The reason being the format of the report for jacoco gives the totals we do not
-        sum them up. to stick with the current contract of the code and to do little change returning empty arrays.
-        I expect this should bring up a discussion on introduce a factory for different CoverageProcessors. Where the
-        total coverage percentage is returned to be evaluated only.
+        Returns: FileCoverage: The covered and missed lines of the file. For CSV reports, which only give the
+        totals, the FileCoverage only holds the line counts, so its covered and missed line lists are empty.
         """
-        lines_covered, lines_missed = [], []
-        source_file_extension = self.get_file_extension(self.src_file_path)
-
-        package_name, class_name = "", ""
-        if source_file_extension == "java":
-            package_name, class_name = self.extract_package_and_class_java()
-        elif source_file_extension == "kt":
-            package_name, class_name = self.extract_package_and_class_kotlin()
-        else:
-            self.logger.warn(
-                f"Unsupported Bytecode Language: {source_file_extension}. Using default Java logic."
-            )
-            package_name, class_name = self.extract_package_and_class_java()
+        package_name, class_name = self.get_package_and_class()
 
         file_extension = self.get_file_extension(self.file_path)
 
-        missed, covered = 0, 0
         if file_extension == "xml":
             lines_missed, lines_covered = self.parse_missed_covered_lines_jacoco_xml(
-                class_name
+                class_name, package_name
             )
-            missed, covered = len(lines_missed), len(lines_covered)
+            return FileCoverage.from_lines(lines_covered, lines_missed)
         elif file_extension == "csv":
             missed, covered = self.parse_missed_covered_lines_jacoco_csv(
                 package_name, class_name
             )
+            return FileCoverage.from_counts(covered, missed)
         else:
             raise ValueError(
                 f"Unsupported JaCoCo code coverage report format: {file_extension}"
             )
 
-        total_lines = missed + covered
-        coverage_percentage = (float(covered) / total_lines) if total_lines > 0 else 0
-
-        return lines_covered, lines_missed, coverage_percentage
-
     def parse_missed_covered_lines_jacoco_xml(
-        self, class_name: str
+        self, class_name: str, package_name: str = ""
     ) -> tuple[list, list]:
-        """Parses a JaCoCo XML code coverage report to extract covered and missed line numbers for a specific file."""
-        tree = ET.parse(self.file_path)
-        root = tree.getroot()
-        sourcefile = root.find(
-            f".//sourcefile[@name='{class_name}.java']"
-        ) or root.find(f".//sourcefile[@name='{class_name}.kt']")
-
-        if sourcefile is None:
-            return [], []
-
-        missed, covered = [], []
-        for line in sourcefile.findall("line"):
-            if line.attrib.get("mi") == "0":
-                covered += [int(line.attrib.get("nr", 0))]
-            else:
-                missed += [int(line.attrib.get("nr", 0))]
+        """
+        Parses a JaCoCo XML code coverage report to extract covered and missed line numbers for a specific file.
+
+        The report is streamed once into a (package, source file) index, which is kept until the report
+        changes. The source file of the class is looked up in its package first, then in any package.
+
+        Args:
+            class_name (str): The class name, which is also the source file name without extension.
+            package_name (str): The package of the class, e.g. "com.example".
 
-        return missed, covered
+        Returns:
+            tuple: The missed and covered line numbers, in report order.
+        """
+        index = self._get_jacoco_index("xml", self._index_jacoco_xml)
+        package_path = package_name.replace(".", "/")
+        source_names = (f"{class_name}.java", f"{class_name}.kt")
+        for source_name in source_names:
+            if (package_path, source_name) in index:
+                return index[(package_path, source_name)]
+        for source_name in source_names:
+            for (_, indexed_source_name), lines in index.items():
+                if indexed_source_name == source_name:
+                    return lines
+        return [], []
 
     def parse_missed_covered_lines_jacoco_csv(
         self, package_name: str, class_name: str
     ) -> tuple[int, int]:
+        """
+        Parses a JaCoCo CSV code coverage report to extract the missed and covered line counts of a class.
+
+        The report is read once into a (package, class) index, which is kept until the report changes.
+        When a class appears in several rows, the first row wins.
+        """
+        index = self._get_jacoco_index("csv", self._index_jacoco_csv)
+        return index.get((package_name, class_name), (0, 0))
+
+    def _get_jacoco_index(self, report_format: str, build_index) -> dict:
+        """
+        Return the index of the JaCoCo report, building it if the report changed since it was last indexed.
+
+        Args:
+            report_format (str): The report format, "xml" or "csv".
+            build_index (Callable[[], dict]): Builds the index from the report.
+
+        Returns:
+            dict: The index of the report.
+        """
+        try:
+            stat = os.stat(self.file_path)
+            report_version = (report_format, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            report_version = None
+        if (
+            report_version is not None
+            and self._jacoco_index is not None
+            and self._jacoco_index[0] == report_version
+        ):
+            return self._jacoco_index[1]
+
+        index = build_index()
+        if report_version is not None:
+            self._jacoco_index = (report_version, index)
+        return index
+
+    def _index_jacoco_xml(self) -> dict:
+        """Stream a JaCoCo XML report into a mapping of (package path, source file name) -> (missed, covered) lines."""
+        index = {}
+        package_path = ""
+        for event, elem in SafeET.iterparse(self.file_path, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "package":
+                    package_path = elem.get("name", "")
+                continue
+            if elem.tag == "sourcefile":
+                missed, covered = [], []
+                for line in elem.iter("line"):
+                    if line.get("mi") == "0":
+                        covered.append(int(line.get("nr", 0)))
+                    else:
+                        missed.append(int(line.get("nr", 0)))
+                index.setdefault((package_path, elem.get("name")), (missed, covered))
+                elem.clear()
+            elif elem.tag in ("class", "package"):
+                elem.clear()
+        return index
+
+    def _index_jacoco_csv(self) -> dict:
+        """Read a JaCoCo CSV report into a mapping of (package, class) -> (missed, covered) line counts."""
+        index = {}
         with open(self.file_path, "r") as file:
             reader = csv.DictReader(file)
-            missed, covered = 0, 0
             for row in reader:
-                if row["PACKAGE"] == package_name and row["CLASS"] == class_name:
-                    try:
-                        missed = int(row["LINE_MISSED"])
-                        covered = int(row["LINE_COVERED"])
-                        break
-                    except KeyError as e:
-                        self.logger.error(f"Missing expected column in CSV: {str(e)}")
-                        raise
+                key = (row["PACKAGE"], row["CLASS"])
+                if key in index:
+                    continue
+                try:
+                    index[key] = (int(row["LINE_MISSED"]), int(row["LINE_COVERED"]))
+                except KeyError as e:
+                    self.logger.error(f"Missing expected column in CSV: {str(e)}")
+                    raise
+        return index
+
+    def get_package_and_class(self) -> Tuple[str, str]:
+        """
+        Extract the package and class names of the source file, with the extractor of its language.
+
+        The result is cached by the SHA-256 of the source file content, so an unchanged source file is
+        only scanned once. The hash itself is cached by the size, mtime and inode of the file, so the
+        file is only read again once it changes.
 
-        return missed, covered
+        Returns:
+            tuple: The package name and the class name.
+        """
+        source_file_extension = self.get_file_extension(self.src_file_path)
+        if source_file_extension == "kt":
+            extract = self.extract_package_and_class_kotlin
+        else:
+            if source_file_extension != "java":
+                self.logger.warn(
+                    f"Unsupported Bytecode Language: {source_file_extension}. Using default Java logic."
+                )
+            extract = self.extract_package_and_class_java
+
+        try:
+            source_hash = self._source_hash_cache.hexdigest(self.src_file_path)
+        except (OSError, TypeError):
+            return extract()
+        cache_key = (source_file_extension, source_hash)
+        package_and_class = self._package_and_class_cache.get(cache_key)
+        if package_and_class is None:
+            package_and_class = extract()
+            self._package_and_class_cache.put(cache_key, package_and_class)
+        return package_and_class
 
     def extract_package_and_class_java(self):
         package_pattern = re.compile(r"^\s*package\s+([\w\.]+)\s*;.*$")
@@ -1,10 +1,9 @@
 from typing import Optional, Tuple
 
-from jinja2 import Environment, StrictUndefined
-
 from coverage_ai.agent_completion_abc import AgentCompletionABC
 from coverage_ai.ai_caller import AICaller
 from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.prompt_templates import PromptTemplateRegistry
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.utils import load_yaml
 
@@ -17,6 +16,13 @@ class DefaultAgentCompletion(AgentCompletionABC):
     to get the response.
     """
 
+    # Headers of the test generation prompt sections that change between iterations. The prompt before
+    # the first of them stays the same across the iterations on a test file, and is sent as a cacheable prefix.
+    TEST_GENERATION_VOLATILE_HEADERS = (
+        "\n## Previous Iterations Failed Tests\n",
+        "\n## Code Coverage\n",
+    )
+
     def __init__(
         self,
         caller: AICaller,
@@ -45,14 +51,13 @@ class DefaultAgentCompletion(AgentCompletionABC):
         e.g. "analyze_test_against_context". All other variables are passed
         in via **kwargs. The TOML's system/user templates may reference these
         variables using Jinja2 syntax, e.g. {{ language }} or {{ test_file_content }}.
+        Templates are compiled once and reused (see `PromptTemplateRegistry`).
 
         Raises:
             ValueError: If the TOML config does not contain valid 'system' and 'user' keys.
             RuntimeError: If an error occurs while rendering the templates.
         """
-        from jinja2 import Environment, StrictUndefined
-
-        environment = Environment(undefined=StrictUndefined, autoescape=True)
+        templates = PromptTemplateRegistry.get_shared(autoescape=True)
 
         try:
             # 1. Fetch the prompt config from your TOML-based settings
@@ -67,8 +72,10 @@ class DefaultAgentCompletion(AgentCompletionABC):
                 raise ValueError(msg)
 
             # 2. Render system & user templates with the passed-in kwargs
-            system_prompt = environment.from_string(settings.system).render(**kwargs)
-            user_prompt = environment.from_string(settings.user).render(**kwargs)
+            system_prompt = templates.render(
+                f"{file}.system", settings.system, kwargs
+            )
+            user_prompt = templates.render(f"{file}.user", settings.user, kwargs)
 
         except ValueError:
             # Re-raise the ValueError above so callers can catch it if needed.
@@ -81,6 +88,20 @@ class DefaultAgentCompletion(AgentCompletionABC):
 
         return {"system": system_prompt, "user": user_prompt}
 
+    @staticmethod
+    def _get_cache_prefix(user_prompt: str, volatile_headers: Tuple[str, ...]) -> str:
+        """
+        Return the part of a rendered prompt that precedes its volatile sections, or an empty string if the
+        prompt has none of the given section headers. Headers are searched from the end of the prompt, so that
+        file contents quoted earlier in the prompt cannot end the prefix too early.
+        """
+        end = len(user_prompt)
+        for header in reversed(volatile_headers):
+            position = user_prompt.rfind(header, 0, end)
+            if position != -1:
+                end = position
+        return user_prompt[:end] if end < len(user_prompt) else ""
+
     def generate_tests(
         self,
         source_file_name: str,
@@ -136,7 +157,12 @@ class DefaultAgentCompletion(AgentCompletionABC):
             additional_includes_section=additional_includes_section,
             failed_tests_section=failed_tests_section,
         )
-        response, prompt_tokens, completion_tokens = self.caller.call_model(prompt)
+        cache_prefix = self._get_cache_prefix(
+            prompt["user"], self.TEST_GENERATION_VOLATILE_HEADERS
+        )
+        response, prompt_tokens, completion_tokens = self.caller.call_model(
+            prompt, cache_prefix=cache_prefix
+        )
         return response, prompt_tokens, completion_tokens, prompt["user"]
 
     def analyze_test_failure(
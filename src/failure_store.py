@@ -0,0 +1,167 @@
+import re
+
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+
+# The exception lines of a test run output, e.g. "E   AssertionError: assert 1 == 2" in pytest output
+ERROR_LINE_PATTERN = re.compile(
+    r"^(?:E\s+)?((?:[\w.]+\.)?\w*(?:Error|Exception)\b.*)$", re.MULTILINE
+)
+QUOTED_PATTERN = re.compile(r"'[^'\n]*'|\"[^\"\n]*\"|`[^`\n]*`")
+PATH_PATTERN = re.compile(r"(?:[\w.-]*/)+[\w.-]+")
+HEX_PATTERN = re.compile(r"\b0x[0-9a-f]+\b")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+# Lines of a test run output that locate or describe an error: exception lines, traceback frames
+# ('File "x.py", line 3', "x.py:3:", "at x.js:3:5") and failure headers
+RELEVANT_LINE_PATTERN = re.compile(
+    r"^(?:E\s|.*(?:Error|Exception|Traceback|FAIL|panic:|assert)|\s*File \".*\", line \d+|"
+    r"\s*at .*:\d+|\S+:\d+:)"
+)
+
+# The error message of the passing tests that did not increase coverage
+NO_COVERAGE_INCREASE_MESSAGE = "Test did not increase code coverage"
+
+
+def normalize_error_text(text: str) -> str:
+    """
+    Normalize an error text so that failures with the same cause compare equal: quoted values, paths,
+    addresses and numbers are replaced by placeholders, and whitespace is collapsed.
+    """
+    text = QUOTED_PATTERN.sub("<str>", text.lower())
+    text = PATH_PATTERN.sub("<path>", text)
+    text = HEX_PATTERN.sub("<hex>", text)
+    text = NUMBER_PATTERN.sub("<n>", text)
+    return " ".join(text.split())[:200]
+
+
+def trim_test_output(output: str, max_lines: int = 80, context_lines: int = 2) -> str:
+    """
+    Trim a test run output to the lines that locate or describe its errors (exception lines, traceback
+    frames, failure headers), with a few lines of context around them. Outputs of at most `max_lines`
+    lines are returned unchanged, and the last `max_lines` relevant lines are kept.
+
+    Args:
+        output (str): The stdout or stderr of a test run.
+        max_lines (int): The maximum number of lines of the trimmed output. 0 means no trimming.
+        context_lines (int): The number of lines kept before and after each relevant line.
+
+    Returns:
+        str: The trimmed output, with "..." lines where lines were removed.
+    """
+    lines = (output or "").splitlines()
+    if not max_lines or len(lines) <= max_lines:
+        return output
+    kept = set()
+    for index, line in enumerate(lines):
+        if RELEVANT_LINE_PATTERN.match(line):
+            kept.update(
+                range(max(0, index - context_lines), min(len(lines), index + context_lines + 1))
+            )
+    # Keep the end of the output (the test summary) when nothing else is relevant
+    kept = sorted(kept)[-max_lines:] or range(len(lines) - max_lines, len(lines))
+    trimmed = []
+    previous_index = -1
+    for index in kept:
+        if index != previous_index + 1:
+            trimmed.append("...")
+        trimmed.append(lines[index])
+        previous_index = index
+    if previous_index != len(lines) - 1:
+        trimmed.append("...")
+    return "\n".join(trimmed)
+
+
+def error_signature(error_message: str, error_output: str = "") -> str:
+    """
+    Return the normalized error signature of a failed test run: its last exception line in the test run
+    output if there is one, else its error message, else the last lines of its output.
+
+    Args:
+        error_message (str): The error message of the failed test run (e.g. the LLM error analysis).
+        error_output (str, optional): The output of the test run.
+
+    Returns:
+        str: The normalized error signature.
+    """
+    error_lines = ERROR_LINE_PATTERN.findall(error_output or "")
+    if error_lines:
+        return normalize_error_text(error_lines[-1])
+    if error_message:
+        return normalize_error_text(error_message)
+    last_lines = [line for line in (error_output or "").splitlines() if line.strip()][-5:]
+    return normalize_error_text(" ".join(last_lines))
+
+
+def generated_test_identity(test) -> str:
+    """Return the name of a generated test, or its whitespace-collapsed code when it has no name."""
+    if isinstance(test, dict):
+        if test.get("test_name"):
+            return test["test_name"]
+        test = test.get("test_code", "")
+    return " ".join(str(test or "").split())
+
+
+class FailureStore:
+    """
+    The failed test runs of a test file, clustered by normalized error signature. Passing tests that did not
+    increase coverage have no error in common, so each of them is kept in a cluster of its own test.
+
+    Only the most recent failed test run of each cluster is kept, with the number of failed test runs of the
+    cluster in its "count" key (only set when the cluster has more than one failed test run). Iterating
+    yields the kept failed test runs, least recently seen cluster first, so the failed tests section of the
+    prompt grows with the number of distinct errors instead of the number of iterations.
+    """
+
+    def __init__(self, cluster: bool = True):
+        """
+        Initialize the FailureStore.
+
+        Args:
+            cluster (bool): Whether to cluster failed test runs by error signature. When False, every failed
+                            test run is kept.
+        """
+        self.cluster = cluster
+        self.total_count = 0
+        self._clusters = OrderedDict()
+
+    def append(self, failed_test_run: dict, error_output: Optional[str] = None):
+        """
+        Add a failed test run.
+
+        Args:
+            failed_test_run (dict): The failed test run: {"code": ..., "error_message": ...}.
+            error_output (str, optional): The output of the test run, used to find its error signature.
+        """
+        self.total_count += 1
+        if not self.cluster:
+            self._clusters[self.total_count] = (failed_test_run, 1)
+            return
+        signature = error_signature(failed_test_run.get("error_message"), error_output)
+        if failed_test_run.get("error_message") == NO_COVERAGE_INCREASE_MESSAGE:
+            signature = f"{signature}: {generated_test_identity(failed_test_run.get('code'))}"
+        _, count = self._clusters.pop(signature, (None, 0))
+        count += 1
+        if count > 1:
+            failed_test_run = {**failed_test_run, "count": count}
+        self._clusters[signature] = (failed_test_run, count)
+
+    def __iter__(self) -> Iterator[dict]:
+        return (failed_test_run for failed_test_run, _ in self._clusters.values())
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def __getitem__(self, index: int) -> dict:
+        return list(self)[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (FailureStore, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def to_list(self) -> List[dict]:
+        """Return the kept failed test runs."""
+        return list(self)
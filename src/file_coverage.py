@@ -0,0 +1,243 @@
+from typing import Iterable, List, Optional
+
+# Positions of the set bits of every byte value, used to decode bitmaps one byte at a time
+_BYTE_BITS = [tuple(bit for bit in range(8) if value & (1 << bit)) for value in range(256)]
+
+
+def lines_to_bits(lines: Iterable[int]) -> int:
+    """
+    Encode line numbers as a bitmap, where bit N is set when line N is in `lines`.
+
+    Args:
+        lines (Iterable[int]): The line numbers.
+
+    Returns:
+        int: The bitmap.
+    """
+    lines = list(lines)
+    if not lines:
+        return 0
+    bitmap = bytearray(max(lines) // 8 + 1)
+    for line in lines:
+        bitmap[line >> 3] |= 1 << (line & 7)
+    return int.from_bytes(bitmap, "little")
+
+
+def bits_to_lines(bits: int) -> List[int]:
+    """
+    Decode a bitmap into the sorted line numbers it holds.
+
+    Args:
+        bits (int): The bitmap.
+
+    Returns:
+        List[int]: The sorted line numbers.
+    """
+    lines = []
+    for byte_index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, "little")):
+        if byte:
+            base = byte_index << 3
+            lines.extend(base + bit for bit in _BYTE_BITS[byte])
+    return lines
+
+
+def format_line_ranges(lines: Iterable[int]) -> str:
+    """
+    Format line numbers as compact ranges, e.g. [1, 2, 3, 7, 9, 10] -> "1-3, 7, 9-10".
+
+    Args:
+        lines (Iterable[int]): The line numbers.
+
+    Returns:
+        str: The comma-separated line ranges.
+    """
+    ranges = []
+    for line in sorted(set(lines)):
+        if ranges and line == ranges[-1][1] + 1:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return ", ".join(
+        str(start) if start == end else f"{start}-{end}" for start, end in ranges
+    )
+
+
+def count_bits(bits: int) -> int:
+    """Count the set bits of a bitmap."""
+    if hasattr(bits, "bit_count"):  # Python 3.10+
+        return bits.bit_count()
+    return bin(bits).count("1")
+
+
+class FileCoverage:
+    """
+    The covered and missed lines of one source file, stored as two bitmaps (one bit per line).
+
+    Counts are computed once, unions and differences between runs are bitwise operations on the
+    bitmaps, and `to_bytes` gives a compact serialized form.
+
+    For compatibility with the (covered_lines, missed_lines, coverage_percentage) tuples that the
+    coverage parsers used to return, a FileCoverage unpacks and compares like that tuple.
+
+    Some reports (e.g. JaCoCo CSV) only give line counts. Such a FileCoverage is built with
+    `from_counts`, has empty bitmaps, and only its counts and percentage are meaningful.
+    """
+
+    __slots__ = ("covered_bits", "missed_bits", "covered_count", "missed_count")
+
+    def __init__(
+        self,
+        covered_bits: int = 0,
+        missed_bits: int = 0,
+        covered_count: Optional[int] = None,
+        missed_count: Optional[int] = None,
+    ):
+        """
+        Initialize a FileCoverage. A line that is both covered and missed (e.g. in two classes of the
+        same file) counts as covered.
+
+        Args:
+            covered_bits (int): The bitmap of covered lines.
+            missed_bits (int): The bitmap of missed lines.
+            covered_count (int, optional): The number of covered lines, when only counts are known.
+            missed_count (int, optional): The number of missed lines, when only counts are known.
+        """
+        self.covered_bits = covered_bits
+        self.missed_bits = missed_bits & ~covered_bits
+        self.covered_count = (
+            count_bits(self.covered_bits) if covered_count is None else covered_count
+        )
+        self.missed_count = (
+            count_bits(self.missed_bits) if missed_count is None else missed_count
+        )
+
+    @classmethod
+    def from_lines(cls, covered_lines: Iterable[int], missed_lines: Iterable[int]) -> "FileCoverage":
+        """Build a FileCoverage from lists (or sets) of covered and missed line numbers."""
+        return cls(lines_to_bits(covered_lines), lines_to_bits(missed_lines))
+
+    @classmethod
+    def from_counts(cls, covered_count: int, missed_count: int) -> "FileCoverage":
+        """Build a FileCoverage from line counts only."""
+        return cls(covered_count=covered_count, missed_count=missed_count)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "FileCoverage":
+        """
+        Deserialize a FileCoverage written by `to_bytes`.
+
+        Args:
+            data (bytes): The serialized coverage.
+
+        Returns:
+            FileCoverage: The coverage.
+        """
+        covered_size = int.from_bytes(data[:4], "little")
+        return cls(
+            int.from_bytes(data[4 : 4 + covered_size], "little"),
+            int.from_bytes(data[4 + covered_size :], "little"),
+        )
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the bitmaps: the byte length of the covered bitmap, then both bitmaps.
+
+        Returns:
+            bytes: The serialized coverage.
+        """
+        covered = self.covered_bits.to_bytes((self.covered_bits.bit_length() + 7) // 8, "little")
+        missed = self.missed_bits.to_bytes((self.missed_bits.bit_length() + 7) // 8, "little")
+        return len(covered).to_bytes(4, "little") + covered + missed
+
+    @property
+    def covered_lines(self) -> List[int]:
+        """The sorted covered line numbers."""
+        return bits_to_lines(self.covered_bits)
+
+    @property
+    def missed_lines(self) -> List[int]:
+        """The sorted missed line numbers."""
+        return bits_to_lines(self.missed_bits)
+
+    @property
+    def has_lines(self) -> bool:
+        """Whether line numbers are known (False for coverage built from counts only)."""
+        return bool(self.covered_bits or self.missed_bits)
+
+    @property
+    def total_count(self) -> int:
+        """The number of measured lines."""
+        return self.covered_count + self.missed_count
+
+    @property
+    def percentage(self) -> float:
+        """The fraction of measured lines that are covered, or 0 when no line is measured."""
+        return self.covered_count / self.total_count if self.total_count else 0
+
+    def union(self, other: "FileCoverage") -> "FileCoverage":
+        """
+        Combine the coverage of two runs of the same file: a line is covered if either run covered it.
+
+        Args:
+            other (FileCoverage): The coverage of the other run.
+
+        Returns:
+            FileCoverage: The combined coverage.
+        """
+        return FileCoverage(
+            self.covered_bits | other.covered_bits, self.missed_bits | other.missed_bits
+        )
+
+    __or__ = union
+
+    def newly_covered(self, previous: "FileCoverage") -> "FileCoverage":
+        """
+        Return the lines covered by this run that the previous run did not cover.
+
+        Args:
+            previous (FileCoverage): The coverage of the previous run.
+
+        Returns:
+            FileCoverage: A coverage whose covered lines are the newly covered lines.
+        """
+        return FileCoverage(self.covered_bits & ~previous.covered_bits)
+
+    def restricted_to(self, other: "FileCoverage") -> "FileCoverage":
+        """
+        Keep only the lines that are measured in another coverage of the same file.
+
+        Args:
+            other (FileCoverage): The coverage whose measured lines are kept.
+
+        Returns:
+            FileCoverage: The restricted coverage.
+        """
+        measured_bits = other.covered_bits | other.missed_bits
+        return FileCoverage(
+            self.covered_bits & measured_bits, self.missed_bits & measured_bits
+        )
+
+    def __iter__(self):
+        yield self.covered_lines
+        yield self.missed_lines
+        yield self.percentage
+
+    def __eq__(self, other):
+        if isinstance(other, FileCoverage):
+            return (
+                self.covered_bits == other.covered_bits
+                and self.missed_bits == other.missed_bits
+                and self.covered_count == other.covered_count
+                and self.missed_count == other.missed_count
+            )
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"FileCoverage(covered={self.covered_count}, missed={self.missed_count}, "
+            f"percentage={self.percentage:.4f})"
+        )
@@ -0,0 +1,52 @@
+import hashlib
+import os
+
+from coverage_ai.lru_cache import LRUCache
+
+
+class FileHashCache(LRUCache):
+    """
+    An `LRUCache` of file content digests.
+
+    Keys identify a version of a file (path, size, mtime_ns, inode), so a file is only read and hashed again
+    after it has been rewritten or replaced. The `hits` and `misses` counters show how often a read was avoided.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, algorithm: str = "sha256", max_entries: int = 256):
+        """
+        Initialize the FileHashCache.
+
+        Args:
+            algorithm (str): The `hashlib` algorithm of the digests.
+            max_entries (int): The maximum number of digests to keep. 0 disables the cache.
+        """
+        super().__init__(max_entries=max_entries)
+        self.algorithm = algorithm
+
+    def hexdigest(self, path: str) -> str:
+        """
+        Return the hex digest of the content of a file, reading the file only if this version of it is not cached.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            str: The hex digest of the file content.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        hexdigest = self.get(key)
+        if hexdigest is None:
+            digest = hashlib.new(self.algorithm)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            hexdigest = digest.hexdigest()
+            self.put(key, hexdigest)
+        return hexdigest
@@ -0,0 +1,135 @@
+import asyncio
+import importlib.util
+import threading
+import weakref
+
+from typing import Optional
+
+import httpx
+import litellm
+
+from coverage_ai.settings.config_loader import get_settings
+
+
+class HTTPSessionPool:
+    """
+    The HTTP clients shared by every LLM call of the process, handed to litellm as `litellm.client_session`
+    and `litellm.aclient_session`.
+
+    Connections are kept alive and pooled, so successive calls to the same gateway reuse an open connection
+    instead of paying a TCP and TLS handshake per prompt. HTTP/2 is used when the `h2` package is installed.
+    The async client is bound to an event loop, so there is one per loop.
+
+    `litellm.client_session` is global to the process, so the synchronous client is installed once, by the
+    command line entry points (see `install_shared`), not by every AICaller.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry_sec: float = 60.0,
+        timeout_sec: float = 600.0,
+    ):
+        """
+        Initialize the HTTPSessionPool. Clients are created on first use.
+
+        Args:
+            http2 (bool): Whether to use HTTP/2, if the `h2` package is installed.
+            max_connections (int): The maximum number of open connections of a client.
+            max_keepalive_connections (int): The maximum number of idle connections kept alive by a client.
+            keepalive_expiry_sec (float): The number of seconds an idle connection is kept alive.
+            timeout_sec (float): The default timeout of a request, in seconds.
+        """
+        self.http2 = http2 and self.http2_available()
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry_sec = keepalive_expiry_sec
+        self.timeout_sec = timeout_sec
+        self._lock = threading.Lock()
+        self._client = None
+        self._loop_clients = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_shared(cls) -> Optional["HTTPSessionPool"]:
+        """
+        Return the pool shared by the process, created from the `[llm_http]` settings, or None if shared
+        HTTP clients are disabled.
+        """
+        settings = get_settings().get("llm_http", {})
+        if not settings.get("enabled", True):
+            return None
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(
+                    http2=settings.get("http2", True),
+                    max_connections=settings.get("max_connections", 20),
+                    max_keepalive_connections=settings.get(
+                        "max_keepalive_connections", 10
+                    ),
+                    keepalive_expiry_sec=settings.get("keepalive_expiry_sec", 60.0),
+                    timeout_sec=settings.get("timeout_sec", 600.0),
+                )
+            return cls._shared
+
+    @classmethod
+    def install_shared(cls) -> Optional["HTTPSessionPool"]:
+        """Install the synchronous client of the shared pool in litellm, and return the pool (None if disabled)."""
+        pool = cls.get_shared()
+        if pool:
+            pool.install()
+        return pool
+
+    @staticmethod
+    def http2_available() -> bool:
+        """Return whether the `h2` package needed by HTTP/2 is installed."""
+        return importlib.util.find_spec("h2") is not None
+
+    def _client_kwargs(self) -> dict:
+        return {
+            "http2": self.http2,
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry_sec,
+            ),
+            "timeout": httpx.Timeout(self.timeout_sec),
+        }
+
+    def get_client(self) -> httpx.Client:
+        """Return the shared synchronous client."""
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(**self._client_kwargs())
+            return self._client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """Return the async client of the running event loop. Must be called while the loop is running."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(**self._client_kwargs())
+                self._loop_clients[loop] = client
+            return client
+
+    def install(self):
+        """Make litellm send the synchronous calls with the shared client."""
+        litellm.client_session = self.get_client()
+
+    def install_async(self):
+        """Make litellm send the async calls of the running event loop with its shared client."""
+        litellm.aclient_session = self.get_async_client()
+
+    def close(self):
+        """Close the synchronous client. Async clients are dropped with their event loop."""
+        with self._lock:
+            if self._client is not None:
+                if litellm.client_session is self._client:
+                    litellm.client_session = None
+                self._client.close()
+                self._client = None
@@ -4,6 +4,7 @@ import os
 from dynaconf import Dynaconf
 
 from coverage_ai.coverage_ai import CoverAgent
+from coverage_ai.http_session_pool import HTTPSessionPool
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.settings.config_schema import CoverAgentConfig
 from coverage_ai.version import __version__
@@ -221,6 +222,7 @@ def main():
     settings = get_settings().get("default")
     args = parse_args(settings)
     config = CoverAgentConfig.from_cli_args_with_defaults(args)
+    HTTPSessionPool.install_shared()
     agent = CoverAgent(config)
     agent.run()
 
@@ -3,6 +3,7 @@ import copy
 
 from coverage_ai.ai_caller import AICaller
 from coverage_ai.coverage_ai import CoverAgent
+from coverage_ai.http_session_pool import HTTPSessionPool
 from coverage_ai.lsp_logic.ContextHelper import ContextHelper
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.settings.config_schema import CoverAgentConfig
@@ -37,10 +38,14 @@ async def run():
             model=args.model, api_base=api_base, generate_log_files=generate_log_files
         )
 
-        # main loop for analyzing test files
-        for test_file in test_files:
+        # Analyze all the test files concurrently: their LLM requests overlap, within the limits of the
+        # [llm_concurrency] settings, while language server requests are sent one at a time
+        lsp_lock = asyncio.Lock()
+
+        async def analyze_test_file(test_file):
             # Find the context files for the test file
-            context_files = await context_helper.find_test_file_context(test_file)
+            async with lsp_lock:
+                context_files = await context_helper.find_test_file_context(test_file)
             print(
                 "Context files for test file '{}':\n{}".format(
                     test_file, "".join(f"{f}\n" for f in context_files)
@@ -49,10 +54,20 @@ async def run():
 
             # Analyze the test file against the context files
             print("\nAnalyzing test file against context files...")
-            source_file, context_files_include = await context_helper.analyze_context(
+            return await context_helper.analyze_context(
                 test_file, context_files, ai_caller
             )
 
+        analyses = [
+            asyncio.create_task(analyze_test_file(test_file)) for test_file in test_files
+        ]
+
+        # main loop for extending test files. CoverAgent runs for one test file at a time, since every
+        # test run rewrites the project's coverage report, and runs in a worker thread so that the
+        # remaining test files keep being analyzed meanwhile.
+        for test_file, analysis in zip(test_files, analyses):
+            source_file, context_files_include = await analysis
+
             if source_file:
                 try:
                     # Run the CoverAgent for the test file
@@ -64,13 +79,14 @@ async def run():
 
                     config = CoverAgentConfig.from_cli_args_with_defaults(args_copy)
                     agent = CoverAgent(config)
-                    agent.run()
+                    await asyncio.to_thread(agent.run)
                 except Exception as e:
                     print(f"Error running CoverAgent for test file '{test_file}': {e}")
                     pass
 
 
 def main():
+    HTTPSessionPool.install_shared()
     asyncio.run(run())
 
 
@@ -0,0 +1,194 @@
+import bisect
+
+from typing import Iterable, List, Optional, Set
+
+from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.settings.token_handling import TokenEncoder, clip_tokens
+
+
+class PromptPacker:
+    """
+    Fits the sections of the test generation prompt into per-section token budgets.
+
+    The numbered source file keeps its missed lines first, then the signatures of its functions and classes
+    (found with the FileMap tree-sitter queries), then the remaining lines closest to a missed line. Omitted
+    lines are replaced by a marker naming the omitted line range, so the line numbers of the coverage report
+    still match. The test file and the included files are clipped, and only the most recent failed tests that
+    fit are kept. A budget of 0 means no limit for that section.
+    """
+
+    def __init__(
+        self,
+        source_file_tokens: int = 32000,
+        test_file_tokens: int = 16000,
+        included_files_tokens: int = 8000,
+        failed_tests_tokens: int = 8000,
+        logger: Optional[CustomLogger] = None,
+        generate_log_files: bool = True,
+    ):
+        """
+        Initialize the PromptPacker.
+
+        Args:
+            source_file_tokens (int): The token budget of the numbered source file.
+            test_file_tokens (int): The token budget of the test file.
+            included_files_tokens (int): The token budget of the included files section.
+            failed_tests_tokens (int): The token budget of the failed tests section.
+            logger (CustomLogger, optional): The logger object for logging messages.
+            generate_log_files (bool): Whether or not to generate logs.
+        """
+        self.source_file_tokens = source_file_tokens
+        self.test_file_tokens = test_file_tokens
+        self.included_files_tokens = included_files_tokens
+        self.failed_tests_tokens = failed_tests_tokens
+        self.logger = logger or CustomLogger.get_logger(
+            __name__, generate_log_files=generate_log_files
+        )
+
+    def count_tokens(self, text: str) -> int:
+        """Return the number of tokens of a text."""
+        return len(TokenEncoder.get_token_encoder().encode(text))
+
+    def pack_source(
+        self,
+        source_code: str,
+        source_file_path: str,
+        missed_lines: Optional[Iterable[int]] = None,
+    ) -> str:
+        """
+        Number the lines of the source file, and keep the lines that fit in the source file budget.
+
+        Args:
+            source_code (str): The content of the source file.
+            source_file_path (str): The path of the source file, used to find its definitions.
+            missed_lines (Iterable[int], optional): The 1-based line numbers not covered by the tests.
+
+        Returns:
+            str: The numbered source file, with "... (lines a-b omitted)" markers for the omitted lines.
+        """
+        numbered_lines = [
+            f"{i + 1} {line}" for i, line in enumerate(source_code.split("\n"))
+        ]
+        numbered_source = "\n".join(numbered_lines)
+        if not self.source_file_tokens:
+            return numbered_source
+        source_tokens = self.count_tokens(numbered_source)
+        if source_tokens <= self.source_file_tokens:
+            return numbered_source
+
+        line_count = len(numbered_lines)
+        missed = sorted({line - 1 for line in missed_lines or [] if 0 < line <= line_count})
+        missed_set = set(missed)
+        definitions = self._get_definition_lines(source_file_path)
+
+        def distance_to_missed_line(index: int) -> int:
+            if not missed:
+                return index  # Without missed lines, keep the top of the file
+            position = bisect.bisect_left(missed, index)
+            neighbours = missed[max(0, position - 1) : position + 1]
+            return min(abs(index - line) for line in neighbours)
+
+        def priority(index: int) -> tuple:
+            rank = 0 if index in missed_set else 1 if index in definitions else 2
+            return rank, distance_to_missed_line(index), index
+
+        kept_lines = set()
+        kept_tokens = 0
+        for index in sorted(range(line_count), key=priority):
+            # Each line also costs its newline
+            line_tokens = self.count_tokens(numbered_lines[index]) + 1
+            if kept_tokens + line_tokens > self.source_file_tokens:
+                continue
+            kept_lines.add(index)
+            kept_tokens += line_tokens
+
+        self.logger.info(
+            f"Packed the source file from {source_tokens} to about {kept_tokens} tokens "
+            f"({len(kept_lines)} of {line_count} lines kept)"
+        )
+        return "\n".join(self._render_kept_lines(numbered_lines, kept_lines))
+
+    @staticmethod
+    def _render_kept_lines(numbered_lines: List[str], kept_lines: Set[int]) -> List[str]:
+        """Return the kept lines in order, with a marker for each run of omitted lines."""
+
+        def omission_marker(first: int, last: int) -> str:
+            if first == last:
+                return f"... (line {first} omitted)"
+            return f"... (lines {first}-{last} omitted)"
+
+        rendered = []
+        next_index = 0
+        for index in sorted(kept_lines):
+            if index > next_index:
+                rendered.append(omission_marker(next_index + 1, index))
+            rendered.append(numbered_lines[index])
+            next_index = index + 1
+        if next_index < len(numbered_lines):
+            rendered.append(omission_marker(next_index + 1, len(numbered_lines)))
+        return rendered
+
+    def _get_definition_lines(self, source_file_path: str) -> Set[int]:
+        """
+        Return the 0-based lines of the function and class definitions of a source file, or an empty set if
+        the language is not supported by FileMap.
+        """
+        try:
+            from coverage_ai.lsp_logic.file_map.file_map import FileMap
+
+            query_results = FileMap(source_file_path).get_query_results()
+        except Exception as e:
+            self.logger.warning(f"Could not find the definitions of {source_file_path}: {e}")
+            return set()
+        if not query_results:
+            return set()
+        results, _ = query_results
+        return {result["line"] for result in results if result["kind"] == "def"}
+
+    def pack_test_file(self, test_code: str) -> str:
+        """Clip the test file to the test file budget, keeping its beginning (imports, fixtures, first tests)."""
+        return self._clip(test_code, self.test_file_tokens, "test file")
+
+    def pack_included_files(self, included_files: str) -> str:
+        """Clip the included files section to its budget."""
+        return self._clip(included_files, self.included_files_tokens, "included files")
+
+    def _clip(self, text: str, max_tokens: int, section_name: str) -> str:
+        if not text or not max_tokens:
+            return text
+        num_input_tokens = self.count_tokens(text)
+        if num_input_tokens <= max_tokens:
+            return text
+        self.logger.info(
+            f"Clipping the {section_name} from {num_input_tokens} to {max_tokens} tokens"
+        )
+        return clip_tokens(
+            text, max_tokens, num_input_tokens=num_input_tokens, delete_last_line=True
+        )
+
+    def pack_failed_tests(self, failed_tests: List[str]) -> List[str]:
+        """
+        Keep the most recent failed tests that fit in the failed tests budget.
+
+        Args:
+            failed_tests (List[str]): The formatted failed tests, oldest first.
+
+        Returns:
+            List[str]: The kept failed tests, oldest first.
+        """
+        if not self.failed_tests_tokens:
+            return failed_tests
+        kept_tests = []
+        kept_tokens = 0
+        for failed_test in reversed(failed_tests):
+            test_tokens = self.count_tokens(failed_test)
+            if kept_tokens + test_tokens > self.failed_tests_tokens:
+                break
+            kept_tests.append(failed_test)
+            kept_tokens += test_tokens
+        if len(kept_tests) < len(failed_tests):
+            self.logger.info(
+                f"Keeping the {len(kept_tests)} most recent of {len(failed_tests)} failed tests "
+                f"({kept_tokens} tokens)"
+            )
+        return kept_tests[::-1]
@@ -0,0 +1,98 @@
+import hashlib
+import threading
+
+from jinja2 import Environment, StrictUndefined, Template
+
+
+class PromptTemplateRegistry:
+    """
+    The compiled Jinja2 templates of the prompts in the settings, shared by the process.
+
+    A template is compiled once per name and content hash and reused by every later render, so an LLM call no
+    longer lexes and compiles its prompt templates. A template whose content changes (e.g. settings reloaded
+    with new prompts) is compiled again. There is one registry, and one environment, per `autoescape` setting.
+    The `hits` and `misses` counters show how often a compilation was avoided.
+    """
+
+    _shared = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, autoescape: bool = False):
+        """
+        Initialize the PromptTemplateRegistry.
+
+        Args:
+            autoescape (bool): Whether the environment escapes HTML in rendered variables.
+        """
+        self.environment = Environment(
+            undefined=StrictUndefined, autoescape=autoescape
+        )
+        self.hits = 0
+        self.misses = 0
+        # The compiled template of each name: {name: (content_hash, template)}
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls, autoescape: bool = False) -> "PromptTemplateRegistry":
+        """Return the registry shared by the process for an `autoescape` setting."""
+        with cls._shared_lock:
+            registry = cls._shared.get(autoescape)
+            if registry is None:
+                registry = cls(autoescape=autoescape)
+                cls._shared[autoescape] = registry
+            return registry
+
+    def get_template(self, name: str, source: str) -> Template:
+        """
+        Return the compiled template of a name, compiling the source if it was not compiled yet.
+
+        Args:
+            name (str): The name of the template, e.g. "analyze_test_against_context.user".
+            source (str): The template source.
+
+        Returns:
+            Template: The compiled template.
+        """
+        content_hash = hashlib.sha256(source.encode()).hexdigest()
+        with self._lock:
+            cached = self._templates.get(name)
+            if cached is not None and cached[0] == content_hash:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        template = self.environment.from_string(source)
+        with self._lock:
+            self._templates[name] = (content_hash, template)
+        return template
+
+    def render(self, name: str, source: str, variables: dict) -> str:
+        """
+        Render a template with the given variables.
+
+        Args:
+            name (str): The name of the template.
+            source (str): The template source.
+            variables (dict): The template variables.
+
+        Returns:
+            str: The rendered template.
+        """
+        return self.get_template(name, source).render(variables)
+
+    def clear(self):
+        """Remove all compiled templates and reset the counters."""
+        with self._lock:
+            self._templates.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters and the number of compiled templates."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "templates": len(self._templates),
+            }
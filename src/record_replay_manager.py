@@ -1,14 +1,17 @@
 import hashlib
+import json
 import os
+import threading
 
 from pathlib import Path
 from typing import Any, Optional
 
 import yaml
 
-from fuzzywuzzy import fuzz
+from rapidfuzz import fuzz, process, utils
 
 from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.file_hash_cache import FileHashCache
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.utils import truncate_hash
 
@@ -17,20 +20,31 @@ class RecordReplayManager:
     """
     A manager class for recording and replaying responses.
 
-    This class handles the logic for recording responses to YAML files and replaying them
+    This class handles the logic for recording responses to files and replaying them
     based on a hash of the source file, test file, and prompt. It supports both "record"
-    and "replay" modes and ensures consistent hash truncation for file names and YAML keys.
+    and "replay" modes and ensures consistent hash truncation for file names and keys.
+
+    Responses are recorded to an append-only JSONL file (one line per response), and the recorded
+    responses of a file are indexed in memory the first time they are needed, so recording or looking up
+    a response does not reparse or rewrite the whole file. Response files of the previous YAML format are
+    read transparently, and newer JSONL records take precedence over them.
 
     Attributes:
         HASH_DISPLAY_LENGTH (int): The length to which hashes are truncated for display and storage.
         base_dir (Path): The base directory where response files are stored.
         record_mode (bool): Indicates whether the manager is in record mode.
         files_hash (Optional[str]): Cached hash of the source and test files.
+        file_hash_cache (FileHashCache): The SHA-256 digests of source and test files, shared by all managers and
+            keyed by file version, so a file is only read again after it changes.
         logger (CustomLogger): Logger instance for logging messages.
     """
 
     SETTINGS = get_settings().get("default")
     HASH_DISPLAY_LENGTH = SETTINGS.record_replay_hash_display_length
+    # Serializes the appends to response files and the loading of their indexes by concurrent LLM calls
+    _record_lock = threading.Lock()
+    ENTRY_KEYS = ("prompt", "response", "prompt_tokens", "completion_tokens")
+    file_hash_cache = FileHashCache(algorithm="sha256")
 
     def __init__(
         self,
@@ -45,6 +59,10 @@ class RecordReplayManager:
         self.logger = logger or CustomLogger.get_logger(
             __name__, generate_log_files=generate_log_files
         )
+        # The recorded responses of each record file: {caller_name: {prompt_hash: entry}}
+        self._indexes = {}
+        # The token-sorted prefix of each recorded prompt: {(prompt_hash, prefix_length): (prefix, sorted)}
+        self._sorted_prefixes = {}
 
         self.logger.info(
             f"✨ RecordReplayManager initialized in {'Run and Record' if record_mode else 'Run or Replay'} mode."
@@ -66,7 +84,10 @@ class RecordReplayManager:
             )
 
         response_file = self._get_response_file_path(source_file, test_file)
-        exists = response_file.exists()
+        exists = (
+            response_file.exists()
+            or self._get_record_file_path(response_file).exists()
+        )
 
         if exists:
             self.logger.debug(f"Found recorded LLM response file: {response_file}")
@@ -107,13 +128,15 @@ class RecordReplayManager:
             return None
 
         response_file = self._get_response_file_path(source_file, test_file)
-        if not response_file.exists():
+        if (
+            not response_file.exists()
+            and not self._get_record_file_path(response_file).exists()
+        ):
             self.logger.debug(f"Recorded LLM response file not found: {response_file}.")
             return None
 
         try:
-            with open(response_file, "r") as f:
-                cached_data = yaml.safe_load(f)
+            cached_data = self._load_index(response_file)
 
             # Check if caller_name exists
             if caller_name not in cached_data:
@@ -189,9 +212,9 @@ class RecordReplayManager:
         """
         Record a response to a file.
 
-        This method saves a response, along with its associated prompt and metadata, to a YAML file.
-        The file is uniquely identified by a hash of the source and test file paths. If the file already
-        exists, the method updates it with the new response data.
+        This method appends a response, along with its associated prompt, to a JSONL file. The file is
+        uniquely identified by a hash of the source and test file paths, and its first line holds the
+        metadata. A response recorded again for the same caller and prompt replaces the previous one.
 
         Args:
             source_file (str): The path to the source file.
@@ -209,62 +232,129 @@ class RecordReplayManager:
             self.logger.info("Skipping LLM response record in replay mode.")
             return
 
-        response_file = self._get_response_file_path(source_file, test_file)
-        self.logger.info(f"Recording LLM response to {response_file}...")
-
-        # Load existing data or create new
-        meta_key_name = "metadata"
-        files_hash = truncate_hash(
-            self._calculate_files_hash(source_file, test_file), self.HASH_DISPLAY_LENGTH
-        )
-        cached_data = {meta_key_name: {"files_hash": files_hash}}
+        with self._record_lock:
+            self._record_response(
+                source_file,
+                test_file,
+                prompt,
+                response,
+                prompt_tokens,
+                completion_tokens,
+                caller_name,
+            )
 
-        if response_file.exists():
-            try:
-                with open(response_file, "r") as f:
-                    loaded_data = yaml.safe_load(f)
-                    if isinstance(loaded_data, dict):
-                        # Preserve metadata and merge other data
-                        cached_data.update(
-                            {k: v for k, v in loaded_data.items() if k != meta_key_name}
-                        )
-                        self.logger.debug(
-                            f"Loaded existing LLM record with {len(cached_data) - 1} entries."
-                        )
-            except yaml.YAMLError:
-                self.logger.warning(f"Invalid YAML in {response_file}, starting fresh.")
+    def _record_response(
+        self,
+        source_file: str,
+        test_file: str,
+        prompt: dict[str, Any],
+        response: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        caller_name: str,
+    ) -> None:
+        """Append a response to the record file of the source and test files, and to its index."""
+        response_file = self._get_response_file_path(source_file, test_file)
+        record_file = self._get_record_file_path(response_file)
+        self.logger.info(f"Recording LLM response to {record_file}...")
+        index = self._load_index(response_file, locked=True)
 
-        # Create entry
         prompt_hash = truncate_hash(
             hashlib.sha256(str(prompt).encode()).hexdigest(), self.HASH_DISPLAY_LENGTH
         )
         self.logger.info(
             f"🔴 Recording new LLM response for {caller_name}() (prompt hash {prompt_hash})..."
         )
-
-        if caller_name not in cached_data:
-            cached_data[caller_name] = {}
-
-        cached_data[caller_name][f"{prompt_hash}"] = {
+        entry = {
             "prompt": prompt,
             "response": response,
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
         }
 
-        # Save to file
-        os.makedirs(os.path.dirname(response_file), exist_ok=True)
-        with open(response_file, "w") as f:
-            yaml.safe_dump(cached_data, f, sort_keys=False)
+        lines = []
+        if not record_file.exists():
+            files_hash = truncate_hash(
+                self._calculate_files_hash(source_file, test_file),
+                self.HASH_DISPLAY_LENGTH,
+            )
+            lines.append({"metadata": {"files_hash": files_hash}})
+        lines.append({"caller": caller_name, "prompt_hash": prompt_hash, **entry})
+
+        os.makedirs(os.path.dirname(record_file), exist_ok=True)
+        with open(record_file, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+        index.setdefault(caller_name, {})[prompt_hash] = entry
         self.logger.info(f"Record file updated successfully.")
 
+    def _load_index(self, response_file: Path, locked: bool = False) -> dict:
+        """
+        Return the recorded responses of a response file, as {caller_name: {prompt_hash: entry}}. The responses
+        of the legacy YAML file and of the JSONL record file are read once per manager, then kept in memory.
+
+        Args:
+            response_file (Path): The path of the response file (see `_get_response_file_path`).
+            locked (bool): Whether the caller already holds `_record_lock`.
+        """
+        index = self._indexes.get(response_file)
+        if index is not None:
+            return index
+        if not locked:
+            with self._record_lock:
+                return self._load_index(response_file, locked=True)
+
+        index = {}
+        if response_file.exists():
+            try:
+                with open(response_file, "r") as f:
+                    loaded_data = yaml.safe_load(f)
+                if isinstance(loaded_data, dict):
+                    for caller_name, entries in loaded_data.items():
+                        if caller_name != "metadata" and isinstance(entries, dict):
+                            index[caller_name] = dict(entries)
+            except yaml.YAMLError:
+                self.logger.warning(f"Invalid YAML in {response_file}, ignoring it.")
+
+        record_file = self._get_record_file_path(response_file)
+        if record_file.exists():
+            skipped_lines = 0
+            with open(record_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # e.g. a line cut short by an interrupted run
+                        skipped_lines += 1
+                        continue
+                    if not isinstance(record, dict) or "caller" not in record:
+                        continue
+                    index.setdefault(record["caller"], {})[record["prompt_hash"]] = {
+                        key: record.get(key) for key in self.ENTRY_KEYS
+                    }
+            if skipped_lines:
+                self.logger.warning(
+                    f"Skipped {skipped_lines} invalid lines in {record_file}."
+                )
+
+        self.logger.debug(
+            f"Indexed {sum(len(entries) for entries in index.values())} recorded LLM responses."
+        )
+        self._indexes[response_file] = index
+        return index
+
+    @staticmethod
+    def _get_record_file_path(response_file: Path) -> Path:
+        """Return the path of the JSONL record file of a response file."""
+        return response_file.with_suffix(".jsonl")
+
     def _calculate_files_hash(self, source_file: str, test_file: str) -> str:
         """
         Calculate the combined SHA-256 hash of the source and test files.
 
         This method reads the contents of the provided source and test files, computes their
         individual SHA-256 hashes, and combines them to generate a unique hash for both files.
-        If the hash has already been calculated, it returns the cached value.
+        If the hash has already been calculated, it returns the cached value. The hash of each file
+        comes from `file_hash_cache`, so an unchanged file hashed by another manager is not read again.
 
         Args:
             source_file (str): The path to the source file.
@@ -283,10 +373,8 @@ class RecordReplayManager:
         self.logger.debug(
             f"Calculating hash for files {source_file} and {test_file}..."
         )
-        with open(source_file, "rb") as f:
-            source_hash = hashlib.sha256(f.read()).hexdigest()
-        with open(test_file, "rb") as f:
-            test_hash = hashlib.sha256(f.read()).hexdigest()
+        source_hash = self.file_hash_cache.hexdigest(source_file)
+        test_hash = self.file_hash_cache.hexdigest(test_file)
 
         self.files_hash = hashlib.sha256((source_hash + test_hash).encode()).hexdigest()
         self.logger.info(
@@ -349,6 +437,11 @@ class RecordReplayManager:
     ) -> str | None:
         """Find the closest matching recorded prompt using fuzzy string matching.
 
+        Prompts are compared by token sort ratio: the ratio of their prefixes once lowercased, stripped of
+        punctuation and with their words sorted, so that reordered text still matches. The token-sorted
+        prefix of each recorded prompt is computed once per manager, and every recorded prompt is scored
+        in a single batched call.
+
         Args:
             current_prompt: The current prompt text to match
             recorded_prompts: Dictionary of recorded prompts with their hashes as keys
@@ -359,42 +452,50 @@ class RecordReplayManager:
         Returns:
             Hash of the closest matching prompt if found and above threshold, None otherwise
         """
-        self.logger.info(
-            f"Starting fuzzy prompt matching with {len(recorded_prompts)} recorded prompts..."
-        )
-        self.logger.info(f"Matching threshold set to {threshold}.")
-
-        # Use full prompt if prefix_length is None, otherwise use prefix
-        current_text = (
-            current_prompt[:prefix_length]
-            if prefix_length and len(current_prompt) > prefix_length
-            else current_prompt
-        )
-
-        best_match = None
+        current_text = self._sort_tokens(self._get_prefix(current_prompt, prefix_length))
+        choices = {}
         for prompt_hash, prompt_data in recorded_prompts.items():
-            recorded_text = (
-                prompt_data[:prefix_length]
-                if prefix_length and len(prompt_data) > prefix_length
-                else prompt_data
-            )
-
-            # Calculate a similarity ratio using token sort to handle reordered text
-            ratio = fuzz.token_sort_ratio(current_text, recorded_text)
-            self.logger.info(
-                f"Comparing with {prompt_hash}: similarity ratio={ratio}..."
+            recorded_text = self._get_sorted_prefix(prompt_hash, prompt_data, prefix_length)
+            if recorded_text:
+                choices[prompt_hash] = recorded_text
+
+        # Ratios are rounded to integers: a match must beat best_ratio and reach the threshold
+        min_ratio = max(threshold, best_ratio + 1)
+        match = None
+        if current_text and choices:
+            match = process.extractOne(
+                current_text,
+                choices,
+                scorer=fuzz.ratio,
+                processor=None,
+                score_cutoff=min_ratio - 0.5,
             )
-
-            if ratio > best_ratio:
-                self.logger.info(
-                    f"New best match found for prompt hash {prompt_hash} with ratio {ratio}."
-                )
-                best_ratio = ratio
-                best_match = prompt_hash
-
-        result = best_match if best_ratio >= threshold else None
+        ratio = round(match[1]) if match else None
+        result = match[2] if match and ratio >= min_ratio else None
         self.logger.info(
-            f"Final result: best_ratio={best_ratio}, match={'found' if result else 'not found'}"
+            f"Fuzzy prompt matching over {len(recorded_prompts)} recorded prompts (threshold {threshold}): "
+            f"{f'found {result} with ratio {ratio}' if result else 'no match'}."
         )
 
         return result
+
+    @staticmethod
+    def _get_prefix(prompt: str, prefix_length: Optional[int]) -> str:
+        """Return the first `prefix_length` characters of a prompt, or the whole prompt if None."""
+        return prompt[:prefix_length] if prefix_length else prompt
+
+    @staticmethod
+    def _sort_tokens(text: str) -> str:
+        """Lowercase a text, strip its punctuation and sort its words, as the token sort ratio does."""
+        return " ".join(sorted(utils.default_process(text).split()))
+
+    def _get_sorted_prefix(
+        self, prompt_hash: str, prompt: str, prefix_length: Optional[int]
+    ) -> str:
+        """Return the token-sorted prefix of a recorded prompt, computed once per prompt and prefix length."""
+        prefix = self._get_prefix(prompt, prefix_length)
+        cached = self._sorted_prefixes.get((prompt_hash, prefix_length))
+        if cached is None or cached[0] != prefix:
+            cached = (prefix, self._sort_tokens(prefix))
+            self._sorted_prefixes[(prompt_hash, prefix_length)] = cached
+        return cached[1]
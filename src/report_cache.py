@@ -0,0 +1,20 @@
+from coverage_ai.lru_cache import LRUCache
+
+
+class ReportCache(LRUCache):
+    """
+    An `LRUCache` of parsed coverage reports.
+
+    Keys identify a version of a report file (path, size, mtime_ns) together with what was parsed from
+    it, so a rewritten report never matches an older entry. The `hits` and `misses` counters show how
+    often a parse was avoided.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        """
+        Initialize the ReportCache.
+
+        Args:
+            max_entries (int): The maximum number of parsed reports to keep. 0 disables the cache.
+        """
+        super().__init__(max_entries=max_entries)
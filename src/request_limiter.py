@@ -0,0 +1,107 @@
+import asyncio
+import time
+import weakref
+
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+
+class RequestLimiter:
+    """
+    Bounds the LLM requests that run at the same time on an event loop, and spaces out the requests sent
+    to each provider.
+
+    One limiter is shared by every caller of an event loop (see `for_current_loop`), so the limits apply
+    to all concurrent requests, whichever AICaller sends them.
+    """
+
+    _loop_limiters = weakref.WeakKeyDictionary()
+
+    def __init__(
+        self,
+        max_concurrent_requests: int = 4,
+        requests_per_minute: float = 0,
+        provider_requests_per_minute: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialize the RequestLimiter. It must be created while its event loop is running.
+
+        Args:
+            max_concurrent_requests (int): The maximum number of requests in flight.
+            requests_per_minute (float): The default request rate limit per provider. 0 means no limit.
+            provider_requests_per_minute (Dict[str, float], optional): Request rate limits of specific
+                                                                      providers, e.g. {"openai": 500}.
+        """
+        self.max_concurrent_requests = max_concurrent_requests
+        self.requests_per_minute = requests_per_minute
+        self.provider_requests_per_minute = dict(provider_requests_per_minute or {})
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent_requests))
+        self._provider_locks = {}
+        self._next_request_times = {}
+
+    @classmethod
+    def for_current_loop(
+        cls,
+        max_concurrent_requests: int = 4,
+        requests_per_minute: float = 0,
+        provider_requests_per_minute: Optional[Dict[str, float]] = None,
+    ) -> "RequestLimiter":
+        """
+        Return the limiter of the running event loop, creating it with the given limits if needed.
+
+        Returns:
+            RequestLimiter: The limiter shared by the requests of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        limiter = cls._loop_limiters.get(loop)
+        if limiter is None:
+            limiter = cls(
+                max_concurrent_requests, requests_per_minute, provider_requests_per_minute
+            )
+            cls._loop_limiters[loop] = limiter
+        return limiter
+
+    @staticmethod
+    def get_provider(model: str) -> str:
+        """Return the provider of a litellm model name, e.g. "bedrock" for "bedrock/anthropic.claude"."""
+        if "/" in model:
+            return model.split("/", 1)[0]
+        if model.startswith(("gpt-", "o1", "o3", "o4")):
+            return "openai"
+        if model.startswith("claude"):
+            return "anthropic"
+        return model
+
+    def get_min_interval(self, provider: str) -> float:
+        """Return the minimum number of seconds between the starts of two requests to a provider."""
+        requests_per_minute = self.provider_requests_per_minute.get(
+            provider, self.requests_per_minute
+        )
+        return 60.0 / requests_per_minute if requests_per_minute else 0.0
+
+    async def _wait_for_provider(self, provider: str):
+        """Wait until the provider's rate limit allows a new request, and reserve its slot."""
+        min_interval = self.get_min_interval(provider)
+        if not min_interval:
+            return
+        lock = self._provider_locks.setdefault(provider, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            next_request_time = self._next_request_times.get(provider, now)
+            if next_request_time > now:
+                await asyncio.sleep(next_request_time - now)
+            self._next_request_times[provider] = (
+                max(now, next_request_time) + min_interval
+            )
+
+    @asynccontextmanager
+    async def request(self, model: str):
+        """
+        Hold a request slot for a model while the request runs.
+
+        Args:
+            model (str): The litellm model name of the request.
+        """
+        async with self._semaphore:
+            await self._wait_for_provider(self.get_provider(model))
+            yield
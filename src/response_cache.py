@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Optional, Tuple
+
+
+class ResponseCache:
+    """
+    An on-disk cache of LLM responses, stored in SQLite and keyed by the model, the temperature and a hash of
+    the chat messages.
+
+    Entries expire `ttl_sec` seconds after they were stored, and the least recently used entries are evicted
+    once the cache holds more than `max_entries` responses. Unlike record/replay, which replays the responses
+    of a test session, the cache is meant for real runs: repeated runs over unchanged files reuse the
+    responses of identical analysis prompts instead of sending them again.
+    """
+
+    def __init__(self, path: str, ttl_sec: float = 604800, max_entries: int = 1000):
+        """
+        Initialize the ResponseCache, creating the database file if needed.
+
+        Args:
+            path (str): The path of the SQLite database file.
+            ttl_sec (float): The number of seconds a response stays valid. 0 means no expiry.
+            max_entries (int): The maximum number of responses kept. 0 means no limit.
+        """
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, content TEXT, prompt_tokens INTEGER, "
+                "completion_tokens INTEGER, created_at REAL, last_used_at REAL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used_at ON responses (last_used_at)"
+            )
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: list) -> str:
+        """Return the cache key of a request: a SHA-256 of the model, the temperature and the messages."""
+        payload = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Return the cached (content, prompt_tokens, completion_tokens) of a key, or None if the key is not
+        cached or its entry has expired.
+        """
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT content, prompt_tokens, completion_tokens, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row and self.ttl_sec and now - row[3] > self.ttl_sec:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute(
+                "UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key)
+            )
+            self.hits += 1
+            return row[0], row[1], row[2]
+
+    def put(
+        self,
+        key: str,
+        model: str,
+        content: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+    ):
+        """Store a response, then evict expired entries and the least recently used entries over the limit."""
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, content, prompt_tokens, completion_tokens, now, now),
+            )
+            if self.ttl_sec:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_sec,)
+                )
+            if self.max_entries:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def clear(self):
+        """Remove every cached response and reset the counters."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Return the hit and miss counters and the number of cached responses."""
+        with self._lock:
+            entries = self._connection.execute(
+                "SELECT COUNT(*) FROM responses"
+            ).fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,301 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+
+from typing import Awaitable, Callable, Dict, Optional
+
+import litellm
+
+from coverage_ai.settings.config_loader import get_settings
+
+
+# Error kinds, see `classify_error`
+RATE_LIMIT = "rate_limit"
+TRANSIENT = "transient"
+FATAL = "fatal"
+OTHER = "other"
+
+TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504, 529}
+FATAL_STATUS_CODES = {400, 401, 403, 404, 413, 422}
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Classify an LLM call error: rate limit errors (HTTP 429), transient errors (timeouts, connection errors,
+    server errors), fatal errors that a retry cannot fix (bad requests, authentication errors, context
+    window exceeded), or other errors (e.g. a broken stream).
+    """
+    if isinstance(error, litellm.ContextWindowExceededError):
+        return FATAL
+    if isinstance(error, (litellm.Timeout, litellm.APIConnectionError)):
+        return TRANSIENT
+    status_code = getattr(error, "status_code", None)
+    if status_code == 429:
+        return RATE_LIMIT
+    if status_code in TRANSIENT_STATUS_CODES:
+        return TRANSIENT
+    if status_code in FATAL_STATUS_CODES:
+        return FATAL
+    return OTHER
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Return the number of seconds to wait before retrying, from the `retry-after-ms` or `retry-after` header
+    of the response of an error, or None if the error has no such header.
+    """
+    response = getattr(error, "response", None)
+    for headers in (
+        getattr(error, "headers", None),
+        getattr(error, "litellm_response_headers", None),
+        getattr(response, "headers", None),
+    ):
+        if not headers:
+            continue
+        try:
+            retry_after_ms = headers.get("retry-after-ms")
+            retry_after = headers.get("retry-after")
+        except AttributeError:
+            continue
+        try:
+            if retry_after_ms is not None:
+                return max(0.0, float(retry_after_ms) / 1000)
+            if retry_after is not None:
+                return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            # An HTTP date
+            retry_date = email.utils.parsedate_to_datetime(retry_after)
+        except (TypeError, ValueError):
+            continue
+        return max(0.0, retry_date.timestamp() - time.time())
+    return None
+
+
+class RetryBudget:
+    """
+    A token bucket limiting the retries of a model, shared by every caller of that model: each failed
+    attempt takes a token, each successful call gives back `token_ratio` tokens, and retries are only
+    allowed while more than half of the bucket is left. When most calls fail, callers stop retrying
+    instead of multiplying the load on the provider.
+    """
+
+    def __init__(self, max_tokens: float = 10, token_ratio: float = 0.1):
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = max_tokens
+
+    def on_success(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.token_ratio)
+
+    def on_failure(self) -> bool:
+        """Take a token for a failed attempt, and return whether it may be retried."""
+        self.tokens = max(0.0, self.tokens - 1)
+        return self.tokens > self.max_tokens / 2
+
+
+class RetryScheduler:
+    """
+    Retries failed LLM calls according to the kind of error (see `classify_error`).
+
+    Fatal errors are raised at once. Rate limit errors honour the provider's `retry-after` header, and pause
+    every call to the same model until then, not only the failed one. Other errors back off exponentially,
+    with full jitter so that concurrent callers do not retry in lockstep. Retries are bounded per model by
+    a shared retry budget (see `RetryBudget`).
+
+    One scheduler is shared by every AICaller of the process (see `get_shared`). It counts the attempts,
+    retries and rate limit errors of each model, and the time spent waiting (see `stats`).
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay_sec: float = 1.0,
+        max_delay_sec: float = 60.0,
+        budget_tokens: float = 10,
+        budget_token_ratio: float = 0.1,
+    ):
+        """
+        Initialize the RetryScheduler.
+
+        Args:
+            max_attempts (int): The maximum number of attempts of a call.
+            base_delay_sec (float): The backoff delay of the first retry, doubled at each retry.
+            max_delay_sec (float): The maximum backoff delay, and the maximum `retry-after` honoured.
+            budget_tokens (float): The size of the retry budget of each model. 0 means no budget.
+            budget_token_ratio (float): The tokens given back to the retry budget by a successful call.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay_sec = base_delay_sec
+        self.max_delay_sec = max_delay_sec
+        self.budget_tokens = budget_tokens
+        self.budget_token_ratio = budget_token_ratio
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, RetryBudget] = {}
+        self._paused_until: Dict[str, float] = {}
+        self._stats: Dict[str, dict] = {}
+
+    @classmethod
+    def get_shared(cls) -> "RetryScheduler":
+        """Return the scheduler shared by the process, created from the `[llm_retry]` settings."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                settings = get_settings().get("llm_retry", {})
+                cls._shared = cls(
+                    max_attempts=get_settings().get("default").get("model_retries", 3),
+                    base_delay_sec=settings.get("base_delay_sec", 1.0),
+                    max_delay_sec=settings.get("max_delay_sec", 60.0),
+                    budget_tokens=settings.get("budget_tokens", 10),
+                    budget_token_ratio=settings.get("budget_token_ratio", 0.1),
+                )
+            return cls._shared
+
+    def _model_stats(self, model: str) -> dict:
+        return self._stats.setdefault(
+            model,
+            {"attempts": 0, "retries": 0, "rate_limited": 0, "throttled": 0, "wait_sec": 0.0},
+        )
+
+    def get_delay(self, attempt: int) -> float:
+        """Return the jittered backoff delay before the retry following the given 1-based attempt."""
+        cap = min(self.max_delay_sec, self.base_delay_sec * 2 ** (attempt - 1))
+        return random.uniform(0, cap)
+
+    def _before_attempt(self, model: str) -> float:
+        """Count an attempt, and return the seconds to wait for the model's rate limit pause to end."""
+        with self._lock:
+            self._model_stats(model)["attempts"] += 1
+            return max(0.0, self._paused_until.get(model, 0.0) - time.monotonic())
+
+    def _on_success(self, model: str):
+        with self._lock:
+            if self.budget_tokens:
+                self._get_budget(model).on_success()
+
+    def _get_budget(self, model: str) -> RetryBudget:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = self._budgets[model] = RetryBudget(
+                self.budget_tokens, self.budget_token_ratio
+            )
+        return budget
+
+    def _on_failure(
+        self, model: str, error: Exception, attempt: int, max_attempts: int
+    ) -> Optional[float]:
+        """
+        Record a failed attempt, and return the seconds to wait before retrying it, or None if it must not
+        be retried. Fatal errors are never retried, so they do not take a retry budget token.
+        """
+        kind = classify_error(error)
+        if kind == FATAL:
+            return None
+        with self._lock:
+            stats = self._model_stats(model)
+            allowed = self._get_budget(model).on_failure() if self.budget_tokens else True
+            if kind == RATE_LIMIT:
+                stats["rate_limited"] += 1
+                retry_after = get_retry_after(error)
+                if retry_after is not None:
+                    # Every call to the model waits for the pause, not only the retries of this call
+                    delay = min(retry_after, self.max_delay_sec) + random.uniform(
+                        0, self.base_delay_sec
+                    )
+                    self._paused_until[model] = max(
+                        self._paused_until.get(model, 0.0), time.monotonic() + delay
+                    )
+                else:
+                    delay = self.get_delay(attempt)
+            else:
+                delay = self.get_delay(attempt)
+            if attempt >= max_attempts:
+                return None
+            if not allowed:
+                stats["throttled"] += 1
+                return None
+            stats["retries"] += 1
+            return delay
+
+    def _add_wait(self, model: str, wait_sec: float):
+        with self._lock:
+            self._model_stats(model)["wait_sec"] += wait_sec
+
+    def call(self, model: str, func: Callable, max_attempts: Optional[int] = None):
+        """
+        Call `func` until it succeeds, retrying its failures according to the scheduling policy.
+
+        Args:
+            model (str): The litellm model name of the call.
+            func (Callable): The call, without arguments.
+            max_attempts (int, optional): The maximum number of attempts. Defaults to `max_attempts`.
+
+        Returns:
+            The result of `func`.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        attempt = 0
+        while True:
+            attempt += 1
+            self._wait(model, self._before_attempt(model))
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._on_failure(model, e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                self._wait(model, delay)
+                continue
+            self._on_success(model)
+            return result
+
+    async def acall(
+        self,
+        model: str,
+        func: Callable[[], Awaitable],
+        max_attempts: Optional[int] = None,
+    ):
+        """Await `func()` until it succeeds, like `call`, without blocking the event loop."""
+        max_attempts = max_attempts or self.max_attempts
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._async_wait(model, self._before_attempt(model))
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._on_failure(model, e, attempt, max_attempts)
+                if delay is None:
+                    raise
+                await self._async_wait(model, delay)
+                continue
+            self._on_success(model)
+            return result
+
+    def _wait(self, model: str, wait_sec: float):
+        if wait_sec > 0:
+            time.sleep(wait_sec)
+            self._add_wait(model, wait_sec)
+
+    async def _async_wait(self, model: str, wait_sec: float):
+        if wait_sec > 0:
+            await asyncio.sleep(wait_sec)
+            self._add_wait(model, wait_sec)
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Return the per-model counters: attempts, retries, rate limit errors, retries refused by the retry
+        budget ("throttled"), and seconds spent waiting for backoffs and rate limit pauses.
+        """
+        with self._lock:
+            return {model: dict(stats) for model, stats in self._stats.items()}
+
+    def total_wait_sec(self) -> float:
+        """Return the seconds spent waiting, for all models."""
+        with self._lock:
+            return sum(stats["wait_sec"] for stats in self._stats.values())
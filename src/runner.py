@@ -2,6 +2,9 @@ import subprocess
 import time
 from typing import Optional
 
+from coverage_ai.settings.config_loader import get_settings
+from coverage_ai.warm_runner import WarmTestRunner
+
 
 class Runner:
     @staticmethod
@@ -10,6 +13,10 @@ class Runner:
         """
         Executes a shell command in a specified working directory and returns its output, error, and exit code.
 
+        When the warm runner is enabled in the settings (`[warm_runner]`), pytest commands run in a
+        long-lived worker process instead of a new shell, falling back to the shell if the worker is
+        not available.
+
         Parameters:
             command (str): The shell command to execute.
             max_run_time_sec (int): Maximum allowed runtime in seconds before timeout.
@@ -23,6 +30,10 @@ class Runner:
             time.time() * 1000
         )  # Get the current time in milliseconds
 
+        warm_result = Runner.run_in_warm_worker(command, max_run_time_sec, cwd)
+        if warm_result is not None:
+            return (*warm_result, command_start_time)
+
         try:
             result = subprocess.run(
                 command,
@@ -35,3 +46,37 @@ class Runner:
             return result.stdout, result.stderr, result.returncode, command_start_time
         except subprocess.TimeoutExpired:
             return "", "Command timed out", -1, command_start_time
+
+    @staticmethod
+    def run_in_warm_worker(
+        command: str, max_run_time_sec: int, cwd: Optional[str] = None
+    ) -> Optional[tuple]:
+        """
+        Run a pytest command in the shared warm worker, if it is enabled and the command is supported.
+
+        Parameters:
+            command (str): The shell command to execute.
+            max_run_time_sec (int): Maximum allowed runtime in seconds before timeout.
+            cwd (str, optional): The working directory in which to execute the command. Defaults to None.
+
+        Returns:
+            tuple: The standard output, standard error and exit code, or None if the command should
+                   run in a shell instead.
+        """
+        settings = get_settings().get("warm_runner", {})
+        if not settings.get("enabled", False):
+            return None
+        parsed_command = WarmTestRunner.parse_pytest_command(command)
+        if parsed_command is None:
+            return None
+
+        args, prepend_cwd = parsed_command
+        warm_runner = WarmTestRunner.shared(
+            settings.get("python_executable", "python"),
+            settings.get("preload_modules", []),
+        )
+        try:
+            return warm_runner.run(args, cwd, max_run_time_sec, prepend_cwd)
+        except RuntimeError as e:
+            warm_runner.logger.warning(f"{e}. Running the command in a shell instead.")
+            return None
@@ -0,0 +1,347 @@
+import json
+import os
+import threading
+import time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.utils import get_original_caller
+
+
+class ModelRouter:
+    """
+    Per-model, per-language statistics of speculative test generation: the number of calls, the number of
+    useful responses (parsed as YAML with new tests), the mean latency, and the number of generated and
+    accepted tests. Models are ranked by acceptance rate (accepted tests per generated test), then by mean
+    latency; models with fewer than `min_samples` generated tests for a language rank first, so that every
+    model gets tried.
+    """
+
+    def __init__(self, path: str = "", min_samples: int = 8):
+        """
+        Initialize the ModelRouter, loading the statistics saved at `path` if there are any.
+
+        Args:
+            path (str): The JSON file the statistics are saved to. "" keeps them in memory.
+            min_samples (int): The number of generated tests needed before a model is ranked by its
+                               acceptance rate.
+        """
+        self.path = path
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._stats = {}
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r") as f:
+                    self._stats = json.load(f)
+            except (OSError, ValueError):
+                self._stats = {}
+
+    def _entry(self, model: str, language: str) -> dict:
+        entry = self._stats.setdefault(language or "unknown", {}).setdefault(
+            model,
+            {"calls": 0, "useful": 0, "latency_sec": 0.0, "generated": 0, "accepted": 0},
+        )
+        return entry
+
+    def record_call(self, model: str, language: str, latency_sec: float, useful: bool):
+        """Record a finished call to a model, and whether its response was useful."""
+        with self._lock:
+            entry = self._entry(model, language)
+            entry["calls"] += 1
+            entry["useful"] += int(useful)
+            entry["latency_sec"] += latency_sec
+
+    def record_validation(self, model: str, language: str, generated: int, accepted: int):
+        """Record the number of tests a model generated and how many of them were accepted, then save."""
+        with self._lock:
+            entry = self._entry(model, language)
+            entry["generated"] += generated
+            entry["accepted"] += accepted
+        self.save()
+
+    def acceptance_rate(self, model: str, language: str) -> float:
+        """Return the fraction of the tests generated by a model for a language that were accepted."""
+        with self._lock:
+            entry = self._entry(model, language)
+            return entry["accepted"] / entry["generated"] if entry["generated"] else 0.0
+
+    def mean_latency(self, model: str, language: str) -> float:
+        """Return the mean latency of the calls to a model for a language, in seconds."""
+        with self._lock:
+            entry = self._entry(model, language)
+            return entry["latency_sec"] / entry["calls"] if entry["calls"] else 0.0
+
+    def rank(self, models: Sequence[str], language: str) -> List[str]:
+        """Return the models from the most to the least preferred for a language."""
+
+        def priority(model: str) -> tuple:
+            with self._lock:
+                explored = self._entry(model, language)["generated"] >= self.min_samples
+            return (
+                explored,
+                -self.acceptance_rate(model, language),
+                self.mean_latency(model, language),
+            )
+
+        return sorted(models, key=priority)
+
+    def stats(self) -> dict:
+        """Return a copy of the statistics, keyed by language then model."""
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
+
+    def save(self):
+        """Save the statistics to `path`, if set."""
+        if not self.path:
+            return
+        with self._lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self._stats, f, indent=2)
+
+
+class SpeculativeCaller:
+    """
+    Sends the test generation prompt to several models at the same time, and returns the first response that
+    is useful (see `is_useful`), so that validation starts as soon as any model answered. The responses of the
+    slower models are kept, and can be validated with `late_responses` until `cancel_pending` is called (once
+    the desired coverage is reached). Calls from other callers than `speculative_callers` only go to the first
+    caller.
+
+    Calls already sent cannot be interrupted: cancelled calls finish in the background and their responses are
+    dropped, but calls not started yet are never sent. The interpreter waits for the calls still running before
+    it exits; `close` waits for them earlier, so that their tokens are counted. The tokens of every finished
+    call, useful or not, that were not returned by `call_model` are kept until `pop_unreported_tokens`.
+    """
+
+    def __init__(
+        self,
+        callers: Sequence,
+        is_useful: Callable[[str], bool],
+        router: Optional[ModelRouter] = None,
+        max_models: int = 0,
+        speculative_callers: Sequence[str] = ("generate_tests",),
+        logger: Optional[CustomLogger] = None,
+        generate_log_files: bool = True,
+    ):
+        """
+        Initialize the SpeculativeCaller.
+
+        Args:
+            callers (Sequence[AICaller]): One caller per model. The first one is the main model.
+            is_useful (Callable[[str], bool]): Whether a response can be validated.
+            router (ModelRouter, optional): The per-model statistics used to rank the models.
+            max_models (int): The number of best ranked models raced per call. 0 races every model.
+            speculative_callers (Sequence[str]): The callers whose calls are sent to every model.
+            logger (CustomLogger, optional): The logger object for logging messages.
+            generate_log_files (bool): Whether or not to generate logs.
+        """
+        self.callers = list(callers)
+        self.is_useful = is_useful
+        self.router = router or ModelRouter()
+        self.max_models = max_models
+        self.speculative_callers = set(speculative_callers)
+        self.logger = logger or CustomLogger.get_logger(
+            __name__, generate_log_files=generate_log_files
+        )
+        self.language = ""
+        self.last_model = self.model
+        self._pending = []
+        self._cancelled = threading.Event()
+        self._executor = None
+        self._in_flight = []
+        self._tokens_lock = threading.Lock()
+        self._unreported_prompt_tokens = 0
+        self._unreported_completion_tokens = 0
+
+    @property
+    def model(self) -> str:
+        """The main model."""
+        return self.callers[0].model
+
+    @property
+    def last_cached_prompt_tokens(self) -> int:
+        return sum(caller.last_cached_prompt_tokens for caller in self.callers)
+
+    @property
+    def total_cached_prompt_tokens(self) -> int:
+        return sum(caller.total_cached_prompt_tokens for caller in self.callers)
+
+    @property
+    def total_saved_prompt_tokens(self) -> int:
+        return sum(caller.total_saved_prompt_tokens for caller in self.callers)
+
+    @property
+    def total_saved_completion_tokens(self) -> int:
+        return sum(caller.total_saved_completion_tokens for caller in self.callers)
+
+    def call_model(self, prompt: dict, stream=True, cache_prefix: Optional[str] = None):
+        """
+        Call the models with the provided prompt, and return the first useful response. Responses are not
+        streamed to the console when several models are raced, since they would interleave.
+
+        Returns:
+            tuple: A tuple containing the response, the number of tokens used from the prompt, and the total
+                   number of tokens in the response. If no response is useful, the last one is returned.
+        """
+        caller_name = get_original_caller()
+        if caller_name not in self.speculative_callers or len(self.callers) == 1:
+            self.last_model = self.model
+            return self.callers[0].call_model(
+                prompt, stream=stream, cache_prefix=cache_prefix
+            )
+
+        self.cancel_pending()
+        callers_by_model = {caller.model: caller for caller in self.callers}
+        models = self.router.rank(list(callers_by_model), self.language)
+        if self.max_models:
+            models = models[: self.max_models]
+        self.logger.info(
+            f"Racing {len(models)} models for {caller_name}(): {', '.join(models)}"
+        )
+
+        self._cancelled = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=len(models), thread_name_prefix="speculative-call"
+        )
+        pending = {
+            self._executor.submit(
+                self._timed_call,
+                callers_by_model[model],
+                prompt,
+                cache_prefix,
+                caller_name,
+                self.language,
+                self._cancelled,
+            ): model
+            for model in models
+        }
+        self._in_flight = [
+            future for future in self._in_flight if not future.done()
+        ] + list(pending)
+
+        last_result = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = pending.pop(future)
+                result = self._get_result(future, model)
+                if result is None:
+                    continue
+                last_result = model, result
+                if result[0]:
+                    self.logger.info(f"Using the response of {model} for {caller_name}()")
+                    self.last_model = model
+                    self._pending = list(pending.items())
+                    self._add_unreported_tokens(-result[2], -result[3])
+                    return result[1:]
+
+        self._executor.shutdown(wait=False)
+        if last_result is None:
+            raise RuntimeError(f"Every model failed to answer {caller_name}()")
+        self.last_model = last_result[0]
+        self._add_unreported_tokens(-last_result[1][2], -last_result[1][3])
+        return last_result[1][1:]
+
+    async def acall_model(self, prompt: dict, stream=False, cache_prefix: Optional[str] = None):
+        """Call the main model without blocking the event loop (see `AICaller.acall_model`)."""
+        return await self.callers[0].acall_model(
+            prompt, stream=stream, cache_prefix=cache_prefix
+        )
+
+    def _timed_call(
+        self,
+        caller,
+        prompt: dict,
+        cache_prefix: Optional[str],
+        caller_name: str,
+        language: str,
+        cancelled: threading.Event,
+    ) -> Optional[tuple]:
+        """
+        Call a model, record its latency and add its tokens to the unreported tokens. Returns None if the call
+        was cancelled before it started.
+        """
+        if cancelled.is_set():
+            return None
+        start_time = time.monotonic()
+        content, prompt_tokens, completion_tokens = caller.call_model(
+            prompt, stream=False, cache_prefix=cache_prefix, caller_name=caller_name
+        )
+        self._add_unreported_tokens(prompt_tokens, completion_tokens)
+        useful = bool(self.is_useful(content))
+        self.router.record_call(
+            caller.model, language, time.monotonic() - start_time, useful
+        )
+        return useful, content, prompt_tokens, completion_tokens
+
+    def _add_unreported_tokens(self, prompt_tokens: int, completion_tokens: int):
+        with self._tokens_lock:
+            self._unreported_prompt_tokens += prompt_tokens
+            self._unreported_completion_tokens += completion_tokens
+
+    def pop_unreported_tokens(self) -> Tuple[int, int]:
+        """
+        Return the prompt and completion tokens of the finished calls that `call_model` did not return (the
+        responses of the slower models, useful or not, including cancelled calls that finished), and reset
+        them.
+        """
+        with self._tokens_lock:
+            tokens = (self._unreported_prompt_tokens, self._unreported_completion_tokens)
+            self._unreported_prompt_tokens = 0
+            self._unreported_completion_tokens = 0
+        return tokens
+
+    def _get_result(self, future: Future, model: str) -> Optional[tuple]:
+        """Return the (useful, content, prompt_tokens, completion_tokens) of a finished call, or None."""
+        try:
+            return future.result()
+        except Exception as e:
+            self.logger.error(f"Error calling {model}: {e}")
+            return None
+
+    def late_responses(self) -> Iterator[Tuple[str, str, int, int]]:
+        """
+        Yield the useful responses of the slower models of the last call, as they arrive, as
+        (model, response, prompt_tokens, completion_tokens) tuples. Stops once `cancel_pending` is called.
+        Their tokens are counted by `pop_unreported_tokens`.
+        """
+        pending = dict(self._pending)
+        while pending and not self._cancelled.is_set():
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                model = pending.pop(future)
+                self._pending = list(pending.items())
+                result = self._get_result(future, model)
+                if result is None or not result[0] or self._cancelled.is_set():
+                    continue
+                yield (model,) + result[1:]
+        self._pending = []
+
+    def cancel_pending(self):
+        """Cancel the calls of the slower models of the last call, and drop their responses."""
+        self._cancelled.set()
+        for future, model in self._pending:
+            if not future.done():
+                self.logger.info(f"Cancelling the call to {model}")
+                future.cancel()
+        self._pending = []
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Cancel the pending calls, and wait up to `timeout` seconds (None waits without limit) for the calls
+        already sent to finish, so that their tokens are counted by `pop_unreported_tokens`.
+        """
+        self.cancel_pending()
+        running = [future for future in self._in_flight if not future.done()]
+        if running:
+            self.logger.info(f"Waiting for {len(running)} cancelled model calls to finish")
+            wait(running, timeout=timeout)
+        self._in_flight = [future for future in self._in_flight if not future.done()]
@@ -0,0 +1,138 @@
+import os
+import re
+
+from typing import List, Optional
+
+PYTHON_TEST_FUNCTION = re.compile(r"^([ \t]*)(?:async\s+)?def\s+(test\w*)\s*\(", re.MULTILINE)
+PYTHON_CLASS = re.compile(r"^([ \t]*)class\s+(\w+)")
+GO_TEST_FUNCTION = re.compile(r"^func\s+(Test\w*)\s*\(", re.MULTILINE)
+COMMAND_SEPARATOR = re.compile(r"&&|\|\||;")
+
+
+def pytest_node_ids(
+    test_file_content: str, test_file_relative_path: str, test_names: List[str]
+) -> List[str]:
+    """
+    Build the pytest node ids of test functions, taking the test classes they belong to into account.
+
+    Args:
+        test_file_content (str): The content of the test file.
+        test_file_relative_path (str): The path of the test file, relative to where pytest runs.
+        test_names (List[str]): The test function names to look for.
+
+    Returns:
+        List[str]: The node ids, e.g. "tests/test_app.py::TestApp::test_add", in file order.
+    """
+    node_ids = []
+    class_stack = []  # (indentation, class name)
+    for line in test_file_content.split("\n"):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        indentation = len(line) - len(line.lstrip())
+        while class_stack and class_stack[-1][0] >= indentation:
+            class_stack.pop()
+
+        class_match = PYTHON_CLASS.match(line)
+        if class_match:
+            class_stack.append((indentation, class_match.group(2)))
+            continue
+        function_match = PYTHON_TEST_FUNCTION.match(line)
+        if function_match and function_match.group(2) in test_names:
+            node_ids.append(
+                "::".join(
+                    [test_file_relative_path]
+                    + [name for _, name in class_stack]
+                    + [function_match.group(2)]
+                )
+            )
+    return node_ids
+
+
+def _append_to_segment(test_command: str, keyword: str, arguments: str) -> Optional[str]:
+    """Append arguments to the part of a chained shell command that runs `keyword`."""
+    position = test_command.find(keyword)
+    if position == -1:
+        return None
+    separator = COMMAND_SEPARATOR.search(test_command, position)
+    end = separator.start() if separator else len(test_command)
+    segment = test_command[:end].rstrip()
+    return f"{segment} {arguments}{test_command[len(segment):]}"
+
+
+def _has_positional_arguments(test_command: str) -> bool:
+    """
+    Check whether the pytest invocation of a command already selects test paths.
+
+    An argument is considered positional when it does not start with "-" and does not follow an
+    option without "=" (which may take it as a value, e.g. "--cov src").
+    """
+    segment = test_command[test_command.find("pytest") + len("pytest") :]
+    separator = COMMAND_SEPARATOR.search(segment)
+    if separator:
+        segment = segment[: separator.start()]
+    previous = ""
+    for token in segment.split():
+        if not token.startswith("-") and not (
+            previous.startswith("-") and "=" not in previous
+        ):
+            return True
+        previous = token
+    return False
+
+
+def build_single_test_command(
+    test_command: str,
+    test_command_dir: str,
+    test_file_path: str,
+    test_file_content: str,
+    test_code: str,
+    language: str,
+) -> Optional[str]:
+    """
+    Adapt a test command so that it only runs the test functions defined in `test_code`.
+
+    Supported frameworks:
+        - pytest: the tests are selected by node id. If the command already names the test file,
+          the file is replaced by the node ids; otherwise the node ids are appended, as long as
+          the command does not already select other test paths.
+        - go test: the tests are selected with `-run '^(TestA|TestB)$'`.
+
+    Args:
+        test_command (str): The test command that runs the whole suite.
+        test_command_dir (str): The directory the test command runs in.
+        test_file_path (str): The path of the test file.
+        test_file_content (str): The content of the test file, with the new tests inserted.
+        test_code (str): The code of the new tests.
+        language (str): The programming language of the test file.
+
+    Returns:
+        Optional[str]: The adapted command, or None if the tests cannot be selected for this command.
+    """
+    if language == "python" and "pytest" in test_command:
+        test_names = PYTHON_TEST_FUNCTION.findall(test_code)
+        relative_path = os.path.relpath(test_file_path, test_command_dir)
+        node_ids = pytest_node_ids(
+            test_file_content, relative_path, [name for _, name in test_names]
+        )
+        if not node_ids:
+            return None
+
+        for reference in (os.path.abspath(test_file_path), relative_path):
+            pattern = re.compile(rf"(?<!\S){re.escape(reference)}(?!\S)")
+            if pattern.search(test_command):
+                return pattern.sub(lambda _: " ".join(node_ids), test_command, count=1)
+        if _has_positional_arguments(test_command):
+            return None
+        return _append_to_segment(test_command, "pytest", " ".join(node_ids))
+
+    if language == "go" and "go test" in test_command:
+        test_names = GO_TEST_FUNCTION.findall(test_code)
+        if not test_names or "-run" in test_command.split():
+            return None
+        position = test_command.find("go test") + len("go test")
+        return (
+            f"{test_command[:position]} -run '^({'|'.join(test_names)})$'"
+            f"{test_command[position:]}"
+        )
+
+    return None
@@ -2,10 +2,11 @@ import argparse
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine
+from sqlalchemy import Column, DateTime, Integer, String, Text, create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import load_only, scoped_session, sessionmaker
 
+from coverage_ai.file_coverage import format_line_ranges
 from coverage_ai.report_generator import ReportGenerator
 
 
@@ -28,14 +29,32 @@ class UnitTestGenerationAttempt(Base):
     source_file = Column(Text)
     original_test_file = Column(Text)
     processed_test_file = Column(Text)
+    newly_covered_lines = Column(Text)  # Line ranges, e.g. "3-5, 9"
 
 
 class UnitTestDB:
     def __init__(self, db_connection_string):
         self.engine = create_engine(db_connection_string)
         Base.metadata.create_all(self.engine)
+        self._add_missing_columns()
         self.Session = scoped_session(sessionmaker(bind=self.engine))
 
+    def _add_missing_columns(self):
+        """Add the columns introduced after a database file was created, so older databases keep working."""
+        table = UnitTestGenerationAttempt.__table__
+        existing_columns = {
+            column["name"] for column in inspect(self.engine).get_columns(table.name)
+        }
+        with self.engine.begin() as connection:
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    connection.execute(
+                        text(
+                            f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                            f"{column.type.compile(self.engine.dialect)}"
+                        )
+                    )
+
     def insert_attempt(self, test_result: dict):
         with self.Session() as session:
             new_attempt = UnitTestGenerationAttempt(
@@ -52,6 +71,9 @@ class UnitTestDB:
                 source_file=test_result.get("source_file"),
                 original_test_file=test_result.get("original_test_file"),
                 processed_test_file=test_result.get("processed_test_file"),
+                newly_covered_lines=format_line_ranges(
+                    test_result.get("newly_covered_lines") or []
+                ),
             )
             session.add(new_attempt)
             session.commit()
@@ -83,6 +105,7 @@ class UnitTestDB:
                 "source_file": attempt.source_file,
                 "original_test_file": attempt.original_test_file,
                 "processed_test_file": attempt.processed_test_file,
+                "newly_covered_lines": attempt.newly_covered_lines or "",
             }
             for attempt in attempts
         ]
@@ -6,6 +6,7 @@ from typing import Optional
 from coverage_ai.agent_completion_abc import AgentCompletionABC
 from coverage_ai.custom_logger import CustomLogger
 from coverage_ai.file_preprocessor import FilePreprocessor
+from coverage_ai.prompt_packer import PromptPacker
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.utils import load_yaml
 
@@ -81,6 +82,9 @@ class UnitTestGenerator:
         self.total_output_token_count = 0
         self.testing_framework = "Unknown"
         self.code_coverage_report = ""
+        self.prompt_packer = self._create_prompt_packer()
+        # (source code, packed source) of the first packing, reused while the source is unchanged
+        self.packed_source = None
 
         # Read self.source_file_path into a string
         with open(self.source_file_path, "r") as f:
@@ -89,6 +93,44 @@ class UnitTestGenerator:
         with open(self.test_file_path, "r") as f:
             self.test_code = f.read()
 
+    def _create_prompt_packer(self) -> Optional[PromptPacker]:
+        """
+        Create the prompt packer of the token budgets configured in `[prompt_budget]` and
+        `failed_test_history.max_tokens`, or return None if no budget is set.
+        """
+        budget = get_settings().get("prompt_budget", {})
+        budget_enabled = budget.get("enabled", False)
+        failed_tests_tokens = get_settings().get("failed_test_history.max_tokens", 8000)
+        if not budget_enabled and not failed_tests_tokens:
+            return None
+        return PromptPacker(
+            source_file_tokens=(
+                budget.get("source_file_tokens", 32000) if budget_enabled else 0
+            ),
+            test_file_tokens=budget.get("test_file_tokens", 16000) if budget_enabled else 0,
+            included_files_tokens=(
+                budget.get("included_files_tokens", 8000) if budget_enabled else 0
+            ),
+            failed_tests_tokens=failed_tests_tokens,
+            logger=self.logger,
+        )
+
+    def _get_packed_source(self, missed_lines=None) -> str:
+        """
+        Return the numbered source file packed into the source file budget.
+
+        The source is packed against the missed lines of the first call and the result is reused while the
+        source code is unchanged, so the numbered source stays byte-identical across iterations and the
+        provider can keep serving the prompt prefix from its cache. The later missed lines are a subset of the
+        first ones, so they remain in the packed source.
+        """
+        if self.packed_source is None or self.packed_source[0] != self.source_code:
+            packed = self.prompt_packer.pack_source(
+                self.source_code, self.source_file_path, missed_lines
+            )
+            self.packed_source = (self.source_code, packed)
+        return self.packed_source[1]
+
     def get_code_language(self, source_file_path):
         """
         Get the programming language based on the file extension of the provided source file path.
@@ -129,38 +171,52 @@ class UnitTestGenerator:
         Processes the failed test runs and returns a formatted string with details of the failed tests.
 
         Args:
-            failed_test_runs (list): A list of dictionaries containing information about failed test runs.
+            failed_test_runs (list): A list of dictionaries containing information about failed test runs. A
+                                     "count" key gives the number of failed tests with the same error.
 
         Returns:
             str: A formatted string with details of the failed tests.
         """
         if not failed_test_runs:
-            failed_test_runs_value = ""
-        else:
-            failed_test_runs_value = ""
-            try:
-                for failed_test in failed_test_runs:
-                    failed_test_dict = failed_test.get("code", {})
-                    if not failed_test_dict:
-                        continue
-                    # dump dict to str
-                    code = json.dumps(failed_test_dict)
-                    error_message = failed_test.get("error_message", None)
-                    failed_test_runs_value += f"Failed Test:\n```\n{code}\n```\n"
-                    if error_message:
-                        failed_test_runs_value += (
-                            f"Test execution error analysis:\n{error_message}\n\n\n"
-                        )
-                    else:
-                        failed_test_runs_value += "\n\n"
-            except Exception as e:
-                self.logger.error(f"Error processing failed test runs: {e}")
-                failed_test_runs_value = ""
+            return ""
+        failed_tests = []
+        try:
+            for failed_test in failed_test_runs:
+                failed_test_dict = failed_test.get("code", {})
+                if not failed_test_dict:
+                    continue
+                # dump dict to str
+                code = json.dumps(failed_test_dict)
+                error_message = failed_test.get("error_message", None)
+                failed_test_value = f"Failed Test:\n```\n{code}\n```\n"
+                if failed_test.get("count", 1) > 1:
+                    failed_test_value += (
+                        f"The same error occurred in {failed_test['count']} failed tests, "
+                        f"only the most recent one is shown.\n"
+                    )
+                if error_message:
+                    failed_test_value += (
+                        f"Test execution error analysis:\n{error_message}\n\n\n"
+                    )
+                else:
+                    failed_test_value += "\n\n"
+                failed_tests.append(failed_test_value)
+        except Exception as e:
+            self.logger.error(f"Error processing failed test runs: {e}")
+            return ""
 
+        if self.prompt_packer:
+            failed_tests = self.prompt_packer.pack_failed_tests(failed_tests)
+        failed_test_runs_value = "".join(failed_tests)
         return failed_test_runs_value
 
     def generate_tests(
-        self, failed_test_runs, language, testing_framework, code_coverage_report
+        self,
+        failed_test_runs,
+        language,
+        testing_framework,
+        code_coverage_report,
+        missed_lines=None,
     ):
         """
         Generate tests using the AI model based on the constructed prompt.
@@ -172,6 +228,9 @@ class UnitTestGenerator:
 
         Parameters:
             max_tokens (int, optional): The maximum number of tokens to use for generating tests. Defaults to 4096.
+            missed_lines (list, optional): The source lines not covered by the tests. With `[prompt_budget]`
+                                           enabled, the source lines closest to the missed lines of the
+                                           first call are kept first.
 
         Returns:
             dict: A dictionary containing the generated tests with test tags, test code, test name, and test behavior. If an error occurs during test generation, an empty dictionary is returned.
@@ -180,6 +239,16 @@ class UnitTestGenerator:
             Exception: If there is an error during test generation, such as a parsing error while processing the AI model response.
         """
         failed_test_runs_value = self.check_for_failed_test_runs(failed_test_runs)
+        if self.prompt_packer:
+            source_file_numbered = self._get_packed_source(missed_lines)
+            test_code = self.prompt_packer.pack_test_file(self.test_code)
+            included_files = self.prompt_packer.pack_included_files(self.included_files)
+        else:
+            source_file_numbered = "\n".join(
+                f"{i + 1} {line}" for i, line in enumerate(self.source_code.split("\n"))
+            )
+            test_code = self.test_code
+            included_files = self.included_files
 
         max_tests_per_run = get_settings().get("default").get("max_tests_per_run", 4)
         response, prompt_token_count, response_token_count, self.prompt = (
@@ -188,15 +257,12 @@ class UnitTestGenerator:
                     self.source_file_path, self.project_root
                 ),
                 max_tests=max_tests_per_run,
-                source_file_numbered="\n".join(
-                    f"{i + 1} {line}"
-                    for i, line in enumerate(self.source_code.split("\n"))
-                ),
+                source_file_numbered=source_file_numbered,
                 code_coverage_report=code_coverage_report,
                 additional_instructions_text=self.additional_instructions,
-                additional_includes_section=self.included_files,
+                additional_includes_section=included_files,
                 language=language,
-                test_file=self.test_code,
+                test_file=test_code,
                 failed_tests_section=failed_test_runs_value,
                 test_file_name=os.path.relpath(self.test_file_path, self.project_root),
                 testing_framework=testing_framework,
@@ -205,6 +271,19 @@ class UnitTestGenerator:
 
         self.total_input_token_count += prompt_token_count
         self.total_output_token_count += response_token_count
+        return self.parse_tests_response(response)
+
+    def parse_tests_response(self, response: str):
+        """
+        Parse the YAML response of a test generation call.
+
+        Parameters:
+            response (str): The response of the AI model.
+
+        Returns:
+            dict: The generated tests, or an empty dictionary if the response holds no YAML object. If the
+                  response cannot be parsed, an empty list is returned.
+        """
         try:
             tests_dict = load_yaml(
                 response,
@@ -2,23 +2,47 @@ import datetime
 import json
 import logging
 import os
+import re
+import threading
 
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 from diff_cover.diff_cover_tool import main as diff_cover_main
 from wandb.sdk.data_types.trace_tree import Trace
 
 from coverage_ai.agent_completion_abc import AgentCompletionABC
+from coverage_ai.coverage_contexts import (
+    context_node_id,
+    lines_by_test,
+    load_line_contexts,
+    node_ids_match,
+)
 from coverage_ai.coverage_processor import CoverageProcessor
 from coverage_ai.custom_logger import CustomLogger
+from coverage_ai.failure_store import (
+    NO_COVERAGE_INCREASE_MESSAGE,
+    FailureStore,
+    error_signature,
+    trim_test_output,
+)
+from coverage_ai.file_coverage import FileCoverage, format_line_ranges
 from coverage_ai.file_preprocessor import FilePreprocessor
 from coverage_ai.runner import Runner
 from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.settings.config_schema import CoverageType
+from coverage_ai.test_selection import build_single_test_command, pytest_node_ids
 from coverage_ai.utils import load_yaml
+from coverage_ai.validation_sandbox import ValidationSandbox
 
 
 class UnitTestValidator:
+    TEST_FUNCTION_PATTERN = re.compile(
+        r"^(\s*(?:async\s+)?def\s+)(test\w*)(\s*\()", re.MULTILINE
+    )
+    REUSED_ANALYSIS_NOTE = "(Analysis of another generated test that failed with the same error)"
+    NO_COVERAGE_INCREASE_REASON = "Coverage did not increase. Maybe the test did run but did not increase coverage, or maybe the test execution was skipped due to some problem"
+
     def __init__(
         self,
         source_file_path: str,
@@ -112,11 +136,23 @@ class UnitTestValidator:
 
         # States to maintain within this class
         self.preprocessor = FilePreprocessor(self.test_file_path)
-        self.failed_test_runs = []
+        # Failed test runs fed into the next prompt, clustered by error signature
+        self.failed_test_runs = FailureStore(
+            cluster=get_settings().get("failed_test_history.cluster", True)
+        )
         self.total_input_token_count = 0
         self.total_output_token_count = 0
+        self._token_count_lock = threading.Lock()
+        # Error analyses by error signature, so that repeated errors are not analyzed again:
+        # {signature: (normalized code of the analyzed test, analysis)}
+        self.error_analyses = {}
+        # Failed test runs waiting for their error analysis, while a batch of tests is validated
+        self._pending_failures = None
         self.testing_framework = "Unknown"
         self.code_coverage_report = ""
+        # Line coverage (FileCoverage) of the source file, from the last accepted coverage report
+        self.baseline_line_coverage = None
+        self.last_line_coverage = None
 
         # Read self.source_file_path into a string
         with open(self.source_file_path, "r") as f:
@@ -320,6 +356,7 @@ class UnitTestValidator:
             )
             self.current_coverage = coverage
             self.last_coverage_percentages = coverage_percentages.copy()
+            self.baseline_line_coverage = self.last_line_coverage
             self.logger.info(
                 f"Initial coverage: {round(self.current_coverage * 100, 2)}%"
             )
@@ -369,6 +406,40 @@ class UnitTestValidator:
             return out_str.strip()
         return ""
 
+    def validate_tests(self, generated_tests: list) -> list:
+        """
+        Validate a batch of generated tests.
+
+        When batch validation is enabled in the settings (`[batch_validation]`), all candidates are inserted
+        at once and the test command runs a single time, with per-test coverage contexts. When parallel
+        validation is enabled (`[parallel_validation]`), every candidate is first run in its own sandbox
+        copy of the project, at the same time. Otherwise, each candidate is validated one after the other
+        with `validate_test`. The errors of the failed tests are analyzed after all the tests are validated.
+
+        Parameters:
+            generated_tests (list): The generated tests to validate, as returned by the test generator.
+
+        Returns:
+            list: One validation result dictionary per generated test, in the same order.
+        """
+        # The failed tests are analyzed together once every test is validated (see `_record_test_failures`)
+        self._pending_failures = []
+        try:
+            if self._can_validate_in_batch(generated_tests):
+                results = self._validate_tests_in_batch(generated_tests)
+            else:
+                results = self._validate_tests_individually(generated_tests)
+        finally:
+            pending_failures, self._pending_failures = self._pending_failures, None
+        self._record_test_failures(pending_failures)
+        return results
+
+    def _validate_tests_individually(self, generated_tests: list) -> list:
+        """Validate each generated test on its own, in parallel sandboxes when enabled."""
+        if self._can_validate_in_sandboxes(generated_tests):
+            return self._validate_tests_in_sandboxes(generated_tests)
+        return [self.validate_test(test) for test in generated_tests]
+
     def validate_test(self, generated_test: dict):
         """
         Validate a generated test by inserting it into the test file, running the test, and checking for pass/fail.
@@ -401,98 +472,30 @@ class UnitTestValidator:
             original_content = test_file.read()
 
         try:
-            # Step 0: no pre-process.
-            # We asked the model that each generated test should be a self-contained independent test
-            test_code = generated_test.get("test_code", "").rstrip()
-            additional_imports = generated_test.get("new_imports_code", "").strip()
-            if (
-                additional_imports
-                and additional_imports[0] == '"'
-                and additional_imports[-1] == '"'
-            ):
-                additional_imports = additional_imports.strip('"')
-
-            # check if additional_imports only contains '"':
-            if additional_imports and additional_imports == '""':
-                additional_imports = ""
-            relevant_line_number_to_insert_tests_after = (
-                self.relevant_line_number_to_insert_tests_after
-            )
-            relevant_line_number_to_insert_imports_after = (
-                self.relevant_line_number_to_insert_imports_after
-            )
-
-            needed_indent = self.test_headers_indentation
-            # remove initial indent of the test code, and insert the needed indent
-            test_code_indented = test_code
-            if needed_indent:
-                initial_indent = len(test_code) - len(test_code.lstrip())
-                delta_indent = int(needed_indent) - initial_indent
-                if delta_indent > 0:
-                    test_code_indented = "\n".join(
-                        [delta_indent * " " + line for line in test_code.split("\n")]
-                    )
-            test_code_indented = "\n" + test_code_indented.strip("\n") + "\n"
+            # Steps 0-5: build the test file content with the generated test and its imports inserted
+            processed_test, additional_imports_lines = self._build_processed_test(
+                generated_test,
+                original_content,
+                self.relevant_line_number_to_insert_tests_after,
+            )
             exit_code = 0
-            if test_code_indented and relevant_line_number_to_insert_tests_after:
-                # Step 1: Insert imports first, then insert the generated test code
-                additional_imports_lines = []
-                original_content_lines = original_content.split("\n")
-
-                # Build a deduplicated list of import lines
-                if additional_imports:
-                    raw_import_lines = additional_imports.split("\n")
-                    for line in raw_import_lines:
-                        # Only add if it's not already present (stripped match) in the file
-                        if line.strip() and all(
-                            line.strip() != existing.strip()
-                            for existing in original_content_lines
-                        ):
-                            additional_imports_lines.append(line)
-
-                inserted_lines_count = 0
-                if (
-                    relevant_line_number_to_insert_imports_after
-                    and additional_imports_lines
-                ):
-                    inserted_lines_count = len(additional_imports_lines)
-                    original_content_lines = (
-                        original_content_lines[
-                            :relevant_line_number_to_insert_imports_after
-                        ]
-                        + additional_imports_lines
-                        + original_content_lines[
-                            relevant_line_number_to_insert_imports_after:
-                        ]
-                    )
-
-                # Offset the test insertion point by however many lines we just inserted
-                updated_test_insertion_point = (
-                    relevant_line_number_to_insert_tests_after
-                )
-                if inserted_lines_count > 0:
-                    updated_test_insertion_point += inserted_lines_count
-
-                # Now insert the test code at 'updated_test_insertion_point'
-                test_code_lines = test_code_indented.split("\n")
-                processed_test_lines = (
-                    original_content_lines[:updated_test_insertion_point]
-                    + test_code_lines
-                    + original_content_lines[updated_test_insertion_point:]
-                )
-                processed_test = "\n".join(processed_test_lines)
+            if processed_test is not None:
                 with open(self.test_file_path, "w") as test_file:
                     test_file.write(processed_test)
                     test_file.flush()
 
-                # Step 2: Run the test using the Runner class
+                # Step 2: Run the test using the Runner class, only the new test if it can be selected
+                selected_test_command = self._build_selected_test_command(
+                    generated_test, processed_test
+                )
+                test_command = selected_test_command or self.test_command
                 for i in range(self.num_attempts):
                     self.logger.info(
-                        f'Running test with the following command: "{self.test_command}"'
+                        f'Running test with the following command: "{test_command}"'
                     )
                     stdout, stderr, exit_code, time_of_test_command = (
                         Runner.run_command(
-                            command=self.test_command,
+                            command=test_command,
                             cwd=self.test_command_dir,
                             max_run_time_sec=self.max_run_time_sec,
                         )
@@ -506,45 +509,29 @@ class UnitTestValidator:
                     with open(self.test_file_path, "w") as test_file:
                         test_file.write(original_content)
                     self.logger.info(f"Skipping a generated test that failed")
-                    fail_details = {
-                        "status": "FAIL",
-                        "reason": "Test failed",
-                        "exit_code": exit_code,
-                        "stderr": stderr,
-                        "stdout": stdout,
-                        "test": generated_test,
-                        "language": self.language,
-                        "source_file": self.source_code,
-                        "original_test_file": original_content,
-                        "processed_test_file": processed_test,
-                    }
-
-                    error_message = self.extract_error_message(fail_details)
-                    if error_message:
-                        logging.error(f"Error message summary:\n{error_message}")
-
-                    self.failed_test_runs.append(
-                        {"code": generated_test, "error_message": error_message}
-                    )  # Append failure details to the list
-
-                    if "WANDB_API_KEY" in os.environ:
-                        fail_details["error_message"] = error_message
-                        root_span = Trace(
-                            name="fail_details_"
-                            + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
-                            kind="llm",  # kind can be "llm", "chain", "agent" or "tool
-                            inputs={"test_code": fail_details["test"]},
-                            outputs=fail_details,
-                        )
-                        root_span.log(name="inference")
-
+                    fail_details = self._build_result(
+                        status="FAIL",
+                        reason="Test failed",
+                        exit_code=exit_code,
+                        stderr=stderr,
+                        stdout=stdout,
+                        generated_test=generated_test,
+                        original_content=original_content,
+                        processed_test=processed_test,
+                    )
+                    self._record_test_failure(fail_details)
                     return fail_details
 
                 # If test passed, check for coverage increase
                 try:
-                    new_percentage_covered, new_coverage_percentages = (
-                        self.post_process_coverage_report(time_of_test_command)
-                    )
+                    if selected_test_command:
+                        new_percentage_covered, new_coverage_percentages = (
+                            self._merge_selected_test_coverage(time_of_test_command)
+                        )
+                    else:
+                        new_percentage_covered, new_coverage_percentages = (
+                            self.post_process_coverage_report(time_of_test_command)
+                        )
 
                     if new_percentage_covered <= self.current_coverage:
                         # Coverage has not increased, rollback the test by removing it from the test file
@@ -554,35 +541,17 @@ class UnitTestValidator:
                         self.logger.info(
                             "Test did not increase coverage. Rolling back."
                         )
-                        fail_details = {
-                            "status": "FAIL",
-                            "reason": "Coverage did not increase. Maybe the test did run but did not increase coverage, or maybe the test execution was skipped due to some problem",
-                            "exit_code": exit_code,
-                            "stderr": stderr,
-                            "stdout": stdout,
-                            "test": generated_test,
-                            "language": self.language,
-                            "source_file": self.source_code,
-                            "original_test_file": original_content,
-                            "processed_test_file": processed_test,
-                        }
-                        self.failed_test_runs.append(
-                            {
-                                "code": fail_details["test"],
-                                "error_message": "Test did not increase code coverage",
-                            }
-                        )  # Append failure details to the list
-
-                        if "WANDB_API_KEY" in os.environ:
-                            root_span = Trace(
-                                name="fail_details_"
-                                + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
-                                kind="llm",  # kind can be "llm", "chain", "agent" or "tool
-                                inputs={"test_code": fail_details["test"]},
-                                outputs=fail_details,
-                            )
-                            root_span.log(name="inference")
-
+                        fail_details = self._build_result(
+                            status="FAIL",
+                            reason=self.NO_COVERAGE_INCREASE_REASON,
+                            exit_code=exit_code,
+                            stderr=stderr,
+                            stdout=stdout,
+                            generated_test=generated_test,
+                            original_content=original_content,
+                            processed_test=processed_test,
+                        )
+                        self._record_no_coverage_increase(fail_details)
                         return fail_details
                 except Exception as e:
                     # Handle errors gracefully
@@ -592,18 +561,16 @@ class UnitTestValidator:
                         test_file.write(original_content)
                         test_file.flush()
 
-                    fail_details = {
-                        "status": "FAIL",
-                        "reason": "Runtime error",
-                        "exit_code": exit_code,
-                        "stderr": stderr,
-                        "stdout": stdout,
-                        "test": generated_test,
-                        "language": self.language,
-                        "source_file": self.source_code,
-                        "original_test_file": original_content,
-                        "processed_test_file": processed_test,
-                    }
+                    fail_details = self._build_result(
+                        status="FAIL",
+                        reason="Runtime error",
+                        exit_code=exit_code,
+                        stderr=stderr,
+                        stdout=stdout,
+                        generated_test=generated_test,
+                        original_content=original_content,
+                        processed_test=processed_test,
+                    )
                     self.failed_test_runs.append(
                         {
                             "code": fail_details["test"],
@@ -618,40 +585,26 @@ class UnitTestValidator:
                     additional_imports_lines
                 )  # this is important, otherwise the next test will be inserted at the wrong line
 
-                for key in new_coverage_percentages:
-                    if (
-                        new_coverage_percentages[key]
-                        > self.last_coverage_percentages[key]
-                        and key == self.source_file_path.split("/")[-1]
-                    ):
-                        self.logger.info(
-                            f"Coverage for provided source file: {key} increased from {round(self.last_coverage_percentages[key] * 100, 2)} to {round(new_coverage_percentages[key] * 100, 2)}"
-                        )
-                    elif (
-                        new_coverage_percentages[key]
-                        > self.last_coverage_percentages[key]
-                    ):
-                        self.logger.info(
-                            f"Coverage for non-source file: {key} increased from {round(self.last_coverage_percentages[key] * 100, 2)} to {round(new_coverage_percentages[key] * 100, 2)}"
-                        )
+                self._log_coverage_increase(new_coverage_percentages)
+                newly_covered_lines = self._newly_covered_lines()
                 self.current_coverage = new_percentage_covered
                 self.last_coverage_percentages = new_coverage_percentages.copy()
+                self.baseline_line_coverage = self.last_line_coverage
 
                 self.logger.info(
                     f"Test passed and coverage increased. Current coverage: {round(new_percentage_covered * 100, 2)}%"
                 )
-                return {
-                    "status": "PASS",
-                    "reason": "",
-                    "exit_code": exit_code,
-                    "stderr": stderr,
-                    "stdout": stdout,
-                    "test": generated_test,
-                    "language": self.language,
-                    "source_file": self.source_code,
-                    "original_test_file": original_content,
-                    "processed_test_file": processed_test,
-                }
+                return self._build_result(
+                    status="PASS",
+                    reason="",
+                    exit_code=exit_code,
+                    stderr=stderr,
+                    stdout=stdout,
+                    generated_test=generated_test,
+                    original_content=original_content,
+                    processed_test=processed_test,
+                    newly_covered_lines=newly_covered_lines,
+                )
         except Exception as e:
             self.logger.error(f"Error validating test: {e}")
             return {
@@ -665,8 +618,967 @@ class UnitTestValidator:
                 "source_file": self.source_code,
                 "original_test_file": original_content,
                 "processed_test_file": "N/A",
+                "newly_covered_lines": [],
             }
 
+    def _build_processed_test(
+        self,
+        generated_test: dict,
+        original_content: str,
+        relevant_line_number_to_insert_tests_after: Optional[int],
+    ) -> Tuple[Optional[str], list]:
+        """
+        Insert a generated test, and the imports it needs, into the content of the test file.
+
+        Parameters:
+            generated_test (dict): The generated test, containing test code and additional imports.
+            original_content (str): The content of the test file to insert the test into.
+            relevant_line_number_to_insert_tests_after (int): The line after which the test code is inserted.
+
+        Returns:
+            tuple: The processed test file content (None if the test cannot be inserted), and the list of
+                   import lines that were added to it.
+        """
+        # We asked the model that each generated test should be a self-contained independent test
+        test_code = generated_test.get("test_code", "").rstrip()
+        additional_imports = generated_test.get("new_imports_code", "").strip()
+        if (
+            additional_imports
+            and additional_imports[0] == '"'
+            and additional_imports[-1] == '"'
+        ):
+            additional_imports = additional_imports.strip('"')
+
+        # check if additional_imports only contains '"':
+        if additional_imports and additional_imports == '""':
+            additional_imports = ""
+        relevant_line_number_to_insert_imports_after = (
+            self.relevant_line_number_to_insert_imports_after
+        )
+
+        needed_indent = self.test_headers_indentation
+        # remove initial indent of the test code, and insert the needed indent
+        test_code_indented = test_code
+        if needed_indent:
+            initial_indent = len(test_code) - len(test_code.lstrip())
+            delta_indent = int(needed_indent) - initial_indent
+            if delta_indent > 0:
+                test_code_indented = "\n".join(
+                    [delta_indent * " " + line for line in test_code.split("\n")]
+                )
+        test_code_indented = "\n" + test_code_indented.strip("\n") + "\n"
+        if not (test_code_indented and relevant_line_number_to_insert_tests_after):
+            return None, []
+
+        # Insert imports first, then insert the generated test code
+        additional_imports_lines = []
+        original_content_lines = original_content.split("\n")
+
+        # Build a deduplicated list of import lines
+        if additional_imports:
+            raw_import_lines = additional_imports.split("\n")
+            for line in raw_import_lines:
+                # Only add if it's not already present (stripped match) in the file
+                if line.strip() and all(
+                    line.strip() != existing.strip() for existing in original_content_lines
+                ):
+                    additional_imports_lines.append(line)
+
+        inserted_lines_count = 0
+        if relevant_line_number_to_insert_imports_after and additional_imports_lines:
+            inserted_lines_count = len(additional_imports_lines)
+            original_content_lines = (
+                original_content_lines[:relevant_line_number_to_insert_imports_after]
+                + additional_imports_lines
+                + original_content_lines[relevant_line_number_to_insert_imports_after:]
+            )
+
+        # Offset the test insertion point by however many lines we just inserted
+        updated_test_insertion_point = relevant_line_number_to_insert_tests_after
+        if inserted_lines_count > 0:
+            updated_test_insertion_point += inserted_lines_count
+
+        # Now insert the test code at 'updated_test_insertion_point'
+        test_code_lines = test_code_indented.split("\n")
+        processed_test_lines = (
+            original_content_lines[:updated_test_insertion_point]
+            + test_code_lines
+            + original_content_lines[updated_test_insertion_point:]
+        )
+        return "\n".join(processed_test_lines), additional_imports_lines
+
+    def _build_result(
+        self,
+        status: str,
+        reason: str,
+        exit_code: Optional[int],
+        stderr: str,
+        stdout: str,
+        generated_test: dict,
+        original_content: str,
+        processed_test: str,
+        newly_covered_lines: Optional[List[int]] = None,
+    ) -> dict:
+        """
+        Build the validation result dictionary that is returned for every validated test. For accepted
+        tests, `newly_covered_lines` holds the source file lines that the test covered for the first time.
+        """
+        return {
+            "status": status,
+            "reason": reason,
+            "exit_code": exit_code,
+            "stderr": stderr,
+            "stdout": stdout,
+            "test": generated_test,
+            "language": self.language,
+            "source_file": self.source_code,
+            "original_test_file": original_content,
+            "processed_test_file": processed_test,
+            "newly_covered_lines": newly_covered_lines or [],
+        }
+
+    def _newly_covered_lines(self) -> List[int]:
+        """
+        Return the source file lines covered by the last coverage report that the last accepted coverage
+        report did not cover. Empty when line coverage is not known (e.g. report coverage feature flag).
+        """
+        if (
+            self.last_line_coverage is None
+            or self.baseline_line_coverage is None
+            or not self.last_line_coverage.has_lines
+        ):
+            return []
+        return self.last_line_coverage.newly_covered(
+            self.baseline_line_coverage
+        ).covered_lines
+
+    def _record_test_failure(self, fail_details: dict):
+        """
+        Analyze a failed test run and keep it in the failed test runs, so it is fed into the next prompt.
+        While `validate_tests` runs, the failed test run is queued and analyzed with the others at the end.
+
+        Parameters:
+            fail_details (dict): The validation result of the failed test.
+        """
+        if self._pending_failures is not None:
+            self._pending_failures.append(fail_details)
+        else:
+            self._record_test_failures([fail_details])
+
+    def _record_test_failures(self, failures: List[dict]):
+        """
+        Analyze failed test runs and keep them in the failed test runs, so they are fed into the next prompt.
+
+        Parameters:
+            failures (List[dict]): The validation results of the failed tests.
+        """
+        if not failures:
+            return
+        error_messages = self._analyze_test_failures(failures)
+        for fail_details, error_message in zip(failures, error_messages):
+            if error_message:
+                logging.error(f"Error message summary:\n{error_message}")
+
+            self.failed_test_runs.append(
+                {"code": fail_details["test"], "error_message": error_message},
+                error_output=self._get_test_output(fail_details),
+            )  # Append failure details to the list
+
+            if "WANDB_API_KEY" in os.environ:
+                fail_details["error_message"] = error_message
+                root_span = Trace(
+                    name="fail_details_"
+                    + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+                    kind="llm",  # kind can be "llm", "chain", "agent" or "tool
+                    inputs={"test_code": fail_details["test"]},
+                    outputs=fail_details,
+                )
+                root_span.log(name="inference")
+
+    def _analyze_test_failures(self, failures: List[dict]) -> List[str]:
+        """
+        Return the error analysis of each failed test run. Errors with the signature of an error analyzed
+        before are not analyzed again, and the other errors are analyzed concurrently
+        (`failure_analysis.max_workers` at a time). An analysis reused for another test than the one it
+        was made for is prefixed with `REUSED_ANALYSIS_NOTE`, since it may name the other test's code.
+
+        Parameters:
+            failures (List[dict]): The validation results of the failed tests.
+
+        Returns:
+            List[str]: The error analysis of each failed test run, in the same order.
+        """
+        signatures = [
+            error_signature("", self._get_test_output(fail_details))
+            for fail_details in failures
+        ]
+        test_codes = [
+            " ".join(fail_details["test"].get("test_code", "").split())
+            for fail_details in failures
+        ]
+        failures_to_analyze = {}
+        for signature, test_code, fail_details in zip(signatures, test_codes, failures):
+            if signature not in self.error_analyses:
+                failures_to_analyze.setdefault(signature, (test_code, fail_details))
+        skipped_count = len(failures) - len(failures_to_analyze)
+        if skipped_count:
+            self.logger.info(
+                f"Skipping the error analysis of {skipped_count} failed tests with a repeated error"
+            )
+
+        max_workers = min(
+            get_settings().get("failure_analysis.max_workers", 4),
+            len(failures_to_analyze),
+        )
+        to_analyze = [fail_details for _, fail_details in failures_to_analyze.values()]
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                analyses = list(executor.map(self.extract_error_message, to_analyze))
+        else:
+            analyses = [self.extract_error_message(fail_details) for fail_details in to_analyze]
+        new_analyses = {
+            signature: (test_code, analysis)
+            for (signature, (test_code, _)), analysis in zip(
+                failures_to_analyze.items(), analyses
+            )
+        }
+        # Failed analyses (empty strings) are not kept, so they are tried again for the next repeat
+        self.error_analyses.update(
+            {signature: entry for signature, entry in new_analyses.items() if entry[1]}
+        )
+
+        error_messages = []
+        for signature, test_code in zip(signatures, test_codes):
+            analyzed_code, analysis = new_analyses.get(
+                signature, self.error_analyses.get(signature, ("", ""))
+            )
+            if analysis and analyzed_code != test_code:
+                analysis = f"{self.REUSED_ANALYSIS_NOTE}\n{analysis}"
+            error_messages.append(analysis)
+        return error_messages
+
+    @staticmethod
+    def _get_test_output(fail_details: dict) -> str:
+        """Return the stdout and stderr of a failed test run."""
+        return f"{fail_details.get('stdout') or ''}\n{fail_details.get('stderr') or ''}"
+
+    def _record_no_coverage_increase(self, fail_details: dict):
+        """
+        Keep a passing test that did not increase coverage in the failed test runs.
+
+        Parameters:
+            fail_details (dict): The validation result of the test.
+        """
+        self.failed_test_runs.append(
+            {
+                "code": fail_details["test"],
+                "error_message": NO_COVERAGE_INCREASE_MESSAGE,
+            }
+        )  # Append failure details to the list
+
+        if "WANDB_API_KEY" in os.environ:
+            root_span = Trace(
+                name="fail_details_"
+                + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S"),
+                kind="llm",  # kind can be "llm", "chain", "agent" or "tool
+                inputs={"test_code": fail_details["test"]},
+                outputs=fail_details,
+            )
+            root_span.log(name="inference")
+
+    def _log_coverage_increase(self, new_coverage_percentages: dict):
+        """Log the per-file coverage increases of an accepted test."""
+        for key in new_coverage_percentages:
+            last_percentage = self.last_coverage_percentages.get(key, 0.0)
+            if (
+                new_coverage_percentages[key] > last_percentage
+                and key == self.source_file_path.split("/")[-1]
+            ):
+                self.logger.info(
+                    f"Coverage for provided source file: {key} increased from {round(last_percentage * 100, 2)} to {round(new_coverage_percentages[key] * 100, 2)}"
+                )
+            elif new_coverage_percentages[key] > last_percentage:
+                self.logger.info(
+                    f"Coverage for non-source file: {key} increased from {round(last_percentage * 100, 2)} to {round(new_coverage_percentages[key] * 100, 2)}"
+                )
+
+    def _get_sandbox_root(self) -> str:
+        """Return the directory that is mirrored into validation sandboxes."""
+        return os.path.abspath(self.project_root or self.test_command_dir)
+
+    def _can_validate_in_sandboxes(self, generated_tests: list) -> bool:
+        """
+        Check whether a batch of generated tests can be validated in parallel sandboxes.
+
+        Parallel validation needs more than one candidate, must be enabled in the settings, is not
+        supported with diff coverage (which compares git branches), and requires the test file, the
+        coverage report and the test command directory to live inside the mirrored project root.
+        """
+        if len(generated_tests) < 2 or self.diff_coverage:
+            return False
+        if not get_settings().get("parallel_validation.enabled", False):
+            return False
+
+        sandbox_root = self._get_sandbox_root()
+        for path in (
+            self.test_file_path,
+            self.code_coverage_report_path,
+            self.test_command_dir,
+        ):
+            path = os.path.abspath(path)
+            if os.path.commonpath([sandbox_root, path]) != sandbox_root:
+                self.logger.warning(
+                    f"Parallel validation disabled: {path} is outside of {sandbox_root}"
+                )
+                return False
+        return True
+
+    def _validate_tests_in_sandboxes(self, generated_tests: list) -> list:
+        """
+        Validate several generated tests at the same time, each one in its own sandbox copy of the project.
+
+        Steps:
+            1. Insert each candidate into its own copy of the test file and run the test command in a sandbox.
+            2. Record candidates that failed, or that passed without increasing coverage, as failures.
+            3. Insert all remaining candidates into the real test file at once and run the test command
+               a single time to confirm that they pass together and increase coverage.
+            4. If that combined run fails, fall back to validating the remaining candidates one by one.
+
+        Parameters:
+            generated_tests (list): The generated tests to validate.
+
+        Returns:
+            list: One validation result dictionary per generated test, in the same order.
+        """
+        with open(self.test_file_path, "r") as test_file:
+            original_content = test_file.read()
+
+        results = [None] * len(generated_tests)
+        candidates = []
+        for index, generated_test in enumerate(generated_tests):
+            processed_test, _ = self._build_processed_test(
+                generated_test,
+                original_content,
+                self.relevant_line_number_to_insert_tests_after,
+            )
+            if processed_test is not None:
+                candidates.append((index, generated_test, processed_test))
+
+        max_workers = get_settings().get("parallel_validation.max_workers", 4)
+        self.logger.info(
+            f"Validating {len(candidates)} generated tests in parallel sandboxes (max workers: {max_workers})"
+        )
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda candidate: self._run_candidate_in_sandbox(
+                        candidate[1], candidate[2]
+                    ),
+                    candidates,
+                )
+            )
+
+        winners = []
+        for (index, generated_test, processed_test), outcome in zip(
+            candidates, outcomes
+        ):
+            if outcome["exit_code"] != 0:
+                self.logger.info(f"Skipping a generated test that failed")
+                results[index] = self._build_result(
+                    status="FAIL",
+                    reason="Test failed",
+                    exit_code=outcome["exit_code"],
+                    stderr=outcome["stderr"],
+                    stdout=outcome["stdout"],
+                    generated_test=generated_test,
+                    original_content=original_content,
+                    processed_test=processed_test,
+                )
+                self._record_test_failure(results[index])
+            elif outcome["error"]:
+                self.logger.error(
+                    f"Error during coverage verification: {outcome['error']}"
+                )
+                results[index] = self._build_result(
+                    status="FAIL",
+                    reason="Runtime error",
+                    exit_code=outcome["exit_code"],
+                    stderr=outcome["stderr"],
+                    stdout=outcome["stdout"],
+                    generated_test=generated_test,
+                    original_content=original_content,
+                    processed_test=processed_test,
+                )
+                self.failed_test_runs.append(
+                    {
+                        "code": generated_test,
+                        "error_message": "Coverage verification error",
+                    }
+                )
+            elif outcome["percentage_covered"] <= self.current_coverage:
+                self.logger.info("Test did not increase coverage. Rolling back.")
+                results[index] = self._build_result(
+                    status="FAIL",
+                    reason=self.NO_COVERAGE_INCREASE_REASON,
+                    exit_code=outcome["exit_code"],
+                    stderr=outcome["stderr"],
+                    stdout=outcome["stdout"],
+                    generated_test=generated_test,
+                    original_content=original_content,
+                    processed_test=processed_test,
+                )
+                self._record_no_coverage_increase(results[index])
+            else:
+                winners.append((index, generated_test, outcome))
+
+        if winners:
+            merged_results = self._merge_and_run_tests(
+                [generated_test for _, generated_test, _ in winners],
+                original_content,
+                [outcome["newly_covered_lines"] for _, _, outcome in winners],
+            )
+            for (index, _, _), result in zip(winners, merged_results):
+                results[index] = result
+
+        return results
+
+    def _get_sandbox_copy_mode(self) -> str:
+        """
+        Return the copy mode of the validation sandboxes. Hard links are only used for Python projects:
+        the build outputs of other toolchains (e.g. Go caches, JaCoCo execution data) may be rewritten in
+        place, which would modify the files of the real project through the links.
+        """
+        copy_mode = get_settings().get("parallel_validation.copy_mode", "copy")
+        if copy_mode == "hardlink" and self.language != "python":
+            self.logger.info(
+                f"Using copy mode instead of hardlink mode for the {self.language} validation sandboxes"
+            )
+            return "copy"
+        return copy_mode
+
+    def _run_candidate_in_sandbox(self, generated_test: dict, processed_test: str) -> dict:
+        """
+        Run the test command for one candidate test inside a fresh sandbox copy of the project.
+
+        Parameters:
+            generated_test (dict): The generated test.
+            processed_test (str): The test file content with the generated test inserted.
+
+        Returns:
+            dict: The exit code, stdout and stderr of the test run, the resulting coverage percentages,
+                  the source file lines it newly covers, and an error message if the coverage report
+                  could not be processed.
+        """
+        sandbox = ValidationSandbox(
+            root_dir=self._get_sandbox_root(),
+            writable_paths=[
+                self.test_file_path,
+                self.code_coverage_report_path,
+                os.path.join(
+                    self.test_command_dir,
+                    get_settings().get("batch_validation.coverage_data_file", ".coverage"),
+                ),
+            ],
+            copy_mode=self._get_sandbox_copy_mode(),
+            ignore_patterns=get_settings().get(
+                "parallel_validation.ignore_patterns", [".git"]
+            ),
+            copy_patterns=get_settings().get(
+                "parallel_validation.hardlink_copy_patterns",
+                ValidationSandbox.DEFAULT_COPY_PATTERNS,
+            ),
+            logger=self.logger,
+        )
+        outcome = {
+            "exit_code": None,
+            "stdout": "",
+            "stderr": "",
+            "percentage_covered": 0,
+            "coverage_percentages": {},
+            "newly_covered_lines": [],
+            "error": "",
+        }
+        try:
+            with sandbox:
+                with open(sandbox.map_path(self.test_file_path), "w") as test_file:
+                    test_file.write(processed_test)
+
+                command = sandbox.map_command(self.test_command)
+                for i in range(self.num_attempts):
+                    stdout, stderr, exit_code, time_of_test_command = (
+                        Runner.run_command(
+                            command=command,
+                            cwd=sandbox.map_path(self.test_command_dir),
+                            max_run_time_sec=self.max_run_time_sec,
+                        )
+                    )
+                    if exit_code != 0:
+                        break
+                outcome.update(exit_code=exit_code, stdout=stdout, stderr=stderr)
+
+                if exit_code == 0:
+                    coverage_processor = CoverageProcessor(
+                        file_path=sandbox.map_path(self.code_coverage_report_path),
+                        src_file_path=self.source_file_path,
+                        coverage_type=self.coverage_type,
+                        use_report_coverage_feature_flag=self.use_report_coverage_feature_flag,
+                        diff_coverage_report_path=self.diff_cover_report_path,
+                        logger=self.logger,
+                    )
+                    percentage_covered, coverage_percentages, _, line_coverage = (
+                        self._evaluate_coverage_report(
+                            coverage_processor, time_of_test_command
+                        )
+                    )
+                    outcome.update(
+                        percentage_covered=percentage_covered,
+                        coverage_percentages=coverage_percentages,
+                    )
+                    if line_coverage is not None and self.baseline_line_coverage is not None:
+                        outcome["newly_covered_lines"] = line_coverage.newly_covered(
+                            self.baseline_line_coverage
+                        ).covered_lines
+        except Exception as e:
+            self.logger.error(
+                f"Error validating test {generated_test.get('test_name', '')} in sandbox: {e}"
+            )
+            outcome["error"] = str(e)
+        return outcome
+
+    def _insert_tests(self, generated_tests: list, original_content: str) -> Tuple[str, int]:
+        """
+        Insert several generated tests, one after the other, into the content of the test file.
+
+        Parameters:
+            generated_tests (list): The generated tests to insert.
+            original_content (str): The content of the test file.
+
+        Returns:
+            tuple: The test file content with all the tests inserted, and the line after which the next
+                   test should be inserted.
+        """
+        merged_content = original_content
+        insert_tests_after = self.relevant_line_number_to_insert_tests_after
+        for generated_test in generated_tests:
+            merged_content, additional_imports_lines = self._build_processed_test(
+                generated_test, merged_content, insert_tests_after
+            )
+            insert_tests_after += len(additional_imports_lines)
+        return merged_content, insert_tests_after
+
+    def _can_validate_in_batch(self, generated_tests: list) -> bool:
+        """
+        Check whether a batch of generated tests can be validated with a single test run.
+
+        Batch validation relies on the per-test coverage contexts of pytest-cov, so it is limited to
+        Python projects whose test command runs pytest with coverage. It is not supported with diff
+        coverage, and every generated test needs to define at least one test function.
+        """
+        if len(generated_tests) < 2 or self.diff_coverage:
+            return False
+        if not get_settings().get("batch_validation.enabled", False):
+            return False
+        if (
+            self.language != "python"
+            or "pytest" not in self.test_command
+            or "--cov" not in self.test_command
+        ):
+            self.logger.warning(
+                "Batch validation disabled: it requires a Python test command that runs pytest with --cov"
+            )
+            return False
+        if self.relevant_line_number_to_insert_tests_after is None:
+            return False
+        return all(
+            self.TEST_FUNCTION_PATTERN.search(test.get("test_code", ""))
+            for test in generated_tests
+        )
+
+    def _rename_duplicate_tests(
+        self, generated_tests: list, original_content: str
+    ) -> Tuple[list, list]:
+        """
+        Give every test function of the generated tests a name that is unique within the test file.
+
+        Parameters:
+            generated_tests (list): The generated tests.
+            original_content (str): The content of the test file.
+
+        Returns:
+            tuple: A copy of the generated tests with unique test function names, and for each of them
+                   the list of its test function names.
+        """
+        taken_names = {
+            match.group(2)
+            for match in self.TEST_FUNCTION_PATTERN.finditer(original_content)
+        }
+        renamed_tests = []
+        test_names = []
+        for generated_test in generated_tests:
+            names = []
+
+            def rename(match):
+                name = unique_name = match.group(2)
+                suffix = 2
+                while unique_name in taken_names:
+                    unique_name = f"{name}_{suffix}"
+                    suffix += 1
+                taken_names.add(unique_name)
+                names.append(unique_name)
+                return match.group(1) + unique_name + match.group(3)
+
+            test_code = self.TEST_FUNCTION_PATTERN.sub(
+                rename, generated_test.get("test_code", "")
+            )
+            renamed_tests.append({**generated_test, "test_code": test_code})
+            test_names.append(names)
+        return renamed_tests, test_names
+
+    def _validate_tests_in_batch(self, generated_tests: list) -> list:
+        """
+        Validate several generated tests with a single run of the test command.
+
+        Steps:
+            1. Give every generated test function a unique name and insert all of them into the test file.
+            2. Run the test command once, recording per-test coverage contexts (`--cov-context=test`).
+            3. Prune the tests that failed, using the failures listed in the pytest summary.
+            4. Using the coverage contexts, keep only the tests that cover lines that neither the
+               existing tests nor the previously kept generated tests cover.
+            5. If tests were pruned, rewrite the test file with the kept tests only and run the test
+               command once more to refresh the coverage report.
+
+        If the run cannot be attributed to individual tests (e.g. a collection error, or a missing
+        coverage data file), the tests are validated individually instead.
+
+        Parameters:
+            generated_tests (list): The generated tests to validate.
+
+        Returns:
+            list: One validation result dictionary per generated test, in the same order.
+        """
+        with open(self.test_file_path, "r") as test_file:
+            original_content = test_file.read()
+
+        renamed_tests, test_names = self._rename_duplicate_tests(
+            generated_tests, original_content
+        )
+        merged_content, insert_tests_after = self._insert_tests(
+            renamed_tests, original_content
+        )
+        with open(self.test_file_path, "w") as test_file:
+            test_file.write(merged_content)
+            test_file.flush()
+
+        context_option = get_settings().get(
+            "batch_validation.context_option", "--cov-context=test"
+        )
+        command = self.test_command
+        if "--cov-context" not in command:
+            command = f"{command} {context_option}"
+        self.logger.info(
+            f'Validating {len(generated_tests)} generated tests in a single run: "{command}"'
+        )
+        for i in range(self.num_attempts):
+            stdout, stderr, exit_code, time_of_test_command = Runner.run_command(
+                command=command,
+                cwd=self.test_command_dir,
+                max_run_time_sec=self.max_run_time_sec,
+            )
+            if exit_code != 0:
+                break
+
+        # Contexts and failures are attributed to the generated tests by node id, so that a test of
+        # another class or file with the same function name is not mistaken for a generated test
+        test_node_ids = self._generated_test_node_ids(merged_content, test_names)
+        failed_node_ids = {
+            context_node_id(node_id)
+            for node_id in re.findall(r"^(?:FAILED|ERROR) (\S+)", stdout, re.MULTILINE)
+        }
+        failed = [
+            any(
+                node_ids_match(failed_node_id, node_id)
+                for failed_node_id in failed_node_ids
+                for node_id in node_ids
+            )
+            for node_ids in test_node_ids
+        ]
+        lines_per_test = None
+        if exit_code == 0 or any(failed):
+            lines_per_test = self._load_lines_per_test(time_of_test_command)
+        if lines_per_test is None:
+            self.logger.info(
+                "Could not attribute the batch run to individual tests. Validating them one by one."
+            )
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+                test_file.flush()
+            return self._validate_tests_individually(generated_tests)
+
+        lines_per_generated_test = [set() for _ in generated_tests]
+        accepted_lines = set()
+        for context, lines in lines_per_test.items():
+            matches = [
+                index
+                for index, node_ids in enumerate(test_node_ids)
+                if any(node_ids_match(context, node_id) for node_id in node_ids)
+            ]
+            for index in matches:
+                lines_per_generated_test[index].update(lines)
+            if not matches:
+                accepted_lines.update(lines)
+
+        results = [None] * len(generated_tests)
+        kept = []
+        kept_new_lines = []
+        for index, (renamed_test, names) in enumerate(zip(renamed_tests, test_names)):
+            if failed[index]:
+                self.logger.info(f"Skipping a generated test that failed")
+                results[index] = self._build_result(
+                    status="FAIL",
+                    reason="Test failed",
+                    exit_code=exit_code,
+                    stderr=stderr,
+                    stdout=stdout,
+                    generated_test=renamed_test,
+                    original_content=original_content,
+                    processed_test=merged_content,
+                )
+                self._record_test_failure(results[index])
+                continue
+
+            new_lines = lines_per_generated_test[index] - accepted_lines
+            if not new_lines:
+                self.logger.info("Test did not increase coverage. Rolling back.")
+                results[index] = self._build_result(
+                    status="FAIL",
+                    reason=self.NO_COVERAGE_INCREASE_REASON,
+                    exit_code=0,
+                    stderr=stderr,
+                    stdout=stdout,
+                    generated_test=renamed_test,
+                    original_content=original_content,
+                    processed_test=merged_content,
+                )
+                self._record_no_coverage_increase(results[index])
+                continue
+
+            self.logger.info(
+                f"Test {', '.join(names)} covers {len(new_lines)} new lines"
+            )
+            accepted_lines.update(new_lines)
+            kept.append(index)
+            kept_new_lines.append(
+                []
+                if self.use_report_coverage_feature_flag
+                else sorted(line for _, line in new_lines)
+            )
+
+        if not kept:
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+                test_file.flush()
+            return results
+
+        kept_tests = [renamed_tests[index] for index in kept]
+        if len(kept) < len(generated_tests):
+            merged_results = self._merge_and_run_tests(
+                kept_tests, original_content, kept_new_lines
+            )
+        else:
+            merged_results = self._accept_merged_tests(
+                kept_tests,
+                original_content,
+                merged_content,
+                insert_tests_after,
+                (stdout, stderr, exit_code, time_of_test_command),
+                kept_new_lines,
+            )
+        for index, result in zip(kept, merged_results):
+            results[index] = result
+        return results
+
+    def _generated_test_node_ids(self, test_file_content: str, test_names: list) -> list:
+        """
+        Build the pytest node ids of the test functions of every generated test, relative to the
+        directory the test command runs in.
+
+        Parameters:
+            test_file_content (str): The content of the test file, with the generated tests inserted.
+            test_names (list): For each generated test, the list of its test function names.
+
+        Returns:
+            list: For each generated test, the list of its node ids.
+        """
+        relative_path = os.path.relpath(self.test_file_path, self.test_command_dir)
+        return [
+            pytest_node_ids(test_file_content, relative_path, names)
+            for names in test_names
+        ]
+
+    def _load_lines_per_test(self, time_of_test_command: int) -> Optional[dict]:
+        """
+        Load the lines covered by every test function from the coverage data file of the last test run.
+
+        Parameters:
+            time_of_test_command (int): The time the test command was run, in milliseconds.
+
+        Returns:
+            dict: Mapping of test node id -> set of (file path, line number), restricted to the
+                  source file (or to all measured files when the report coverage feature flag is set).
+                  None if the data file is missing, stale or unreadable.
+        """
+        data_file = os.path.join(
+            self.test_command_dir,
+            get_settings().get("batch_validation.coverage_data_file", ".coverage"),
+        )
+        try:
+            if os.path.getmtime(data_file) * 1000 < time_of_test_command:
+                self.logger.warning(f"Coverage data file {data_file} was not updated")
+                return None
+            line_contexts = load_line_contexts(data_file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Could not read coverage contexts: {e}")
+            return None
+
+        if self.use_report_coverage_feature_flag:
+            file_paths = list(line_contexts)
+        else:
+            source_file_path = os.path.abspath(self.source_file_path)
+            file_paths = [
+                path
+                for path in line_contexts
+                if os.path.abspath(os.path.join(self.test_command_dir, path))
+                == source_file_path
+            ]
+        return lines_by_test(line_contexts, file_paths)
+
+    def _merge_and_run_tests(
+        self,
+        generated_tests: list,
+        original_content: str,
+        newly_covered_lines: Optional[list] = None,
+    ) -> list:
+        """
+        Insert several tests that each increased coverage on their own into the real test file, and
+        confirm the result with a single run of the test command.
+
+        Parameters:
+            generated_tests (list): The generated tests to insert together.
+            original_content (str): The content of the test file before any of the tests were inserted.
+            newly_covered_lines (list, optional): For each test, the source file lines it newly covered
+                                                  on its own.
+
+        Returns:
+            list: The validation result dictionaries of the given tests.
+        """
+        merged_content, insert_tests_after = self._insert_tests(
+            generated_tests, original_content
+        )
+        with open(self.test_file_path, "w") as test_file:
+            test_file.write(merged_content)
+            test_file.flush()
+
+        for i in range(self.num_attempts):
+            self.logger.info(
+                f'Running merged tests with the following command: "{self.test_command}"'
+            )
+            stdout, stderr, exit_code, time_of_test_command = Runner.run_command(
+                command=self.test_command,
+                cwd=self.test_command_dir,
+                max_run_time_sec=self.max_run_time_sec,
+            )
+            if exit_code != 0:
+                break
+
+        return self._accept_merged_tests(
+            generated_tests,
+            original_content,
+            merged_content,
+            insert_tests_after,
+            (stdout, stderr, exit_code, time_of_test_command),
+            newly_covered_lines,
+        )
+
+    def _accept_merged_tests(
+        self,
+        generated_tests: list,
+        original_content: str,
+        merged_content: str,
+        insert_tests_after: int,
+        run_result: tuple,
+        newly_covered_lines: Optional[list] = None,
+    ) -> list:
+        """
+        Accept several tests that were inserted into the test file together, if their combined run
+        passed and increased coverage.
+
+        Parameters:
+            generated_tests (list): The generated tests in the test file.
+            original_content (str): The content of the test file before any of the tests were inserted.
+            merged_content (str): The current content of the test file.
+            insert_tests_after (int): The line after which the next test should be inserted, once these
+                                      tests are accepted.
+            run_result (tuple): The stdout, stderr, exit code and time of the combined test run.
+            newly_covered_lines (list, optional): For each test, the source file lines it newly covered
+                                                  on its own. Defaults to the lines newly covered by the
+                                                  combined run, for a single test.
+
+        Returns:
+            list: The validation result dictionaries of the given tests. If the combined run failed or
+                  did not increase coverage, the tests are validated one by one instead.
+        """
+        stdout, stderr, exit_code, time_of_test_command = run_result
+        new_percentage_covered = None
+        if exit_code == 0:
+            try:
+                new_percentage_covered, new_coverage_percentages = (
+                    self.post_process_coverage_report(time_of_test_command)
+                )
+            except Exception as e:
+                self.logger.error(f"Error during coverage verification: {e}")
+
+        if (
+            new_percentage_covered is None
+            or new_percentage_covered <= self.current_coverage
+        ):
+            # The tests do not work together. Validate them one at a time instead.
+            self.logger.info(
+                "Merged tests failed or did not increase coverage. Validating them one by one."
+            )
+            with open(self.test_file_path, "w") as test_file:
+                test_file.write(original_content)
+                test_file.flush()
+            return [self.validate_test(generated_test) for generated_test in generated_tests]
+
+        self.relevant_line_number_to_insert_tests_after = insert_tests_after
+        self._log_coverage_increase(new_coverage_percentages)
+        if newly_covered_lines is None:
+            newly_covered_lines = [[]] * len(generated_tests)
+            if len(generated_tests) == 1:
+                newly_covered_lines = [self._newly_covered_lines()]
+        self.current_coverage = new_percentage_covered
+        self.last_coverage_percentages = new_coverage_percentages.copy()
+        self.baseline_line_coverage = self.last_line_coverage
+        self.logger.info(
+            f"{len(generated_tests)} tests passed and coverage increased. Current coverage: {round(new_percentage_covered * 100, 2)}%"
+        )
+        return [
+            self._build_result(
+                status="PASS",
+                reason="",
+                exit_code=exit_code,
+                stderr=stderr,
+                stdout=stdout,
+                generated_test=generated_test,
+                original_content=original_content,
+                processed_test=merged_content,
+                newly_covered_lines=test_newly_covered_lines,
+            )
+            for generated_test, test_newly_covered_lines in zip(
+                generated_tests, newly_covered_lines
+            )
+        ]
+
     def to_dict(self):
         return {
             "source_file_path": self.source_file_path,
@@ -699,8 +1611,9 @@ class UnitTestValidator:
         Returns:
             str: The error summary extracted from the response or an empty string if extraction fails.
         """
+        max_output_lines = get_settings().get("failure_analysis.max_output_lines", 80)
         try:
-            # Run the analysis via LLM
+            # Run the analysis via LLM, with the test output trimmed to its traceback frames
             response, prompt_token_count, response_token_count, prompt = (
                 self.agent_completion.analyze_test_failure(
                     source_file_name=os.path.relpath(
@@ -708,15 +1621,16 @@ class UnitTestValidator:
                     ),
                     source_file=self._read_file(self.source_file_path),
                     processed_test_file=fail_details["processed_test_file"],
-                    stderr=fail_details["stderr"],
-                    stdout=fail_details["stdout"],
+                    stderr=trim_test_output(fail_details["stderr"], max_output_lines),
+                    stdout=trim_test_output(fail_details["stdout"], max_output_lines),
                     test_file_name=os.path.relpath(
                         self.test_file_path, self.project_root
                     ),
                 )
             )
-            self.total_input_token_count += prompt_token_count
-            self.total_output_token_count += response_token_count
+            with self._token_count_lock:
+                self.total_input_token_count += prompt_token_count
+                self.total_output_token_count += response_token_count
             output_str = response.strip()
             return output_str
         except Exception as e:
@@ -724,26 +1638,55 @@ class UnitTestValidator:
             return ""
 
     def post_process_coverage_report(self, time_of_test_command):
+        if self.diff_coverage and not self.use_report_coverage_feature_flag:
+            self.generate_diff_coverage_report()
+        percentage_covered, coverage_percentages, code_coverage_report, line_coverage = (
+            self._evaluate_coverage_report(
+                self.coverage_processor, time_of_test_command
+            )
+        )
+        self.last_line_coverage = line_coverage
+        if self.source_file_path in coverage_percentages:
+            self.last_source_file_coverage = coverage_percentages[
+                self.source_file_path
+            ]
+        if code_coverage_report is not None:
+            self.code_coverage_report = code_coverage_report
+        return percentage_covered, coverage_percentages
+
+    def _evaluate_coverage_report(
+        self, coverage_processor: CoverageProcessor, time_of_test_command: int
+    ) -> Tuple[float, dict, Optional[str], Optional[FileCoverage]]:
+        """
+        Process a coverage report without changing the state of the validator.
+
+        Parameters:
+            coverage_processor (CoverageProcessor): The processor of the coverage report to evaluate.
+            time_of_test_command (int): The time the test command was run, in milliseconds.
+
+        Returns:
+            tuple: The coverage percentage, the per-file coverage percentages (only filled when the report
+                   coverage feature flag is set), the coverage report text for the prompt, and the line
+                   coverage of the source file (both None when the report coverage feature flag is set).
+        """
         coverage_percentages = {}
         if self.use_report_coverage_feature_flag:
             self.logger.info(
                 "Using the report coverage feature flag to process the coverage report"
             )
-            file_coverage_dict = self.coverage_processor.process_coverage_report(
+            file_coverage_dict = coverage_processor.process_coverage_report(
                 time_of_test_command=time_of_test_command
             )
             total_lines_covered = 0
             total_lines_missed = 0
             total_lines = 0
             for key in file_coverage_dict:
-                lines_covered, lines_missed, percentage_covered = file_coverage_dict[
-                    key
-                ]
-                total_lines_covered += len(lines_covered)
-                total_lines_missed += len(lines_missed)
-                total_lines += len(lines_covered) + len(lines_missed)
-                if key == self.source_file_path:
-                    self.last_source_file_coverage = percentage_covered
+                covered_count, missed_count, percentage_covered = (
+                    self._coverage_counts(file_coverage_dict[key])
+                )
+                total_lines_covered += covered_count
+                total_lines_missed += missed_count
+                total_lines += covered_count + missed_count
                 if key not in coverage_percentages:
                     coverage_percentages[key] = 0
                 coverage_percentages[key] = percentage_covered
@@ -761,22 +1704,126 @@ class UnitTestValidator:
             self.logger.info(
                 f"coverage: Percentage {round(percentage_covered * 100, 2)}%"
             )
-        elif self.diff_coverage:
-            self.generate_diff_coverage_report()
-            lines_covered, lines_missed, percentage_covered = (
-                self.coverage_processor.process_coverage_report(
-                    time_of_test_command=time_of_test_command
-                )
-            )
-            self.code_coverage_report = f"Lines covered: {lines_covered}\nLines missed: {lines_missed}\nPercentage covered: {round(percentage_covered * 100, 2)}%"
+            return percentage_covered, coverage_percentages, None, None
+
+        file_coverage = coverage_processor.process_coverage_report(
+            time_of_test_command=time_of_test_command
+        )
+        if isinstance(file_coverage, FileCoverage):
+            # The percentage comes from the line counts, without decoding the bitmaps into line lists
+            percentage_covered = file_coverage.percentage
         else:
-            lines_covered, lines_missed, percentage_covered = (
-                self.coverage_processor.process_coverage_report(
-                    time_of_test_command=time_of_test_command
-                )
+            lines_covered, lines_missed, percentage_covered = file_coverage
+            file_coverage = FileCoverage.from_lines(lines_covered, lines_missed)
+        code_coverage_report = self._format_coverage_report(
+            file_coverage, percentage_covered
+        )
+        return (
+            percentage_covered,
+            coverage_percentages,
+            code_coverage_report,
+            file_coverage,
+        )
+
+    @staticmethod
+    def _format_coverage_report(
+        file_coverage: FileCoverage, percentage_covered: float
+    ) -> str:
+        """
+        Build the coverage report text of the prompt. Only the lines that are still missed are listed,
+        as ranges, so already covered regions are not sent to the model again.
+
+        Parameters:
+            file_coverage (FileCoverage): The line coverage of the source file.
+            percentage_covered (float): The coverage of the source file.
+
+        Returns:
+            str: The coverage report text.
+        """
+        if file_coverage.has_lines:
+            lines_report = f"Lines still missed: {format_line_ranges(file_coverage.missed_lines) or 'none'}"
+        else:
+            lines_report = f"Lines covered: {file_coverage.covered_count}\nLines missed: {file_coverage.missed_count}"
+        return f"{lines_report}\nPercentage covered: {round(percentage_covered * 100, 2)}%"
+
+    @staticmethod
+    def _coverage_counts(file_coverage) -> Tuple[int, int, float]:
+        """
+        Return the covered line count, missed line count and coverage percentage of a FileCoverage,
+        or of a (covered lines, missed lines, percentage) tuple.
+        """
+        if isinstance(file_coverage, FileCoverage):
+            return (
+                file_coverage.covered_count,
+                file_coverage.missed_count,
+                file_coverage.percentage,
             )
-            self.code_coverage_report = f"Lines covered: {lines_covered}\nLines missed: {lines_missed}\nPercentage covered: {round(percentage_covered * 100, 2)}%"
-        return percentage_covered, coverage_percentages
+        lines_covered, lines_missed, percentage_covered = file_coverage
+        return len(lines_covered), len(lines_missed), percentage_covered
+
+    def _build_selected_test_command(
+        self, generated_test: dict, processed_test: str
+    ) -> Optional[str]:
+        """
+        Build a test command that runs only the given generated test, when test selection is enabled.
+
+        Test selection (`[test_selection]` settings) needs the covered and missed lines of the last
+        accepted coverage report, so that the coverage of the new test can be merged into them. It is
+        not supported with diff coverage or with the report coverage feature flag.
+
+        Parameters:
+            generated_test (dict): The generated test.
+            processed_test (str): The test file content with the generated test inserted.
+
+        Returns:
+            Optional[str]: The command that runs only the generated test, or None to run the full test command.
+        """
+        if (
+            not get_settings().get("test_selection.enabled", False)
+            or self.diff_coverage
+            or self.use_report_coverage_feature_flag
+            or not self.baseline_line_coverage
+            or not self.baseline_line_coverage.has_lines
+        ):
+            return None
+        return build_single_test_command(
+            test_command=self.test_command,
+            test_command_dir=self.test_command_dir,
+            test_file_path=self.test_file_path,
+            test_file_content=processed_test,
+            test_code=generated_test.get("test_code", ""),
+            language=self.language,
+        )
+
+    def _merge_selected_test_coverage(self, time_of_test_command: int) -> Tuple[float, dict]:
+        """
+        Merge the coverage report of a run of a single test into the baseline line coverage.
+
+        The report only holds the lines executed by the selected test, so the coverage of the test file
+        is the union of the lines covered by the baseline and the lines covered by the new test.
+
+        Parameters:
+            time_of_test_command (int): The time the test command was run, in milliseconds.
+
+        Returns:
+            tuple: The merged coverage percentage, and the per-file coverage percentages of the last full
+                   run, unchanged since the report of a single test has no per-file percentages.
+        """
+        _, _, _, line_coverage = self._evaluate_coverage_report(
+            self.coverage_processor, time_of_test_command
+        )
+        baseline = self.baseline_line_coverage
+        merged = baseline.union(line_coverage.restricted_to(baseline))
+        percentage_covered = merged.percentage
+        self.logger.info(
+            f"Selected test covers {merged.newly_covered(baseline).covered_count} new lines"
+        )
+
+        self.last_line_coverage = merged
+        self.code_coverage_report = self._format_coverage_report(
+            merged, percentage_covered
+        )
+        return percentage_covered, self.last_coverage_percentages.copy()
 
     def generate_diff_coverage_report(self):
         """
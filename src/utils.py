@@ -1,5 +1,6 @@
 import argparse
 import inspect
+import json
 import logging
 import os
 import re
@@ -16,6 +17,14 @@ from coverage_ai.settings.config_loader import get_settings
 from coverage_ai.settings.token_handling import TokenEncoder, clip_tokens
 from coverage_ai.version import __version__
 
+try:
+    import orjson
+except ImportError:  # Optional: `pip install cover-agent[fast-json]`
+    orjson = None
+
+# The libyaml loader is much faster than the pure Python one, when PyYAML was built with it
+YAML_FAST_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def load_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     """
@@ -28,15 +37,21 @@ def load_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     Returns:
     dict: The parsed YAML data.
 
+    Responses in JSON (e.g. from models asked for structured output) are decoded as JSON first.
     If parsing the YAML data directly fails, it attempts to fix the YAML formatting using the 'try_fix_yaml' function.
 
     Example:
         load_yaml(response_text, keys_fix_yaml=['key1', 'key2'])
 
     """
-    response_text = response_text.strip().removeprefix("```yaml").rstrip("`")
+    response_text = (
+        response_text.strip().removeprefix("```yaml").removeprefix("```json").rstrip("`")
+    )
+    data = load_json(response_text)
+    if data is not None:
+        return data
     try:
-        data = yaml.safe_load(response_text)
+        data = safe_load_yaml(response_text)
     except Exception as e:
         logging.info(
             f"Failed to parse AI prediction: {e}. Attempting to fix YAML formatting."
@@ -47,13 +62,50 @@ def load_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     return data
 
 
-def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
+def load_json(response_text: str):
+    """
+    Decode a response text that is a JSON object or array, with orjson if it is installed.
+
+    Parameters:
+    response_text (str): The response text.
+
+    Returns:
+    dict or list: The decoded JSON data, or None if the text is not valid JSON.
+    """
+    response_text = response_text.strip()
+    if not response_text.startswith(("{", "[")):
+        return None
+    try:
+        if orjson is not None:
+            return orjson.loads(response_text)
+        return json.loads(response_text)
+    except ValueError:
+        return None
+
+
+def safe_load_yaml(text: str):
+    """
+    Parse YAML like `yaml.safe_load`, with the libyaml loader when it is available. Text rejected by libyaml is
+    parsed again with the pure Python loader, which raises the error if it also rejects it.
+    """
+    if YAML_FAST_LOADER is not yaml.SafeLoader:
+        try:
+            return yaml.load(text, Loader=YAML_FAST_LOADER)
+        except yaml.YAMLError:
+            pass
+    return yaml.safe_load(text)
+
+
+def try_fix_yaml(
+    response_text: str, keys_fix_yaml: List[str] = [], max_reparse_attempts: int = 20
+) -> dict:
     """
     Attempt to fix YAML formatting issues in the given response text.
 
     Parameters:
     response_text (str): The response text that may contain YAML data with formatting issues.
     keys_fix_yaml (List[str]): A list of keys to fix YAML formatting (default is an empty list).
+    max_reparse_attempts (int): The maximum number of texts parsed while removing last lines (default is 20).
 
     Returns:
     dict: The parsed YAML data after attempting to fix formatting issues.
@@ -62,7 +114,7 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     1. Tries to convert lines containing specific keys to multiline format.
     2. Tries to extract YAML snippet enclosed between ```yaml``` tags.
     3. Tries to remove leading and trailing curly brackets.
-    4. Tries to remove last lines iteratively to fix the formatting.
+    4. Tries to remove last lines iteratively to fix the formatting, skipping the lines up to a parse error.
 
     If none of the strategies succeed, an empty dictionary is returned.
 
@@ -83,7 +135,7 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
                     f"{key}", f"{key} |-\n        "
                 )
     try:
-        data = yaml.safe_load("\n".join(response_text_lines_copy))
+        data = safe_load_yaml("\n".join(response_text_lines_copy))
         logging.info(f"Successfully parsed AI prediction after adding |-\n")
         return data
     except:
@@ -95,7 +147,7 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
     if snippet:
         snippet_text = snippet.group()
         try:
-            data = yaml.safe_load(snippet_text.removeprefix("```yaml").rstrip("`"))
+            data = safe_load_yaml(snippet_text.removeprefix("```yaml").rstrip("`"))
             logging.info(
                 f"Successfully parsed AI prediction after extracting yaml snippet"
             )
@@ -108,25 +160,37 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
         response_text.strip().rstrip().removeprefix("{").removesuffix("}").rstrip(":\n")
     )
     try:
-        data = yaml.safe_load(response_text_copy)
+        data = safe_load_yaml(response_text_copy)
         logging.info(f"Successfully parsed AI prediction after removing curly brackets")
         return data
     except:
         pass
 
-    # fourth fallback - try to remove last lines
+    # fourth fallback - try to remove last lines. A text that still contains the line of the last parse
+    # error would fail again, so the lines from the error on are removed at once. A scanner error is
+    # reported where scanning stopped (e.g. at the end of an unterminated quote), so its token starts at
+    # the context mark.
     data = {}
-    for i in range(1, len(response_text_lines)):
-        response_text_lines_tmp = "\n".join(response_text_lines[:-i])
+    end = len(response_text_lines) - 1
+    for _ in range(max_reparse_attempts):
+        if end < 1:
+            break
         try:
-            data = yaml.safe_load(response_text_lines_tmp)
+            data = safe_load_yaml("\n".join(response_text_lines[:end]))
             if "language" in data:
                 logging.info(
-                    f"Successfully parsed AI prediction after removing {i} lines"
+                    f"Successfully parsed AI prediction after removing {len(response_text_lines) - end} lines"
                 )
                 return data
+        except yaml.MarkedYAMLError as e:
+            mark = e.problem_mark
+            if isinstance(e, yaml.scanner.ScannerError) and e.context_mark is not None:
+                mark = e.context_mark
+            if mark is not None and mark.line < end:
+                end = mark.line + 1
         except:
             pass
+        end -= 1
 
     ## fifth fallback - brute force:
     ## detect 'language:' key and use it as a starting point.
@@ -146,7 +210,7 @@ def try_fix_yaml(response_text: str, keys_fix_yaml: List[str] = []) -> dict:
             index_end = len(response_text)  # response ends with valid yaml
         response_text_copy = response_text[index_start:index_end].strip()
         try:
-            data = yaml.safe_load(response_text_copy)
+            data = safe_load_yaml(response_text_copy)
             logging.info(
                 f"Successfully parsed AI prediction when using the language: key as a starting point"
             )
@@ -443,6 +507,7 @@ def get_original_caller() -> str:
         "retry_wrapper",
         "wrapper",
         "call_model",
+        "acall_model",
         "get_original_caller",
         "__call__",
         "decorator",
@@ -0,0 +1,182 @@
+import fnmatch
+import os
+import re
+import shutil
+import tempfile
+
+from typing import Iterable, Optional
+
+from coverage_ai.custom_logger import CustomLogger
+
+
+class ValidationSandbox:
+    """
+    A disposable copy of a project tree used to validate a single candidate test in isolation.
+
+    The sandbox mirrors everything below `root_dir` into a scratch directory so that a test
+    command can rewrite the test file and regenerate the coverage report without touching the
+    real project. Several sandboxes can therefore run their test commands at the same time.
+
+    Two copy modes are supported:
+        - "copy": every file is copied (safe default).
+        - "hardlink": files are hard-linked into the sandbox, which is close to free on large
+          trees. Paths listed in `writable_paths`, and files with a path component matching
+          `copy_patterns` (by default coverage.py data files and the pytest cache), are always
+          copied instead of linked, since writing to a hard link would modify the original file
+          as well. Any other file the test run rewrites in place is shared with the real project.
+    """
+
+    COPY_MODES = ("copy", "hardlink")
+    # Files rewritten in place by pytest and pytest-cov runs
+    DEFAULT_COPY_PATTERNS = (".coverage", ".coverage.*", ".pytest_cache")
+
+    def __init__(
+        self,
+        root_dir: str,
+        writable_paths: Iterable[str] = (),
+        copy_mode: str = "copy",
+        ignore_patterns: Iterable[str] = (".git",),
+        copy_patterns: Iterable[str] = DEFAULT_COPY_PATTERNS,
+        logger: Optional[CustomLogger] = None,
+        generate_log_files: bool = True,
+    ):
+        """
+        Initialize the ValidationSandbox.
+
+        Args:
+            root_dir (str): The project directory to mirror into the sandbox.
+            writable_paths (Iterable[str]): Paths (inside root_dir) that the test run will write to,
+                e.g. the test file and the coverage report. These are always real copies.
+            copy_mode (str): Either "copy" or "hardlink". Defaults to "copy".
+            ignore_patterns (Iterable[str]): Glob patterns of files and directories that are not mirrored.
+            copy_patterns (Iterable[str]): Glob patterns of files and directories that are copied even in
+                hardlink mode, matched against every component of their path relative to root_dir.
+            logger (CustomLogger, optional): The logger object for logging messages.
+            generate_log_files (bool): Whether or not to generate logs.
+
+        Raises:
+            ValueError: If copy_mode is not supported.
+        """
+        if copy_mode not in self.COPY_MODES:
+            raise ValueError(
+                f"Unsupported sandbox copy mode: {copy_mode}. Expected one of {self.COPY_MODES}"
+            )
+        self.root_dir = os.path.abspath(root_dir)
+        self.writable_paths = {os.path.abspath(p) for p in writable_paths}
+        self.copy_mode = copy_mode
+        self.ignore_patterns = list(ignore_patterns)
+        self.copy_patterns = list(copy_patterns)
+        self.sandbox_dir = None
+        self._scratch_dir = None
+        self.logger = logger or CustomLogger.get_logger(
+            __name__, generate_log_files=generate_log_files
+        )
+
+    def __enter__(self):
+        self.create()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+    def create(self) -> str:
+        """
+        Mirror the project tree into a new scratch directory.
+
+        Returns:
+            str: The path of the sandbox copy of root_dir.
+        """
+        self._scratch_dir = tempfile.mkdtemp(prefix="cover-agent-sandbox-")
+        self.sandbox_dir = os.path.join(
+            self._scratch_dir, os.path.basename(self.root_dir) or "project"
+        )
+        shutil.copytree(
+            self.root_dir,
+            self.sandbox_dir,
+            symlinks=True,
+            ignore=shutil.ignore_patterns(*self.ignore_patterns),
+            copy_function=self._copy_file,
+        )
+        self.logger.debug(f"Created validation sandbox at {self.sandbox_dir}")
+        return self.sandbox_dir
+
+    def cleanup(self):
+        """Remove the scratch directory and everything in it."""
+        if self._scratch_dir:
+            shutil.rmtree(self._scratch_dir, ignore_errors=True)
+        self._scratch_dir = None
+        self.sandbox_dir = None
+
+    def contains(self, path: str) -> bool:
+        """
+        Check whether a path is located inside the mirrored root directory.
+
+        Args:
+            path (str): The path to check.
+
+        Returns:
+            bool: True if the path is root_dir itself or lives below it.
+        """
+        path = os.path.abspath(path)
+        return os.path.commonpath([self.root_dir, path]) == self.root_dir
+
+    def map_path(self, path: str) -> str:
+        """
+        Translate a path inside the real project into the equivalent path inside the sandbox.
+
+        Args:
+            path (str): A path inside root_dir.
+
+        Returns:
+            str: The matching path inside the sandbox.
+
+        Raises:
+            ValueError: If the path is outside root_dir.
+        """
+        if not self.contains(path):
+            raise ValueError(f"Path {path} is outside of the sandbox root {self.root_dir}")
+        return os.path.normpath(
+            os.path.join(
+                self.sandbox_dir, os.path.relpath(os.path.abspath(path), self.root_dir)
+            )
+        )
+
+    def map_command(self, command: str) -> str:
+        """
+        Rewrite absolute references to the project root inside a shell command so they point at the sandbox.
+
+        Args:
+            command (str): The test command.
+
+        Returns:
+            str: The command with every reference to root_dir (followed by a path separator, a quote,
+                 whitespace or the end of the command) replaced by the sandbox directory. Paths that only
+                 share a prefix with root_dir, such as a sibling "<root_dir>-venv" directory, are kept.
+        """
+        return re.sub(
+            re.escape(self.root_dir) + r"(?=[/\\\s'\"]|$)",
+            lambda _: self.sandbox_dir,
+            command,
+        )
+
+    def _must_copy(self, src: str) -> bool:
+        """Whether a file is copied even in hardlink mode, because the test run may write to it."""
+        src = os.path.abspath(src)
+        if src in self.writable_paths:
+            return True
+        parts = os.path.relpath(src, self.root_dir).split(os.sep)
+        return any(
+            fnmatch.fnmatch(part, pattern)
+            for part in parts
+            for pattern in self.copy_patterns
+        )
+
+    def _copy_file(self, src: str, dst: str):
+        if self.copy_mode == "hardlink" and not self._must_copy(src):
+            try:
+                os.link(src, dst)
+                return dst
+            except OSError:
+                # Cross-device links or filesystems without hard link support
+                pass
+        return shutil.copy2(src, dst)
@@ -0,0 +1,283 @@
+import atexit
+import json
+import os
+import select
+import shlex
+import subprocess
+import threading
+import time
+
+from typing import Iterable, List, Optional, Tuple
+
+from coverage_ai import warm_worker
+from coverage_ai.custom_logger import CustomLogger
+
+
+class WarmTestRunner:
+    """
+    A long-lived pytest worker that runs test commands without paying interpreter and import startup.
+
+    The worker (`coverage_ai.warm_worker`) is started once with the Python interpreter of the project
+    under test. It imports pytest and the preloaded modules, then forks a fresh child for every test
+    run (zygote style), so each run starts with those modules already imported. Requests and responses
+    are exchanged as JSON lines over the worker's stdin/stdout pipes.
+
+    A worker runs one test command at a time, so concurrent runs (e.g. parallel validation) each take an
+    idle worker, and a new worker is started when none is idle. A worker that does not answer within the
+    run's time limit plus `RESPONSE_MARGIN_SEC` is killed.
+
+    Only simple pytest invocations (`pytest ARGS` or `python -m pytest ARGS`) can run in the worker.
+    Modules of the code under test should not be preloaded: they would already be imported when
+    coverage starts, so their module-level lines would be reported as missed.
+    """
+
+    SHELL_OPERATORS = ("&&", "||", ";", "|", ">", "<", "$", "`")
+    # Seconds a worker may take to answer beyond the time limit of the run, which the worker enforces itself
+    RESPONSE_MARGIN_SEC = 10
+    _shared_runners = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        python_executable: str = "python",
+        preload_modules: Iterable[str] = (),
+        logger: Optional[CustomLogger] = None,
+        generate_log_files: bool = True,
+    ):
+        """
+        Initialize the WarmTestRunner. The worker process is started on the first run.
+
+        Args:
+            python_executable (str): The Python interpreter of the project under test.
+            preload_modules (Iterable[str]): Modules imported once by the worker, e.g. heavy third-party dependencies.
+            logger (CustomLogger, optional): The logger object for logging messages.
+            generate_log_files (bool): Whether or not to generate logs.
+        """
+        self.python_executable = python_executable
+        self.preload_modules = list(preload_modules)
+        self.available = True
+        # Started workers, and the ones not running a test command
+        self.processes = []
+        self._idle_processes = []
+        # Bytes read from a worker after the end of the last message: {pid: bytes}
+        self._read_buffers = {}
+        self._lock = threading.Lock()
+        self.logger = logger or CustomLogger.get_logger(
+            __name__, generate_log_files=generate_log_files
+        )
+
+    @classmethod
+    def shared(
+        cls, python_executable: str, preload_modules: Iterable[str]
+    ) -> "WarmTestRunner":
+        """
+        Return the worker shared by every test run for a Python interpreter, creating it if needed.
+
+        Args:
+            python_executable (str): The Python interpreter of the project under test.
+            preload_modules (Iterable[str]): Modules imported once by the worker.
+
+        Returns:
+            WarmTestRunner: The shared worker.
+        """
+        with cls._shared_lock:
+            if python_executable not in cls._shared_runners:
+                runner = cls(python_executable, preload_modules)
+                cls._shared_runners[python_executable] = runner
+                atexit.register(runner.close)
+            return cls._shared_runners[python_executable]
+
+    @classmethod
+    def parse_pytest_command(cls, command: str) -> Optional[Tuple[List[str], bool]]:
+        """
+        Extract the pytest arguments of a test command.
+
+        Args:
+            command (str): The test command.
+
+        Returns:
+            Optional[Tuple[List[str], bool]]: The pytest arguments, and whether the working directory
+            should be added to sys.path (as `python -m pytest` does). None if the command is not a
+            single pytest invocation.
+        """
+        if any(operator in command for operator in cls.SHELL_OPERATORS):
+            return None
+        try:
+            tokens = shlex.split(command)
+        except ValueError:
+            return None
+
+        if tokens and os.path.basename(tokens[0]) in ("pytest", "py.test"):
+            return tokens[1:], False
+        if (
+            len(tokens) >= 3
+            and os.path.basename(tokens[0]).startswith("python")
+            and tokens[1:3] == ["-m", "pytest"]
+        ):
+            return tokens[3:], True
+        return None
+
+    def start(self) -> subprocess.Popen:
+        """
+        Start a worker process and wait until it has imported its modules.
+
+        Returns:
+            subprocess.Popen: The worker process.
+
+        Raises:
+            RuntimeError: If the worker cannot run on this platform or interpreter. The runner is then
+                          marked as unavailable.
+        """
+        worker_path = warm_worker.__file__
+        if not worker_path.endswith(".py") or not os.path.isfile(worker_path):
+            self.available = False
+            raise RuntimeError(f"Warm worker script not found: {worker_path}")
+
+        try:
+            process = subprocess.Popen(
+                [self.python_executable, worker_path] + self.preload_modules,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            self.available = False
+            raise RuntimeError(f"Warm test worker failed to start: {e}")
+        try:
+            ready = self._read_message(process, time.monotonic() + 60)
+        except (RuntimeError, TimeoutError) as e:
+            ready = {"error": str(e)}
+        if not ready.get("ready"):
+            self._stop_process(process)
+            self.available = False
+            raise RuntimeError(
+                f"Warm test worker failed to start: {ready.get('error', 'no answer')}"
+            )
+        with self._lock:
+            self.processes.append(process)
+        self.logger.info(
+            f"Started warm test worker (pid {process.pid}) with {self.python_executable}"
+        )
+        return process
+
+    def run(
+        self,
+        args: List[str],
+        cwd: Optional[str],
+        max_run_time_sec: int,
+        prepend_cwd: bool = False,
+    ) -> Tuple[str, str, int]:
+        """
+        Run pytest with the given arguments in a fresh fork of an idle worker.
+
+        Args:
+            args (List[str]): The pytest arguments.
+            cwd (str, optional): The working directory of the test run.
+            max_run_time_sec (int): Maximum allowed runtime in seconds before timeout.
+            prepend_cwd (bool): Whether to add the working directory to sys.path.
+
+        Returns:
+            tuple: The standard output, standard error and exit code of the test run.
+
+        Raises:
+            RuntimeError: If the worker cannot be started or stopped answering.
+        """
+        process = self._acquire_process()
+        request = {
+            "args": args,
+            "cwd": os.path.abspath(cwd or os.getcwd()),
+            "timeout": max_run_time_sec,
+            "prepend_cwd": prepend_cwd,
+        }
+        test_run_pid = None
+        try:
+            process.stdin.write((json.dumps(request) + "\n").encode())
+            process.stdin.flush()
+            deadline = time.monotonic() + max_run_time_sec + self.RESPONSE_MARGIN_SEC
+            test_run_pid = self._read_message(process, deadline)["pid"]
+            response = self._read_message(process, deadline)
+        except TimeoutError:
+            self.logger.warning(
+                f"Warm test worker (pid {process.pid}) did not answer in time, stopping it."
+            )
+            if test_run_pid:
+                # The test run is a process group of its own (see `warm_worker`)
+                warm_worker.kill_process_group(test_run_pid)
+            self._stop_process(process, kill=True)
+            return "", "Command timed out", -1
+        except (OSError, RuntimeError, KeyError) as e:
+            self._stop_process(process, kill=True)
+            raise RuntimeError(f"Warm test worker stopped answering: {e}")
+
+        with self._lock:
+            self._idle_processes.append(process)
+        return response["stdout"], response["stderr"], response["exit_code"]
+
+    def _acquire_process(self) -> subprocess.Popen:
+        """Take an idle worker process, or start a new one if none is idle."""
+        with self._lock:
+            if not self.available:
+                raise RuntimeError("Warm test worker is not available")
+            while self._idle_processes:
+                process = self._idle_processes.pop()
+                if process.poll() is None:
+                    return process
+                self.processes.remove(process)
+        return self.start()
+
+    def _read_message(self, process: subprocess.Popen, deadline: float) -> dict:
+        """
+        Read one JSON line from a worker, waiting at most until the `time.monotonic()` deadline.
+
+        Raises:
+            TimeoutError: If the worker did not answer in time.
+            RuntimeError: If the worker exited or sent an invalid line.
+        """
+        fd = process.stdout.fileno()
+        data = bytearray(self._read_buffers.pop(process.pid, b""))
+        end = data.find(b"\n")
+        while end == -1:
+            remaining_sec = deadline - time.monotonic()
+            if remaining_sec <= 0:
+                self._read_buffers[process.pid] = bytes(data)
+                raise TimeoutError("The worker did not answer in time")
+            readable, _, _ = select.select([fd], [], [], remaining_sec)
+            if readable:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise RuntimeError("the worker exited")
+                data += chunk
+                end = data.find(b"\n", len(data) - len(chunk))
+        line = bytes(data[:end])
+        if end + 1 < len(data):
+            # The start of the next message
+            self._read_buffers[process.pid] = bytes(data[end + 1 :])
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise RuntimeError(f"invalid answer: {e}")
+
+    def _stop_process(self, process: subprocess.Popen, kill: bool = False):
+        """Stop a worker process, or kill it if `kill` or if it does not stop, and forget it."""
+        try:
+            if kill:
+                process.kill()
+            else:
+                process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        self._read_buffers.pop(process.pid, None)
+        with self._lock:
+            if process in self.processes:
+                self.processes.remove(process)
+            if process in self._idle_processes:
+                self._idle_processes.remove(process)
+
+    def close(self):
+        """Stop the worker processes."""
+        with self._lock:
+            processes = list(self.processes)
+        for process in processes:
+            self._stop_process(process)
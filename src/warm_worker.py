@@ -0,0 +1,123 @@
+"""
+Warm pytest worker, started by `coverage_ai.warm_runner.WarmTestRunner`.
+
+This script runs with the Python interpreter of the project under test, so it only depends on the
+standard library and avoids syntax that older interpreters do not support. It imports pytest (and
+any other module given on the command line) once, then forks a fresh child for every test run, so
+each run starts with those modules already imported.
+
+Protocol (one JSON object per line):
+    - startup, on stdout: {"ready": true} or {"ready": false, "error": "..."}
+    - request, on stdin: {"args": [...], "cwd": "...", "timeout": 30, "prepend_cwd": false}
+    - on stdout, once the test run is forked: {"pid": 1234}
+    - response, on stdout: {"exit_code": 0, "stdout": "...", "stderr": "..."}
+
+Each test run is a new session and process group, so the processes started by the tests are killed
+with it when the run times out, and any left running once it exits are killed too.
+"""
+
+import importlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+import traceback
+
+
+def kill_process_group(pgid: int):
+    """Kill every process of a test run's process group, ignoring a group that is already gone."""
+    try:
+        os.killpg(pgid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def run_request(request: dict, send) -> dict:
+    """Run pytest in a forked child and collect its exit code and output."""
+    with tempfile.TemporaryFile(mode="w+") as stdout_file, tempfile.TemporaryFile(
+        mode="w+"
+    ) as stderr_file:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                os.setsid()
+                devnull = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(devnull, 0)
+                os.dup2(stdout_file.fileno(), 1)
+                os.dup2(stderr_file.fileno(), 2)
+                os.chdir(request["cwd"])
+                if request.get("prepend_cwd"):
+                    sys.path.insert(0, request["cwd"])
+
+                import pytest
+
+                exit_code = int(pytest.main(request["args"]))
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+
+        send({"pid": pid})
+        deadline = time.monotonic() + request.get("timeout", 30)
+        while True:
+            finished_pid, status = os.waitpid(pid, os.WNOHANG)
+            if finished_pid:
+                break
+            if time.monotonic() > deadline:
+                kill_process_group(pid)
+                os.waitpid(pid, 0)
+                return {"exit_code": -1, "stdout": "", "stderr": "Command timed out"}
+            time.sleep(0.005)
+        kill_process_group(pid)
+
+        stdout_file.seek(0)
+        stderr_file.seek(0)
+        if os.WIFEXITED(status):
+            exit_code = os.WEXITSTATUS(status)
+        else:
+            exit_code = -os.WTERMSIG(status)
+        return {
+            "exit_code": exit_code,
+            "stdout": stdout_file.read(),
+            "stderr": stderr_file.read(),
+        }
+
+
+def main(preload_modules: list):
+    # Keep the original stdout for the protocol, and send anything else printed by this process to stderr
+    channel = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+
+    def send(message: dict):
+        channel.write(json.dumps(message) + "\n")
+        channel.flush()
+
+    if not hasattr(os, "fork"):
+        send({"ready": False, "error": "os.fork is not available on this platform"})
+        return
+    try:
+        import pytest  # noqa: F401
+    except ImportError as e:
+        send({"ready": False, "error": str(e)})
+        return
+    for module in preload_modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            pass
+
+    send({"ready": True})
+    for line in sys.stdin:
+        if line.strip():
+            send(run_request(json.loads(line), send))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
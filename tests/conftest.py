@@ -0,0 +1,13 @@
+import pytest
+
+from coverage_ai.settings.config_loader import get_settings
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_file_in_tmp_path(tmp_path_factory):
+    """Write the log file of the loggers created by the tests to a temporary directory."""
+    settings = get_settings().get("default")
+    previous_log_file_path = settings.log_file_path
+    settings.log_file_path = str(tmp_path_factory.mktemp("logs") / "run.log")
+    yield
+    settings.log_file_path = previous_log_file_path
@@ -1,10 +1,28 @@
+import asyncio
 import os
 
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
+import litellm
 import pytest
 
-from coverage_ai.ai_caller import AICaller
+from coverage_ai.ai_caller import AICaller, StreamAssembler
+from coverage_ai.response_cache import ResponseCache
+
+
+def make_stream_chunks(content: str, prompt_tokens: int, completion_tokens: int) -> list:
+    """Build streamed chunks: one per word of the content, then a final chunk with the token usage."""
+    chunks = [
+        Mock(choices=[Mock(delta=Mock(content=word))], usage=None)
+        for word in content.split(" ")
+    ]
+    chunks.append(
+        Mock(
+            choices=[],
+            usage=Mock(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens),
+        )
+    )
+    return chunks
 
 
 class TestAICaller:
@@ -19,6 +37,20 @@ class TestAICaller:
         """
         return AICaller(model="test-model", api_base="test-api", enable_retry=False)
 
+    def test_init_leaves_the_litellm_client_session(self):
+        """
+        Test that creating an AICaller does not replace the process-wide litellm client session, which is
+        installed once by the entry points.
+        """
+        previous_session = litellm.client_session
+        sentinel = object()
+        litellm.client_session = sentinel
+        try:
+            AICaller(model="test-model", enable_retry=False)
+            assert litellm.client_session is sentinel
+        finally:
+            litellm.client_session = previous_session
+
     @patch("coverage_ai.ai_caller.AICaller.call_model")
     def test_call_model_simplified(self, mock_call_model):
         """
@@ -66,10 +98,8 @@ class TestAICaller:
         with pytest.raises(Exception) as exc_info:
             ai_caller.call_model(prompt)
 
-        # assert str(exc_info.value) == "list index out of range"
-        assert (
-            str(exc_info.value) == "'NoneType' object is not subscriptable"
-        )  # this error message might change for different versions of litellm
+        # No chunk could be read, so the streaming error is raised even without retries
+        assert "has no attribute 'choices'" in str(exc_info.value)
 
     @patch("coverage_ai.ai_caller.litellm.completion")
     @patch.dict(os.environ, {"WANDB_API_KEY": "test_key"})
@@ -78,66 +108,39 @@ class TestAICaller:
         """
         Test the call_model method with W&B logging enabled.
         """
-        mock_completion.return_value = [
-            {"choices": [{"delta": {"content": "response"}}]}
-        ]
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
         prompt = {"system": "", "user": "Hello, world!"}
-        with patch(
-            "coverage_ai.ai_caller.litellm.stream_chunk_builder"
-        ) as mock_builder:
-            mock_builder.return_value = {
-                "choices": [{"message": {"content": "response"}}],
-                "usage": {"prompt_tokens": 2, "completion_tokens": 10},
-            }
-            response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
-            assert response == "response"
-            assert prompt_tokens == 2
-            assert response_tokens == 10
-            mock_log.assert_called_once()
+        response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
+        assert response == "response"
+        assert prompt_tokens == 2
+        assert response_tokens == 10
+        mock_log.assert_called_once()
 
     @patch("coverage_ai.ai_caller.litellm.completion")
     def test_call_model_api_base(self, mock_completion, ai_caller):
         """
         Test the call_model method with a different API base.
         """
-        mock_completion.return_value = [
-            {"choices": [{"delta": {"content": "response"}}]}
-        ]
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
         ai_caller.model = "openai/test-model"
         prompt = {"system": "", "user": "Hello, world!"}
-        with patch(
-            "coverage_ai.ai_caller.litellm.stream_chunk_builder"
-        ) as mock_builder:
-            mock_builder.return_value = {
-                "choices": [{"message": {"content": "response"}}],
-                "usage": {"prompt_tokens": 2, "completion_tokens": 10},
-            }
-            response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
-            assert ai_caller.api_base == "test-api"
-            assert response == "response"
-            assert prompt_tokens == 2
-            assert response_tokens == 10
+        response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
+        assert ai_caller.api_base == "test-api"
+        assert response == "response"
+        assert prompt_tokens == 2
+        assert response_tokens == 10
 
     @patch("coverage_ai.ai_caller.litellm.completion")
     def test_call_model_with_system_key(self, mock_completion, ai_caller):
         """
         Test the call_model method with a system key in the prompt.
         """
-        mock_completion.return_value = [
-            {"choices": [{"delta": {"content": "response"}}]}
-        ]
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
         prompt = {"system": "System message", "user": "Hello, world!"}
-        with patch(
-            "coverage_ai.ai_caller.litellm.stream_chunk_builder"
-        ) as mock_builder:
-            mock_builder.return_value = {
-                "choices": [{"message": {"content": "response"}}],
-                "usage": {"prompt_tokens": 2, "completion_tokens": 10},
-            }
-            response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
-            assert response == "response"
-            assert prompt_tokens == 2
-            assert response_tokens == 10
+        response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
+        assert response == "response"
+        assert prompt_tokens == 2
+        assert response_tokens == 10
 
     def test_call_model_missing_keys(self, ai_caller):
         """
@@ -178,21 +181,12 @@ class TestAICaller:
         """
         prompt = {"system": "", "user": "Hello, world!"}
         # Mock the response to be an iterable of chunks
-        mock_chunk = Mock()
-        mock_chunk.choices = [Mock(delta=Mock(content="response part"))]
-        mock_completion.return_value = [mock_chunk]
-        with patch(
-            "coverage_ai.ai_caller.litellm.stream_chunk_builder"
-        ) as mock_builder:
-            mock_builder.return_value = {
-                "choices": [{"message": {"content": "response"}}],
-                "usage": {"prompt_tokens": 2, "completion_tokens": 10},
-            }
-            response, prompt_tokens, response_tokens = ai_caller.call_model(
-                prompt, stream=True
-            )
-            assert response == "response"
-            assert prompt_tokens == 2
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
+        response, prompt_tokens, response_tokens = ai_caller.call_model(
+            prompt, stream=True
+        )
+        assert response == "response"
+        assert prompt_tokens == 2
 
     @patch("coverage_ai.ai_caller.litellm.completion")
     @patch.dict(os.environ, {"WANDB_API_KEY": "test_key"})
@@ -203,25 +197,274 @@ class TestAICaller:
         """
         Test the call_model method with W&B logging and handle logging exceptions.
         """
-        # Create a proper mock chunk with the correct structure
-        mock_chunk = Mock()
-        mock_chunk.choices = [Mock(delta=Mock(content="response"))]
-        mock_completion.return_value = [mock_chunk]
+        # Create proper mock chunks with the correct structure
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
 
         mock_log.side_effect = Exception("Logging error")
         prompt = {"system": "", "user": "Hello, world!"}
 
-        with (
-            patch("coverage_ai.ai_caller.litellm.stream_chunk_builder") as mock_builder,
-            patch.object(ai_caller.logger, "error") as mock_logger,
-        ):
-            mock_builder.return_value = {
-                "choices": [{"message": {"content": "response"}}],
-                "usage": {"prompt_tokens": 2, "completion_tokens": 10},
-            }
+        with patch.object(ai_caller.logger, "error") as mock_logger:
             response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
 
             assert response == "response"
             assert prompt_tokens == 2
             assert response_tokens == 10
             mock_logger.assert_called_once_with("Error logging to W&B: Logging error")
+
+    @patch("coverage_ai.ai_caller.litellm.acompletion", new_callable=AsyncMock)
+    def test_acall_model(self, mock_acompletion, ai_caller):
+        """
+        Test the acall_model method with a non-streaming response.
+        """
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="response"))]
+        mock_response.usage = Mock(prompt_tokens=2, completion_tokens=10)
+        mock_acompletion.return_value = mock_response
+        prompt = {"system": "System message", "user": "Hello, world!"}
+
+        response, prompt_tokens, response_tokens = asyncio.run(
+            ai_caller.acall_model(prompt)
+        )
+
+        assert (response, prompt_tokens, response_tokens) == ("response", 2, 10)
+        assert mock_acompletion.call_args.kwargs["stream"] is False
+        assert mock_acompletion.call_args.kwargs["messages"][0]["role"] == "system"
+
+    @patch("coverage_ai.ai_caller.litellm.acompletion", new_callable=AsyncMock)
+    def test_acall_model_with_error(self, mock_acompletion, ai_caller):
+        """
+        Test the acall_model method when an exception is raised.
+        """
+        mock_acompletion.side_effect = Exception("Test exception")
+        prompt = {"system": "", "user": "Hello, world!"}
+        with pytest.raises(Exception, match="Test exception"):
+            asyncio.run(ai_caller.acall_model(prompt))
+        assert mock_acompletion.call_count == 1
+
+    @patch("coverage_ai.ai_caller.time.sleep")
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_streaming_assembles_chunks(
+        self, mock_completion, mock_sleep, ai_caller
+    ):
+        """
+        Test that streamed chunks are joined into the response without sleeping between chunks, and that
+        the usage request is only sent to providers that support it.
+        """
+        mock_completion.return_value = make_stream_chunks("a streamed response", 5, 3)
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
+
+        assert (response, prompt_tokens, response_tokens) == ("astreamedresponse", 5, 3)
+        mock_sleep.assert_not_called()
+        assert "stream_options" not in mock_completion.call_args.kwargs
+
+        ai_caller.model = "gpt-4o"
+        mock_completion.return_value = make_stream_chunks("response", 5, 3)
+        ai_caller.call_model(prompt)
+        assert mock_completion.call_args.kwargs["stream_options"] == {
+            "include_usage": True
+        }
+
+    @patch("coverage_ai.ai_caller.litellm.token_counter", return_value=7)
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_streaming_without_usage(
+        self, mock_completion, mock_token_counter, ai_caller
+    ):
+        """
+        Test that token counts are estimated when the stream does not report usage.
+        """
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)[:-1]
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        response, prompt_tokens, response_tokens = ai_caller.call_model(prompt)
+
+        assert (response, prompt_tokens, response_tokens) == ("response", 7, 7)
+        assert mock_token_counter.call_count == 2
+
+    def test_stream_assembler_throttles_echo(self, capsys):
+        """
+        Test that the echo of a streamed response is printed at most once per interval.
+        """
+        assembler = StreamAssembler(echo=True, echo_interval_sec=60)
+        for chunk in make_stream_chunks("one two three", 1, 3):
+            assembler.add(chunk)
+        # The first chunk is printed right away, the others are held until the end of the stream
+        assert capsys.readouterr().out == "one"
+        assert assembler.finish() == "onetwothree"
+        assert capsys.readouterr().out == "twothree\n\n"
+        assert (assembler.usage.prompt_tokens, assembler.usage.completion_tokens) == (1, 3)
+
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_response_cache(self, mock_completion, tmp_path):
+        """
+        Test that identical prompts of cached callers are answered from the response cache.
+        """
+        ai_caller = AICaller(
+            model="test-model",
+            enable_retry=False,
+            response_cache=ResponseCache(str(tmp_path / "responses.sqlite")),
+        )
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        def analyze_test_insert_line():
+            mock_completion.return_value = make_stream_chunks("response", 2, 10)
+            return ai_caller.call_model(prompt)
+
+        assert analyze_test_insert_line() == ("response", 2, 10)
+        # A cached response uses no tokens, its original tokens are counted as saved
+        assert analyze_test_insert_line() == ("response", 0, 0)
+        assert mock_completion.call_count == 1
+        assert ai_caller.response_cache.stats()["hits"] == 1
+        assert (
+            ai_caller.total_saved_prompt_tokens,
+            ai_caller.total_saved_completion_tokens,
+        ) == (2, 10)
+
+        # Test generation is not in the cached callers, so it always calls the model
+        def generate_tests():
+            mock_completion.return_value = make_stream_chunks("response", 2, 10)
+            return ai_caller.call_model(prompt)
+
+        generate_tests()
+        assert mock_completion.call_count == 2
+
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_does_not_cache_truncated_streams(self, mock_completion, tmp_path):
+        """
+        Test that a response whose stream failed after some chunks is returned, but not cached.
+        """
+        ai_caller = AICaller(
+            model="test-model",
+            enable_retry=False,
+            response_cache=ResponseCache(str(tmp_path / "responses.sqlite")),
+        )
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        def broken_stream():
+            yield from make_stream_chunks("partial response", 2, 10)[:1]
+            raise ConnectionError("connection reset")
+
+        def analyze_test_insert_line():
+            return ai_caller.call_model(prompt)
+
+        mock_completion.return_value = broken_stream()
+        assert analyze_test_insert_line()[0] == "partial"
+        assert ai_caller.response_cache.stats()["entries"] == 0
+
+        mock_completion.return_value = make_stream_chunks("response", 2, 10)
+        assert analyze_test_insert_line() == ("response", 2, 10)
+        assert mock_completion.call_count == 2
+
+    @patch("coverage_ai.ai_caller.litellm.acompletion", new_callable=AsyncMock)
+    def test_acall_model_response_cache(self, mock_acompletion, tmp_path):
+        """
+        Test that acall_model reads and fills the response cache.
+        """
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="response"))]
+        mock_response.usage = Mock(prompt_tokens=2, completion_tokens=10)
+        mock_acompletion.return_value = mock_response
+        ai_caller = AICaller(
+            model="test-model",
+            enable_retry=False,
+            response_cache=ResponseCache(str(tmp_path / "responses.sqlite")),
+        )
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        async def analyze_context():
+            return await ai_caller.acall_model(prompt)
+
+        assert asyncio.run(analyze_context()) == ("response", 2, 10)
+        assert asyncio.run(analyze_context()) == ("response", 0, 0)
+        assert mock_acompletion.call_count == 1
+
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_cache_prefix(self, mock_completion, ai_caller):
+        """
+        Test that the cache prefix is sent as a cache_control content block to Anthropic models only, and
+        that the prompt tokens read from the provider's cache are tracked.
+        """
+        prompt = {"system": "System message", "user": "stable prefix, volatile suffix"}
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content="response"))]
+        mock_response.usage = Mock(
+            prompt_tokens=100,
+            completion_tokens=10,
+            prompt_tokens_details=Mock(cached_tokens=80),
+        )
+        mock_completion.return_value = mock_response
+
+        ai_caller.call_model(prompt, stream=False, cache_prefix="stable prefix, ")
+        assert (
+            mock_completion.call_args.kwargs["messages"][1]["content"] == prompt["user"]
+        )
+
+        ai_caller.model = "anthropic/claude-3-5-sonnet-20241022"
+        ai_caller.call_model(prompt, stream=False, cache_prefix="stable prefix, ")
+        assert mock_completion.call_args.kwargs["messages"][1]["content"] == [
+            {
+                "type": "text",
+                "text": "stable prefix, ",
+                "cache_control": {"type": "ephemeral"},
+            },
+            {"type": "text", "text": "volatile suffix"},
+        ]
+        assert ai_caller.last_cached_prompt_tokens == 80
+        assert ai_caller.total_cached_prompt_tokens == 160
+
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_streaming_cached_tokens(self, mock_completion, ai_caller):
+        """
+        Test that cached prompt tokens reported by Anthropic in the final streamed chunk are tracked.
+        """
+        chunks = make_stream_chunks("response", 2, 10)
+        chunks[-1].usage.prompt_tokens_details = None
+        chunks[-1].usage.cache_read_input_tokens = 1
+        mock_completion.return_value = chunks
+        prompt = {"system": "", "user": "Hello, world!"}
+
+        ai_caller.call_model(prompt)
+
+        assert ai_caller.last_cached_prompt_tokens == 1
+
+    @patch("coverage_ai.ai_caller.get_settings")
+    @patch("coverage_ai.ai_caller.litellm.completion")
+    def test_call_model_structured_output(self, mock_completion, mock_get_settings):
+        """
+        Test that the callers listed in `llm_structured_output.callers` ask models supporting it for a JSON
+        object, and that other callers and models are left unchanged.
+        """
+        settings = {
+            "llm_structured_output": {"enabled": True, "callers": ["generate_tests"]}
+        }
+        mock_get_settings.return_value.get.side_effect = (
+            lambda key, default=None: settings.get(key, default)
+        )
+        mock_response = Mock()
+        mock_response.choices = [Mock(message=Mock(content='{"language": "python"}'))]
+        mock_response.usage = Mock(prompt_tokens=2, completion_tokens=10)
+        mock_completion.return_value = mock_response
+        ai_caller = AICaller(model="gpt-4o", enable_retry=False)
+        prompt = {"system": "System message", "user": "Write tests"}
+
+        def generate_tests():
+            return ai_caller.call_model(prompt, stream=False)
+
+        def analyze_test_failure():
+            return ai_caller.call_model(prompt, stream=False)
+
+        generate_tests()
+        kwargs = mock_completion.call_args.kwargs
+        assert kwargs["response_format"] == {"type": "json_object"}
+        assert kwargs["messages"][1]["content"] == (
+            "Write tests\n\n" + AICaller.STRUCTURED_OUTPUT_INSTRUCTION
+        )
+        assert prompt["user"] == "Write tests"
+
+        analyze_test_failure()
+        assert "response_format" not in mock_completion.call_args.kwargs
+
+        ai_caller.model = "test-model"
+        generate_tests()
+        assert "response_format" not in mock_completion.call_args.kwargs
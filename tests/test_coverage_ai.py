@@ -542,3 +542,38 @@ class TestCoverAgent:
             os.remove(temp_source_file.name)
             os.remove(temp_test_file.name)
             os.remove(temp_output_file.name)
+
+    def test_validate_late_responses_until_target_coverage(self):
+        """
+        Test that the tests of the slower models of a speculative generation call are validated until the
+        desired coverage is reached, and that the remaining calls are then cancelled.
+        """
+        agent = CoverAgent.__new__(CoverAgent)
+        agent.logger = MagicMock()
+        agent.speculative_caller = MagicMock()
+        agent.speculative_caller.late_responses.return_value = iter(
+            [("strong", "yaml 1", 10, 20), ("stronger", "yaml 2", 30, 40)]
+        )
+        agent.speculative_caller.router.acceptance_rate.return_value = 0.5
+        agent.speculative_caller.pop_unreported_tokens.return_value = (40, 60)
+        agent.test_gen = MagicMock(total_input_token_count=0, total_output_token_count=0)
+        agent.test_gen.parse_tests_response.return_value = {"new_tests": [{}, {}]}
+        agent.test_validator = MagicMock(current_coverage=0.5, desired_coverage=90)
+
+        def validate_tests(generated_tests):
+            agent.test_validator.current_coverage = 0.95
+            return [{"status": "PASS"}, {"status": "FAIL"}]
+
+        agent.test_validator.validate_tests.side_effect = validate_tests
+
+        results = agent._validate_late_responses("python")
+
+        assert len(results) == 2
+        assert agent.test_validator.validate_tests.call_count == 1
+        # The tokens of every finished slower call are counted, validated or not
+        assert agent.test_gen.total_input_token_count == 40
+        assert agent.test_gen.total_output_token_count == 60
+        agent.speculative_caller.router.record_validation.assert_called_once_with(
+            "strong", "python", 2, 1
+        )
+        agent.speculative_caller.cancel_pending.assert_called_once()
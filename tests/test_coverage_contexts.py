@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from coverage_ai.coverage_contexts import (
+    context_node_id,
+    lines_by_test,
+    load_line_contexts,
+    node_ids_match,
+    numbits_to_lines,
+)
+
+
+def write_coverage_data(path, files, contexts, line_bits=(), arcs=()):
+    """Write a minimal coverage.py data file."""
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        """
+        create table file (id integer primary key, path text);
+        create table context (id integer primary key, context text);
+        create table line_bits (file_id integer, context_id integer, numbits blob);
+        create table arc (file_id integer, context_id integer, fromno integer, tono integer);
+        """
+    )
+    connection.executemany("insert into file values (?, ?)", enumerate(files, 1))
+    connection.executemany("insert into context values (?, ?)", enumerate(contexts, 1))
+    connection.executemany("insert into line_bits values (?, ?, ?)", line_bits)
+    connection.executemany("insert into arc values (?, ?, ?, ?)", arcs)
+    connection.commit()
+    connection.close()
+
+
+class TestCoverageContexts:
+    """Test suite for the coverage context helpers."""
+
+    def test_numbits_to_lines(self):
+        assert numbits_to_lines(b"\x14") == [2, 4]
+        assert numbits_to_lines(b"\x00\x01") == [8]
+        assert numbits_to_lines(b"") == []
+
+    @pytest.mark.parametrize(
+        "context,expected",
+        [
+            ("", ""),
+            ("tests/test_app.py::test_add|run", "tests/test_app.py::test_add"),
+            (
+                "tests/test_app.py::TestApp::test_add[1-2]|setup",
+                "tests/test_app.py::TestApp::test_add",
+            ),
+        ],
+    )
+    def test_context_node_id(self, context, expected):
+        assert context_node_id(context) == expected
+
+    def test_node_ids_match(self):
+        assert node_ids_match("tests/test_app.py::test_add", "tests/test_app.py::test_add")
+        assert node_ids_match("project/tests/test_app.py::test_add", "tests/test_app.py::test_add")
+        assert node_ids_match("test_app.py::test_add", "tests/test_app.py::test_add")
+        assert not node_ids_match("tests/test_app.py::TestA::test_add", "tests/test_app.py::test_add")
+        assert not node_ids_match("tests/test_other.py::test_add", "tests/test_app.py::test_add")
+        assert not node_ids_match("my_test_app.py::test_add", "test_app.py::test_add")
+        assert node_ids_match("", "")
+        assert not node_ids_match("", "test_app.py::test_add")
+
+    def test_load_line_contexts_lines_and_arcs(self, tmp_path):
+        data_file = str(tmp_path / ".coverage")
+        write_coverage_data(
+            data_file,
+            files=["/src/app.py", "/src/other.py"],
+            contexts=["", "test_app.py::test_a|run", "test_app.py::test_b|run"],
+            line_bits=[(1, 1, b"\x02"), (1, 2, b"\x0c")],
+            arcs=[(1, 3, -1, 2), (1, 3, 2, 4), (2, 3, 4, -1)],
+        )
+
+        line_contexts = load_line_contexts(data_file)
+
+        assert line_contexts["/src/app.py"] == {
+            "": {1},
+            "test_app.py::test_a|run": {2, 3},
+            "test_app.py::test_b|run": {2, 4},
+        }
+        assert lines_by_test(line_contexts, ["/src/app.py"]) == {
+            "": {("/src/app.py", 1)},
+            "test_app.py::test_a": {("/src/app.py", 2), ("/src/app.py", 3)},
+            "test_app.py::test_b": {("/src/app.py", 2), ("/src/app.py", 4)},
+        }
+
+    def test_load_line_contexts_invalid_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_line_contexts(str(tmp_path / "missing"))
+
+        not_coverage = tmp_path / "not_coverage"
+        not_coverage.write_text("plain text")
+        with pytest.raises(ValueError):
+            load_line_contexts(str(not_coverage))
@@ -1,42 +1,37 @@
-import xml.etree.ElementTree as ET
-
 import pytest
 
 from coverage_ai.coverage_processor import CoverageProcessor
+from coverage_ai.file_hash_cache import FileHashCache
+from coverage_ai.lru_cache import LRUCache
 
 
 @pytest.fixture
-def mock_xml_tree(monkeypatch):
+def mock_xml_tree(monkeypatch, tmp_path):
     """
-    Creates a mock function to simulate the ET.parse method, returning a mocked XML tree structure.
+    Writes a Cobertura XML report to "fake_path" in a temporary working directory.
     """
-
-    def mock_parse(file_path):
-        # Mock XML structure for the test
-        xml_str = """<coverage>
-                        <packages>
-                            <package>
-                                <classes>
-                                    <class filename="app.py">
-                                        <lines>
-                                            <line number="1" hits="1"/>
-                                            <line number="2" hits="0"/>
-                                        </lines>
-                                    </class>
-                                    <class filename="app.py">
-                                        <lines>
-                                            <line number="3" hits="1"/>
-                                            <line number="4" hits="0"/>
-                                        </lines>
-                                    </class>
-                                </classes>
-                            </package>
-                        </packages>
-                     </coverage>"""
-        root = ET.ElementTree(ET.fromstring(xml_str))
-        return root
-
-    monkeypatch.setattr("defusedxml.etree.ElementTree.parse", mock_parse)
+    xml_str = """<coverage>
+                    <packages>
+                        <package>
+                            <classes>
+                                <class filename="app.py">
+                                    <lines>
+                                        <line number="1" hits="1"/>
+                                        <line number="2" hits="0"/>
+                                    </lines>
+                                </class>
+                                <class filename="app.py">
+                                    <lines>
+                                        <line number="3" hits="1"/>
+                                        <line number="4" hits="0"/>
+                                    </lines>
+                                </class>
+                            </classes>
+                        </package>
+                    </packages>
+                 </coverage>"""
+    (tmp_path / "fake_path").write_text(xml_str)
+    monkeypatch.chdir(tmp_path)
 
 
 class TestCoverageProcessor:
@@ -348,12 +343,13 @@ class TestCoverageProcessor:
         with pytest.raises(KeyError):
             processor.parse_missed_covered_lines_jacoco_csv("com.example", "MyClass")
 
-    def test_parse_coverage_report_lcov_no_coverage_data(self, mocker):
+    def test_parse_coverage_report_lcov_no_coverage_data(self, tmp_path):
         """
         Tests that parse_coverage_report_lcov returns empty lists and 0 coverage when the lcov report contains no relevant data.
         """
-        mocker.patch("builtins.open", mocker.mock_open(read_data=""))
-        processor = CoverageProcessor("empty_report.lcov", "app.py", "lcov")
+        report_path = tmp_path / "empty_report.lcov"
+        report_path.write_text("")
+        processor = CoverageProcessor(str(report_path), "app.py", "lcov")
         covered_lines, missed_lines, coverage_pct = (
             processor.parse_coverage_report_lcov()
         )
@@ -361,7 +357,7 @@ class TestCoverageProcessor:
         assert missed_lines == [], "Expected no missed lines"
         assert coverage_pct == 0, "Expected 0% coverage"
 
-    def test_parse_coverage_report_lcov_with_coverage_data(self, mocker):
+    def test_parse_coverage_report_lcov_with_coverage_data(self, tmp_path):
         """
         Tests that parse_coverage_report_lcov correctly parses coverage data from an lcov report.
         """
@@ -372,8 +368,9 @@ class TestCoverageProcessor:
         DA:3,1
         end_of_record
         """
-        mocker.patch("builtins.open", mocker.mock_open(read_data=lcov_data))
-        processor = CoverageProcessor("report.lcov", "app.py", "lcov")
+        report_path = tmp_path / "report.lcov"
+        report_path.write_text(lcov_data)
+        processor = CoverageProcessor(str(report_path), "app.py", "lcov")
         covered_lines, missed_lines, coverage_pct = (
             processor.parse_coverage_report_lcov()
         )
@@ -381,7 +378,7 @@ class TestCoverageProcessor:
         assert missed_lines == [2], "Expected line 2 to be missed"
         assert coverage_pct == 2 / 3, "Expected 66.67% coverage"
 
-    def test_parse_coverage_report_lcov_with_multiple_files(self, mocker):
+    def test_parse_coverage_report_lcov_with_multiple_files(self, tmp_path):
         """
         Tests that parse_coverage_report_lcov correctly parses coverage data for the target file among multiple files in the lcov report.
         """
@@ -399,8 +396,9 @@ class TestCoverageProcessor:
         DA:1,1
         end_of_record
         """
-        mocker.patch("builtins.open", mocker.mock_open(read_data=lcov_data))
-        processor = CoverageProcessor("report.lcov", "app.py", "lcov")
+        report_path = tmp_path / "report.lcov"
+        report_path.write_text(lcov_data)
+        processor = CoverageProcessor(str(report_path), "app.py", "lcov")
         covered_lines, missed_lines, coverage_pct = (
             processor.parse_coverage_report_lcov()
         )
@@ -411,6 +409,88 @@ class TestCoverageProcessor:
         assert missed_lines == [2], "Expected line 2 to be missed for app.py"
         assert coverage_pct == 2 / 3, "Expected 66.67% coverage for app.py"
 
+    def test_parse_coverage_report_lcov_path_components(self, tmp_path):
+        """
+        Tests that parse_coverage_report_lcov picks the record whose path matches the most trailing
+        components of the source file, instead of the first record with the same basename.
+        """
+        lcov_data = (
+            "SF:/project/lib/index.js\nDA:1,0\nend_of_record\n"
+            "SF:src/index.js\nDA:1,1\nDA:2,0\nend_of_record\n"
+            "SF:src/index.js\nDA:2,3\nDA:4,0\nend_of_record\n"
+        )
+        report_path = tmp_path / "lcov.info"
+        report_path.write_text(lcov_data)
+        processor = CoverageProcessor(
+            str(report_path), str(tmp_path / "src" / "index.js"), "lcov"
+        )
+        coverage = processor.parse_coverage_report_lcov()
+        # Both records of src/index.js are merged: line 2 is covered by the second one
+        assert coverage == ([1, 2], [4], 2 / 3)
+
+        processor.src_file_path = "/project/lib/index.js"
+        assert processor.parse_coverage_report_lcov() == ([], [1], 0)
+
+    def test_parse_coverage_report_uses_report_cache(self, tmp_path, mocker):
+        """
+        Tests that parse_coverage_report parses an unchanged report once, and parses it again once it
+        is rewritten.
+        """
+        report_path = tmp_path / "lcov.info"
+        report_path.write_text("SF:app.py\nDA:1,1\nDA:2,0\nend_of_record\n")
+        processor = CoverageProcessor(str(report_path), "app.py", "lcov")
+        parse_lcov = mocker.spy(processor, "parse_coverage_report_lcov")
+
+        assert processor.parse_coverage_report() == ([1], [2], 0.5)
+        assert processor.parse_coverage_report() == ([1], [2], 0.5)
+        assert parse_lcov.call_count == 1
+        assert (processor.report_cache.hits, processor.report_cache.misses) == (1, 1)
+
+        report_path.write_text("SF:app.py\nDA:1,1\nDA:2,1\nDA:3,1\nend_of_record\n")
+        assert processor.parse_coverage_report() == ([1, 2, 3], [], 1.0)
+        assert parse_lcov.call_count == 2
+
+    def test_get_package_and_class_hashes_changed_sources_only(self, tmp_path, mocker):
+        """
+        Tests that get_package_and_class only reads and hashes the source file again once its size,
+        mtime or inode changes, and extracts the names again once its content changes.
+        """
+        source_path = tmp_path / "App.java"
+        source_path.write_text("package com.example;\n\npublic class App {}\n")
+        mocker.patch.object(CoverageProcessor, "_source_hash_cache", FileHashCache())
+        mocker.patch.object(CoverageProcessor, "_package_and_class_cache", LRUCache())
+        processor = CoverageProcessor("jacoco.xml", str(source_path), "jacoco")
+        extract = mocker.spy(processor, "extract_package_and_class_java")
+
+        assert processor.get_package_and_class() == ("com.example", "App")
+        assert processor.get_package_and_class() == ("com.example", "App")
+        assert extract.call_count == 1
+        assert CoverageProcessor._source_hash_cache.stats()["misses"] == 1
+
+        source_path.write_text("package com.example.app;\n\npublic class Main {}\n")
+        assert processor.get_package_and_class() == ("com.example.app", "Main")
+        assert extract.call_count == 2
+
+    def test_parse_coverage_report_lcov_all_files(self, tmp_path):
+        """
+        Tests that parse_coverage_report returns the coverage of every file of an lcov report when the
+        feature flag is enabled, and that the index of the report is rebuilt when the report changes.
+        """
+        report_path = tmp_path / "lcov.info"
+        report_path.write_text(
+            "SF:a.js\nDA:1,1\nDA:2,0\nend_of_record\nSF:b.js\nDA:1,0\nend_of_record\n"
+        )
+        processor = CoverageProcessor(
+            str(report_path), "a.js", "lcov", use_report_coverage_feature_flag=True
+        )
+        assert processor.parse_coverage_report() == {
+            "a.js": ([1], [2], 0.5),
+            "b.js": ([], [1], 0),
+        }
+
+        report_path.write_text("SF:c.js\nDA:7,2\nend_of_record\n")
+        assert processor.parse_coverage_report() == {"c.js": ([7], [], 1.0)}
+
     def test_parse_coverage_report_unsupported_type(self, mocker):
         """
         Tests that parse_coverage_report_jacoco raises a ValueError for unsupported JaCoCo report formats.
@@ -428,7 +508,7 @@ class TestCoverageProcessor:
         ):
             processor.parse_coverage_report_jacoco()
 
-    def test_parse_missed_covered_lines_jacoco_xml_no_source_file(self, mocker):
+    def test_parse_missed_covered_lines_jacoco_xml_no_source_file(self, mocker, tmp_path):
         """
         Tests that parse_missed_covered_lines_jacoco_xml returns empty lists when the source file is not found in the XML report.
         """
@@ -457,13 +537,11 @@ class TestCoverageProcessor:
                         </package>
                     </report>"""
 
-        mocker.patch(
-            "xml.etree.ElementTree.parse",
-            return_value=ET.ElementTree(ET.fromstring(xml_str)),
-        )
+        report_path = tmp_path / "coverage_report.xml"
+        report_path.write_text(xml_str)
 
         processor = CoverageProcessor(
-            "path/to/coverage_report.xml", "path/to/MySecondClass.java", "jacoco"
+            str(report_path), "path/to/MySecondClass.java", "jacoco"
         )
 
         # Action
@@ -475,7 +553,7 @@ class TestCoverageProcessor:
         assert missed == []
         assert covered == []
 
-    def test_parse_missed_covered_lines_jacoco_xml(self, mocker):
+    def test_parse_missed_covered_lines_jacoco_xml(self, mocker, tmp_path):
         """
         Tests parsing of missed and covered lines from a JaCoCo XML report.
         """
@@ -504,13 +582,11 @@ class TestCoverageProcessor:
                         </package>
                     </report>"""
 
-        mocker.patch(
-            "xml.etree.ElementTree.parse",
-            return_value=ET.ElementTree(ET.fromstring(xml_str)),
-        )
+        report_path = tmp_path / "coverage_report.xml"
+        report_path.write_text(xml_str)
 
         processor = CoverageProcessor(
-            "path/to/coverage_report.xml", "path/to/MyClass.java", "jacoco"
+            str(report_path), "path/to/MyClass.java", "jacoco"
         )
 
         # Action
@@ -520,7 +596,7 @@ class TestCoverageProcessor:
         assert missed == [39, 40, 41]
         assert covered == [35, 36, 37, 38]
 
-    def test_parse_missed_covered_lines_kotlin_jacoco_xml(self, mocker):
+    def test_parse_missed_covered_lines_kotlin_jacoco_xml(self, mocker, tmp_path):
         """
         Tests parsing of missed and covered lines from a JaCoCo XML report for a Kotlin file.
         """
@@ -549,13 +625,11 @@ class TestCoverageProcessor:
                         </package>
                     </report>"""
 
-        mocker.patch(
-            "xml.etree.ElementTree.parse",
-            return_value=ET.ElementTree(ET.fromstring(xml_str)),
-        )
+        report_path = tmp_path / "coverage_report.xml"
+        report_path.write_text(xml_str)
 
         processor = CoverageProcessor(
-            "path/to/coverage_report.xml", "path/to/MyClass.kt", "jacoco"
+            str(report_path), "path/to/MyClass.kt", "jacoco"
         )
 
         # Action
@@ -565,6 +639,50 @@ class TestCoverageProcessor:
         assert missed == [39, 40, 41]
         assert covered == [35, 36, 37, 38]
 
+    def test_parse_coverage_report_jacoco_xml_package_index(self, tmp_path):
+        """
+        Tests that parse_coverage_report_jacoco picks the source file of the class in its own package when
+        several packages have a source file with the same name.
+        """
+        source_path = tmp_path / "MyClass.java"
+        source_path.write_text("package com.example.b;\n\npublic class MyClass {\n}\n")
+        report_path = tmp_path / "jacoco.xml"
+        report_path.write_text(
+            '<report name="r">'
+            '<package name="com/example/a"><sourcefile name="MyClass.java">'
+            '<line nr="1" mi="1" ci="0"/></sourcefile></package>'
+            '<package name="com/example/b"><class name="com/example/b/MyClass"/>'
+            '<sourcefile name="MyClass.java">'
+            '<line nr="3" mi="0" ci="2"/><line nr="4" mi="2" ci="0"/></sourcefile></package>'
+            "</report>"
+        )
+        processor = CoverageProcessor(str(report_path), str(source_path), "jacoco")
+
+        assert processor.parse_coverage_report_jacoco() == ([3], [4], 0.5)
+        assert processor.parse_missed_covered_lines_jacoco_xml("MyClass") == ([1], [])
+
+    def test_parse_coverage_report_jacoco_csv_index(self, tmp_path, mocker):
+        """
+        Tests that a JaCoCo CSV report is read once while it does not change, and that the package and
+        class of an unchanged source file are extracted once.
+        """
+        source_path = tmp_path / "Indexed.java"
+        source_path.write_text("package com.indexed;\n\npublic class Indexed {\n}\n")
+        report_path = tmp_path / "jacoco.csv"
+        report_path.write_text(
+            "GROUP,PACKAGE,CLASS,LINE_MISSED,LINE_COVERED\n"
+            "app,com.other,Indexed,9,0\n"
+            "app,com.indexed,Indexed,1,3\n"
+        )
+        processor = CoverageProcessor(str(report_path), str(source_path), "jacoco")
+        index_csv = mocker.spy(processor, "_index_jacoco_csv")
+        extract = mocker.spy(processor, "extract_package_and_class_java")
+
+        assert processor.parse_coverage_report_jacoco() == ([], [], 0.75)
+        assert processor.parse_coverage_report_jacoco() == ([], [], 0.75)
+        assert index_csv.call_count == 1
+        assert extract.call_count == 1
+
     def test_get_file_extension_with_valid_file_extension(self):
         """
         Tests that get_file_extension correctly extracts the file extension from a valid file name.
@@ -804,3 +922,39 @@ class TestCoverageProcessor:
         assert covered_lines == []
         assert missed_lines == []
         assert coverage_pct == 0.0
+
+    def test_parse_coverage_report_cobertura_source_file_match(self, tmp_path):
+        """
+        Tests that classes of the source file itself are preferred over files that share its basename,
+        and that parsing stops after the package holding the source file.
+        """
+        report = tmp_path / "coverage.xml"
+        report.write_text(
+            f"""<coverage>
+                <sources><source>{tmp_path}</source></sources>
+                <packages>
+                    <package name="other">
+                        <classes>
+                            <class filename="other/app.py">
+                                <lines><line number="9" hits="1"/></lines>
+                            </class>
+                        </classes>
+                    </package>
+                    <package name="src">
+                        <classes>
+                            <class filename="src/app.py">
+                                <lines><line number="2" hits="1"/><line number="1" hits="0"/></lines>
+                            </class>
+                        </classes>
+                    </package>
+                    <package name="broken">
+                        <classes><class filename="src/app.py"><lines><line number="x"
+            """
+        )
+        processor = CoverageProcessor(str(report), str(tmp_path / "src" / "app.py"), "cobertura")
+
+        covered_lines, missed_lines, coverage_pct = processor.parse_coverage_report()
+
+        assert covered_lines == [2]
+        assert missed_lines == [1]
+        assert coverage_pct == 0.5
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from coverage_ai.default_agent_completion import DefaultAgentCompletion
+from coverage_ai.prompt_templates import PromptTemplateRegistry
 
 
 class TestDefaultAgentCompletion:
@@ -40,6 +41,53 @@ class TestDefaultAgentCompletion:
             mock_build_prompt.assert_called_once()
             mock_caller.call_model.assert_called_once()
 
+    def test_generate_tests_cache_prefix(self):
+        """
+        Test that the stable part of the test generation prompt is passed to the caller as the cache prefix,
+        and that the failed tests and coverage report come after it.
+        """
+        mock_caller = MagicMock()
+        mock_caller.call_model.return_value = ("test response", 100, 50)
+        agent = DefaultAgentCompletion(caller=mock_caller, generate_log_files=False)
+
+        result = agent.generate_tests(
+            source_file_name="test.py",
+            max_tests=5,
+            source_file_numbered="1 code",
+            code_coverage_report="Lines still missed: 1",
+            language="python",
+            test_file="test content",
+            test_file_name="test_file.py",
+            testing_framework="pytest",
+            additional_instructions_text="Use fixtures",
+            additional_includes_section="included content",
+            failed_tests_section="failed test content",
+        )
+
+        user_prompt = result[3]
+        cache_prefix = mock_caller.call_model.call_args.kwargs["cache_prefix"]
+        assert user_prompt.startswith(cache_prefix)
+        for stable_content in ["1 code", "included content", "test content", "Use fixtures"]:
+            assert stable_content in cache_prefix
+        volatile_part = user_prompt[len(cache_prefix) :]
+        assert volatile_part.startswith("\n## Previous Iterations Failed Tests\n")
+        assert "failed test content" in volatile_part
+        assert "Lines still missed: 1" in volatile_part
+
+    def test_get_cache_prefix(self):
+        """
+        Test that the cache prefix ends at the first volatile section, searched from the end of the prompt.
+        """
+        headers = DefaultAgentCompletion.TEST_GENERATION_VOLATILE_HEADERS
+        prompt = "stable\n## Code Coverage\nquoted\n## Code Coverage\nreport"
+        assert (
+            DefaultAgentCompletion._get_cache_prefix(prompt, headers)
+            == "stable\n## Code Coverage\nquoted"
+        )
+        prompt = "stable\n## Previous Iterations Failed Tests\nfailed\n## Code Coverage\nreport"
+        assert DefaultAgentCompletion._get_cache_prefix(prompt, headers) == "stable"
+        assert DefaultAgentCompletion._get_cache_prefix("no sections", headers) == ""
+
     def test_adapt_test_command_success(self):
         """
         Test the adapt_test_command_for_a_single_test_via_ai method to ensure it correctly
@@ -126,6 +174,29 @@ class TestDefaultAgentCompletion:
 
             assert result == {"system": "Hello World", "user": "Test 42"}
 
+    def test_build_prompt_reuses_compiled_templates(self):
+        """
+        Test that the templates of a prompt are compiled once and reused by later calls.
+        """
+        agent = DefaultAgentCompletion(caller=MagicMock())
+        mock_settings = MagicMock()
+        mock_settings.system = "System {{ name }}"
+        mock_settings.user = "User {{ value }}"
+
+        with patch(
+            "coverage_ai.default_agent_completion.get_settings"
+        ) as mock_get_settings, patch.object(
+            PromptTemplateRegistry, "_shared", {}
+        ):
+            mock_get_settings.return_value = {"reused_prompt": mock_settings}
+
+            agent._build_prompt("reused_prompt", name="a", value=1)
+            result = agent._build_prompt("reused_prompt", name="b", value=2)
+
+            assert result == {"system": "System b", "user": "User 2"}
+            stats = PromptTemplateRegistry.get_shared(autoescape=True).stats()
+            assert (stats["hits"], stats["misses"]) == (2, 2)
+
     def test_adapt_test_command_yaml_parsing_error(self):
         """
         Test the adapt_test_command_for_a_single_test_via_ai method to ensure it returns
@@ -0,0 +1,90 @@
+from coverage_ai.failure_store import (
+    NO_COVERAGE_INCREASE_MESSAGE,
+    FailureStore,
+    error_signature,
+    trim_test_output,
+)
+
+
+class TestFailureStore:
+    """Test suite for the FailureStore class."""
+
+    def test_error_signature(self):
+        output = (
+            "tests/test_app.py:12: in test_add\n"
+            "E   AssertionError: assert 3 == 4\n"
+            "FAILED tests/test_app.py::test_add"
+        )
+        assert error_signature("analysis", output) == "assertionerror: assert <n> == <n>"
+        assert error_signature(
+            "ModuleNotFoundError: No module named 'app.utils' in /project/src/app.py line 3"
+        ) == "modulenotfounderror: no module named <str> in <path> line <n>"
+        assert error_signature("Test did not increase code coverage", "collected 3 items") == (
+            "test did not increase code coverage"
+        )
+
+    def test_clusters_by_error_signature(self):
+        store = FailureStore()
+        store.append({"code": {"test_name": "test_a"}, "error_message": "Test did not increase code coverage"})
+        store.append(
+            {"code": {"test_name": "test_b"}, "error_message": "analysis b"},
+            error_output="E   AssertionError: assert 1 == 2",
+        )
+        store.append(
+            {"code": {"test_name": "test_c"}, "error_message": "analysis c"},
+            error_output="E   AssertionError: assert 3 == 4",
+        )
+
+        # The most recent test of each cluster is kept, least recently seen cluster first
+        assert store == [
+            {"code": {"test_name": "test_a"}, "error_message": "Test did not increase code coverage"},
+            {
+                "code": {"test_name": "test_c"},
+                "error_message": "analysis c",
+                "count": 2,
+            },
+        ]
+        assert len(store) == 2
+        assert store.total_count == 3
+        assert store[0]["code"]["test_name"] == "test_a"
+
+    def test_keeps_every_test_that_did_not_increase_coverage(self):
+        store = FailureStore()
+        for name in ["test_a", "test_b", "test_a"]:
+            store.append({"code": {"test_name": name}, "error_message": NO_COVERAGE_INCREASE_MESSAGE})
+        store.append({"code": "def test_c():\n    pass", "error_message": NO_COVERAGE_INCREASE_MESSAGE})
+
+        assert [failed["code"] for failed in store] == [
+            {"test_name": "test_b"},
+            {"test_name": "test_a"},
+            "def test_c():\n    pass",
+        ]
+        assert store[1]["count"] == 2
+
+    def test_without_clustering(self):
+        store = FailureStore(cluster=False)
+        for name in ["test_a", "test_b"]:
+            store.append({"code": {"test_name": name}, "error_message": "same error"})
+        assert [failed["code"]["test_name"] for failed in store] == ["test_a", "test_b"]
+        assert not FailureStore()
+
+    def test_trim_test_output(self):
+        output = "\n".join(
+            [f"collected item {i}" for i in range(100)]
+            + ["tests/test_app.py:12: in test_add", "E   AssertionError: assert 3 == 4"]
+            + [f"log line {i}" for i in range(100)]
+        )
+        assert trim_test_output(output, max_lines=0) == output
+        assert trim_test_output("short output", max_lines=5) == "short output"
+        assert trim_test_output(output, max_lines=10).split("\n") == [
+            "...",
+            "collected item 98",
+            "collected item 99",
+            "tests/test_app.py:12: in test_add",
+            "E   AssertionError: assert 3 == 4",
+            "log line 0",
+            "log line 1",
+            "...",
+        ]
+        # Without relevant lines, the end of the output is kept
+        assert trim_test_output("\n".join(str(i) for i in range(10)), max_lines=2) == "...\n8\n9"
@@ -0,0 +1,65 @@
+from coverage_ai.file_coverage import (
+    FileCoverage,
+    bits_to_lines,
+    count_bits,
+    format_line_ranges,
+    lines_to_bits,
+)
+
+
+class TestFileCoverage:
+    """Test suite for the bitmap-backed FileCoverage model."""
+
+    def test_lines_round_trip(self):
+        lines = [1, 7, 8, 9, 64, 1000]
+        bits = lines_to_bits(reversed(lines))
+        assert bits_to_lines(bits) == lines
+        assert count_bits(bits) == len(lines)
+        assert lines_to_bits([]) == 0
+        assert bits_to_lines(0) == []
+
+    def test_format_line_ranges(self):
+        assert format_line_ranges([10, 1, 2, 3, 7, 9, 2]) == "1-3, 7, 9-10"
+        assert format_line_ranges([5]) == "5"
+        assert format_line_ranges([]) == ""
+
+    def test_unpacks_like_a_tuple(self):
+        coverage = FileCoverage.from_lines([3, 1, 2], [5, 4, 2])
+        lines_covered, lines_missed, percentage = coverage
+        assert lines_covered == [1, 2, 3]
+        # A line reported as both covered and missed counts as covered
+        assert lines_missed == [4, 5]
+        assert percentage == 0.6
+        assert coverage == ([1, 2, 3], [4, 5], 0.6)
+        assert coverage.total_count == 5
+
+    def test_empty_coverage(self):
+        coverage = FileCoverage()
+        assert coverage == ([], [], 0)
+        assert not coverage.has_lines
+
+    def test_from_counts(self):
+        coverage = FileCoverage.from_counts(3, 1)
+        assert coverage == ([], [], 0.75)
+        assert coverage.total_count == 4
+        assert not coverage.has_lines
+
+    def test_union_and_newly_covered(self):
+        baseline = FileCoverage.from_lines([1, 2], [3, 4, 5])
+        run = FileCoverage.from_lines([1, 3], [2, 4, 5])
+        merged = baseline | run
+        assert merged == FileCoverage.from_lines([1, 2, 3], [4, 5])
+        assert merged.newly_covered(baseline).covered_lines == [3]
+        assert baseline.newly_covered(merged).covered_lines == []
+
+    def test_restricted_to(self):
+        baseline = FileCoverage.from_lines([1], [2])
+        run = FileCoverage.from_lines([1, 2, 10], [11])
+        assert run.restricted_to(baseline) == FileCoverage.from_lines([1, 2], [])
+
+    def test_bytes_round_trip(self):
+        coverage = FileCoverage.from_lines([1, 2, 300], [4, 5000])
+        data = coverage.to_bytes()
+        assert len(data) < 4 + 2 * (5000 // 8 + 1)
+        assert FileCoverage.from_bytes(data) == coverage
+        assert FileCoverage.from_bytes(FileCoverage().to_bytes()) == FileCoverage()
@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+import pytest
+
+from coverage_ai.file_hash_cache import FileHashCache
+
+
+class TestFileHashCache:
+    """Test suite for the FileHashCache class."""
+
+    def test_reads_a_file_once_per_version(self, tmp_path):
+        cache = FileHashCache()
+        path = tmp_path / "test_app.py"
+        path.write_text("def test_one(): pass\n")
+
+        first = cache.hexdigest(str(path))
+        assert first == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert cache.hexdigest(str(path)) == first
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "max_entries": 256}
+
+        # A rewrite changes the size and mtime_ns of the file, so it is hashed again
+        path.write_text("def test_one(): pass\ndef test_two(): pass\n")
+        assert cache.hexdigest(str(path)) == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert cache.misses == 2
+
+    def test_replaced_file_with_the_same_size_and_mtime(self, tmp_path):
+        cache = FileHashCache()
+        path = tmp_path / "app.py"
+        path.write_text("a = 1\n")
+        stat = os.stat(path)
+        first = cache.hexdigest(str(path))
+
+        # A new file moved over the old one has a new inode
+        replacement = tmp_path / "replacement.py"
+        replacement.write_text("a = 2\n")
+        os.utime(replacement, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(replacement, path)
+        assert cache.hexdigest(str(path)) != first
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            FileHashCache().hexdigest(str(tmp_path / "missing.py"))
+
+    def test_disabled_and_clear(self, tmp_path):
+        path = tmp_path / "app.py"
+        path.write_text("a = 1\n")
+        disabled = FileHashCache(max_entries=0)
+        disabled.hexdigest(str(path))
+        disabled.hexdigest(str(path))
+        assert disabled.stats()["misses"] == 2
+
+        cache = FileHashCache(algorithm="blake2b")
+        assert cache.hexdigest(str(path)) == hashlib.blake2b(b"a = 1\n").hexdigest()
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "max_entries": 256}
@@ -0,0 +1,81 @@
+import asyncio
+
+from unittest.mock import patch
+
+import httpx
+import litellm
+
+from coverage_ai.http_session_pool import HTTPSessionPool
+
+
+class TestHTTPSessionPool:
+    """Test suite for the HTTPSessionPool class."""
+
+    def test_shares_one_keep_alive_client(self):
+        pool = HTTPSessionPool(
+            http2=False,
+            max_connections=5,
+            max_keepalive_connections=3,
+            keepalive_expiry_sec=30.0,
+        )
+        with patch("coverage_ai.http_session_pool.httpx.Client") as mock_client:
+            client = pool.get_client()
+            assert pool.get_client() is client
+            mock_client.assert_called_once()
+            kwargs = mock_client.call_args.kwargs
+            assert kwargs["limits"] == httpx.Limits(
+                max_connections=5, max_keepalive_connections=3, keepalive_expiry=30.0
+            )
+            assert kwargs["http2"] is False
+
+            pool.close()
+            client.close.assert_called_once()
+            pool.get_client()
+            assert mock_client.call_count == 2
+
+    def test_install_hands_the_client_to_litellm(self):
+        pool = HTTPSessionPool()
+        previous_session = litellm.client_session
+        try:
+            pool.install()
+            assert litellm.client_session is pool.get_client()
+            pool.close()
+            assert litellm.client_session is None
+        finally:
+            litellm.client_session = previous_session
+
+    def test_install_shared_installs_the_client_once(self):
+        previous_session = litellm.client_session
+        pool = HTTPSessionPool()
+        try:
+            with patch.object(HTTPSessionPool, "get_shared", return_value=pool):
+                assert HTTPSessionPool.install_shared() is pool
+            assert litellm.client_session is pool.get_client()
+            with patch.object(HTTPSessionPool, "get_shared", return_value=None):
+                assert HTTPSessionPool.install_shared() is None
+        finally:
+            pool.close()
+            litellm.client_session = previous_session
+
+    def test_one_async_client_per_event_loop(self):
+        pool = HTTPSessionPool()
+
+        async def get_clients():
+            return pool.get_async_client(), pool.get_async_client()
+
+        first, same = asyncio.run(get_clients())
+        second, _ = asyncio.run(get_clients())
+        assert first is same
+        assert first is not second
+
+    def test_http2_needs_h2(self):
+        with patch.object(HTTPSessionPool, "http2_available", return_value=False):
+            assert not HTTPSessionPool(http2=True).http2
+        with patch.object(HTTPSessionPool, "http2_available", return_value=True):
+            assert HTTPSessionPool(http2=True).http2
+        assert not HTTPSessionPool(http2=False).http2
+
+    def test_get_shared_is_disabled_by_settings(self):
+        with patch("coverage_ai.http_session_pool.get_settings") as mock_settings:
+            mock_settings.return_value.get.return_value = {"enabled": False}
+            assert HTTPSessionPool.get_shared() is None
@@ -188,6 +188,37 @@ test_name:"""
         yaml_str = "```yaml\ninvalid_yaml: [unclosed_list\n```"
         assert load_yaml(yaml_str) is None
 
+    def test_load_yaml_json_response(self, mocker):
+        """
+        Tests that JSON responses (structured output) are decoded as JSON without parsing them as YAML.
+        """
+        safe_load_yaml = mocker.patch("coverage_ai.utils.safe_load_yaml")
+        json_str = '```json\n{"language": "python", "new_tests": [{"test_name": "test_a"}]}\n```'
+        assert load_yaml(json_str) == {
+            "language": "python",
+            "new_tests": [{"test_name": "test_a"}],
+        }
+        safe_load_yaml.assert_not_called()
+
+    def test_try_fix_yaml_skips_lines_up_to_the_parse_error(self, mocker):
+        """
+        Tests that removing last lines skips at once the lines from a parse error on, including the start of an
+        unterminated quote, instead of reparsing the text once per removed line.
+        """
+        from coverage_ai import utils
+        from coverage_ai.utils import try_fix_yaml
+
+        body = "\n".join(f"line_{i}: value {i}" for i in range(200))
+        yaml_str = f"language: python\n{body}\nbroken: 'unterminated\n{body}\nhope this helps!"
+        safe_load_yaml = mocker.spy(utils, "safe_load_yaml")
+
+        data = try_fix_yaml(yaml_str)
+
+        assert data["language"] == "python"
+        assert data["line_199"] == "value 199"
+        assert "broken" not in data
+        assert safe_load_yaml.call_count < 10
+
     def test_parse_args_full_repo_defaults_with_imports(self):
         """
         Tests that parse_args_full_repo correctly parses command-line arguments.
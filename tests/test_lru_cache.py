@@ -0,0 +1,39 @@
+from coverage_ai.lru_cache import LRUCache
+from coverage_ai.report_cache import ReportCache
+
+
+class TestLRUCache:
+    """Test suite for the LRUCache class."""
+
+    def test_hits_and_misses(self):
+        cache = LRUCache(max_entries=2)
+        assert cache.get("a") is None
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "max_entries": 2}
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.put("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_disabled_and_clear(self):
+        disabled = LRUCache(max_entries=0)
+        disabled.put("a", 1)
+        assert disabled.get("a") is None
+
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "max_entries": 128}
+
+    def test_report_cache_is_a_small_lru_cache(self):
+        cache = ReportCache()
+        assert isinstance(cache, LRUCache)
+        assert cache.max_entries == 8
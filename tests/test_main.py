@@ -105,8 +105,14 @@ class TestMain:
 
     @patch("coverage_ai.settings.config_loader.get_settings")
     @patch("coverage_ai.main.CoverAgent")
+    @patch("coverage_ai.main.HTTPSessionPool")
     def test_main_source_file_not_found(
-        self, mock_coverage_ai, mock_get_settings, mock_settings, base_args
+        self,
+        mock_http_session_pool,
+        mock_coverage_ai,
+        mock_get_settings,
+        mock_settings,
+        base_args,
     ):
         """Test FileNotFoundError when source file is not found."""
         mock_get_settings.return_value = {"default": mock_settings}
@@ -128,8 +134,14 @@ class TestMain:
 
     @patch("coverage_ai.settings.config_loader.get_settings")
     @patch("coverage_ai.main.CoverAgent")
+    @patch("coverage_ai.main.HTTPSessionPool")
     def test_main_test_file_not_found(
-        self, mock_coverage_ai, mock_get_settings, mock_settings, base_args
+        self,
+        mock_http_session_pool,
+        mock_coverage_ai,
+        mock_get_settings,
+        mock_settings,
+        base_args,
     ):
         """Test FileNotFoundError when test file is not found."""
         mock_get_settings.return_value = {"default": mock_settings}
@@ -151,8 +163,14 @@ class TestMain:
 
     @patch("coverage_ai.settings.config_loader.get_settings")
     @patch("coverage_ai.main.CoverAgent")
+    @patch("coverage_ai.main.HTTPSessionPool")
     def test_main_calls_agent_run(
-        self, mock_coverage_ai, mock_get_settings, mock_settings, base_args
+        self,
+        mock_http_session_pool,
+        mock_coverage_ai,
+        mock_get_settings,
+        mock_settings,
+        base_args,
     ):
         """Test that main correctly initializes and runs the CoverAgent."""
         mock_get_settings.return_value = {"default": mock_settings}
@@ -165,6 +183,7 @@ class TestMain:
 
             mock_coverage_ai.assert_called_once()
             mock_agent.run.assert_called_once()
+            mock_http_session_pool.install_shared.assert_called_once()
 
     @patch("coverage_ai.settings.config_loader.get_settings")
     def test_parse_args_with_max_run_time(self, mock_get_settings, mock_settings):
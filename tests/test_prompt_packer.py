@@ -0,0 +1,97 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from coverage_ai.prompt_packer import PromptPacker
+
+
+SOURCE_CODE = "\n".join(
+    [
+        "import math",
+        "",
+        "def area(radius):",
+        "    squared = radius * radius",
+        "    result = math.pi * squared",
+        "    return result",
+        "",
+        "def perimeter(radius):",
+        "    doubled = 2 * radius",
+        "    result = math.pi * doubled",
+        "    return result",
+        "",
+        "def describe(radius):",
+        "    if radius < 0:",
+        "        raise ValueError('negative radius')",
+        "    return f'circle of radius {radius}'",
+    ]
+)
+
+
+class TestPromptPacker:
+    """Test suite for the PromptPacker class."""
+
+    @pytest.fixture(autouse=True)
+    def word_encoder(self):
+        """Count one token per word, so that budgets are easy to follow and no encoding has to be downloaded."""
+        with patch(
+            "coverage_ai.prompt_packer.TokenEncoder.get_token_encoder",
+            return_value=Mock(encode=str.split),
+        ):
+            yield
+
+    def test_pack_source_within_budget(self, tmp_path):
+        packer = PromptPacker(generate_log_files=False)
+        source_file = tmp_path / "circle.py"
+        source_file.write_text(SOURCE_CODE)
+        packed = packer.pack_source(SOURCE_CODE, str(source_file), missed_lines=[15])
+        assert packed.split("\n")[0] == "1 import math"
+        assert packed.split("\n")[14] == "15         raise ValueError('negative radius')"
+        assert "omitted" not in packed
+
+    def test_pack_source_keeps_missed_lines_and_signatures(self, tmp_path):
+        source_file = tmp_path / "circle.py"
+        source_file.write_text(SOURCE_CODE)
+        # The missed line (5 tokens with its newline), the 3 signatures (4 tokens each), and line 14 (6 tokens)
+        packer = PromptPacker(source_file_tokens=23, generate_log_files=False)
+
+        packed = packer.pack_source(SOURCE_CODE, str(source_file), missed_lines=[15])
+
+        packed_lines = packed.split("\n")
+        assert "15         raise ValueError('negative radius')" in packed_lines
+        # The signatures of the covered functions are kept, their bodies are omitted
+        assert "3 def area(radius):" in packed_lines
+        assert "8 def perimeter(radius):" in packed_lines
+        assert "4     squared = radius * radius" not in packed_lines
+        assert "... (lines 4-7 omitted)" in packed_lines
+        assert packed_lines[-1] == "... (line 16 omitted)"
+
+    def test_pack_source_ranks_lines_by_distance(self, tmp_path):
+        source_file = tmp_path / "data.txt"  # No definitions can be found for this file
+        source_code = "\n".join(f"line {i}" for i in range(1, 21))
+        source_file.write_text(source_code)
+        packer = PromptPacker(source_file_tokens=12, generate_log_files=False)
+
+        packed = packer.pack_source(source_code, str(source_file), missed_lines=[10])
+
+        assert packed.split("\n") == [
+            "... (lines 1-8 omitted)",
+            "9 line 9",
+            "10 line 10",
+            "11 line 11",
+            "... (lines 12-20 omitted)",
+        ]
+
+    def test_pack_test_file_and_included_files(self):
+        packer = PromptPacker(
+            test_file_tokens=20, included_files_tokens=0, generate_log_files=False
+        )
+        test_code = "\n".join(f"def test_{i}():\n    assert True" for i in range(50))
+        packed = packer.pack_test_file(test_code)
+        assert packed.startswith("def test_0():")
+        assert packed.endswith("...(truncated)")
+        assert packer.pack_included_files(test_code) == test_code
+
+    def test_pack_failed_tests_keeps_most_recent(self):
+        packer = PromptPacker(failed_tests_tokens=8, generate_log_files=False)
+        failed_tests = ["first failure " * 3, "second failure", "third failure"]
+        assert packer.pack_failed_tests(failed_tests) == ["second failure", "third failure"]
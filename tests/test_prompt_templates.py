@@ -0,0 +1,40 @@
+import pytest
+
+from jinja2 import UndefinedError
+
+from coverage_ai.prompt_templates import PromptTemplateRegistry
+
+
+class TestPromptTemplateRegistry:
+    """Test suite for the PromptTemplateRegistry class."""
+
+    def test_compiles_a_template_once(self):
+        registry = PromptTemplateRegistry()
+        template = registry.get_template("prompt.user", "Test {{ value }}")
+        assert registry.get_template("prompt.user", "Test {{ value }}") is template
+        rendered = registry.render("prompt.user", "Test {{ value }}", {"value": 42})
+        assert rendered == "Test 42"
+        assert registry.stats() == {"hits": 2, "misses": 1, "templates": 1}
+
+    def test_recompiles_a_changed_template(self):
+        registry = PromptTemplateRegistry()
+        assert registry.render("prompt.user", "Test {{ v }}", {"v": 1}) == "Test 1"
+        assert registry.render("prompt.user", "New {{ v }}", {"v": 1}) == "New 1"
+        assert registry.stats() == {"hits": 0, "misses": 2, "templates": 1}
+        registry.clear()
+        assert registry.stats() == {"hits": 0, "misses": 0, "templates": 0}
+
+    def test_strict_undefined_and_autoescape(self):
+        with pytest.raises(UndefinedError):
+            PromptTemplateRegistry().render("prompt.user", "{{ missing }}", {})
+        escaping = PromptTemplateRegistry(autoescape=True)
+        assert escaping.render("p", "{{ v }}", {"v": "<a>"}) == "&lt;a&gt;"
+        verbatim = PromptTemplateRegistry(autoescape=False)
+        assert verbatim.render("p", "{{ v }}", {"v": "<a>"}) == "<a>"
+
+    def test_one_shared_registry_per_autoescape_setting(self):
+        shared = PromptTemplateRegistry.get_shared()
+        assert PromptTemplateRegistry.get_shared() is shared
+        escaping = PromptTemplateRegistry.get_shared(autoescape=True)
+        assert escaping is not shared
+        assert escaping.environment.autoescape
@@ -1,4 +1,5 @@
 import hashlib
+import json
 
 from pathlib import Path
 from unittest.mock import Mock, mock_open, patch
@@ -6,6 +7,7 @@ from unittest.mock import Mock, mock_open, patch
 import pytest
 import yaml
 
+from coverage_ai.file_hash_cache import FileHashCache
 from coverage_ai.record_replay_manager import RecordReplayManager
 
 
@@ -109,6 +111,32 @@ class TestFileHandling:
             else:
                 assert result == test_case["expected"]["value"]
 
+    @staticmethod
+    def test_calculate_files_hash_reuses_file_hashes_across_managers(tmp_path):
+        """
+        Test that a second manager hashing the same unchanged files reads them from the shared file hash cache,
+        and gets the same combined SHA-256 hash used in response file names.
+        """
+        source_file = tmp_path / "source.py"
+        test_file = tmp_path / "test.py"
+        source_file.write_text("def add(a, b): return a + b")
+        test_file.write_text("def test_add(): assert add(1, 2) == 3")
+        expected_hash = hashlib.sha256(
+            (
+                hashlib.sha256(source_file.read_bytes()).hexdigest()
+                + hashlib.sha256(test_file.read_bytes()).hexdigest()
+            ).encode()
+        ).hexdigest()
+
+        with patch.object(RecordReplayManager, "file_hash_cache", FileHashCache()):
+            first = RecordReplayManager(record_mode=False)
+            second = RecordReplayManager(record_mode=False)
+            assert first._calculate_files_hash(str(source_file), str(test_file)) == expected_hash
+            assert second._calculate_files_hash(str(source_file), str(test_file)) == expected_hash
+            stats = RecordReplayManager.file_hash_cache.stats()
+
+        assert (stats["hits"], stats["misses"]) == (2, 2)
+
     @staticmethod
     def test_get_response_file_path_handle_source_path_with_no_parent_directory(
         tmp_path,
@@ -383,6 +411,37 @@ class TestFuzzyMatching:
 
         assert result == "hash1"
 
+    @staticmethod
+    def test_find_closest_prompt_match_caches_sorted_prefixes_and_logs_once():
+        """
+        Test that the token-sorted prefix of each recorded prompt is computed once across lookups, and
+        that a lookup logs a single summary line instead of one line per comparison.
+        """
+        logger = Mock()
+        manager = RecordReplayManager(record_mode=True, logger=logger)
+        recorded_prompts = {
+            f"hash{i}": f"Find all prime numbers below {i}00, then sort them" for i in range(50)
+        }
+        logger.info.reset_mock()
+
+        with patch.object(
+            RecordReplayManager,
+            "_sort_tokens",
+            wraps=RecordReplayManager._sort_tokens,
+        ) as mock_sort_tokens:
+            for _ in range(3):
+                result = manager._find_closest_prompt_match(
+                    "then sort them: find all prime numbers below 4200",
+                    recorded_prompts,
+                    threshold=80,
+                    prefix_length=None,
+                )
+
+        assert result == "hash42"
+        # Once per recorded prompt, and once for the current prompt of each lookup
+        assert mock_sort_tokens.call_count == 50 + 3
+        assert logger.info.call_count == 3
+
 
 class TestResponseHandling:
     """
@@ -917,29 +976,36 @@ class TestResponseHandling:
             test_case["completion_tokens"],
         )
 
+        record_file = manager._get_record_file_path(response_file)
         if not test_case["record_mode"]:
             assert not response_file.exists()
+            assert not record_file.exists()
             return
 
-        assert response_file.exists()
-        with open(response_file, "r") as f:
-            data = yaml.safe_load(f)
+        assert record_file.exists()
+        with open(record_file, "r") as f:
+            lines = [json.loads(line) for line in f]
 
-        assert isinstance(data, dict)
-        assert "metadata" in data
-        assert data["metadata"] == test_case["expected_metadata"]
-
-        if test_case["validate_existing"]:
-            assert "existing_hash" in data["unknown_caller"]
+        assert lines[0] == {"metadata": test_case["expected_metadata"]}
 
         prompt_hash = hashlib.sha256(str(test_case["prompt"]).encode()).hexdigest()
         truncated_hash = prompt_hash[: RecordReplayManager.HASH_DISPLAY_LENGTH]
-        entry = data["unknown_caller"][truncated_hash]
+        assert lines[-1] == {
+            "caller": "unknown_caller",
+            "prompt_hash": truncated_hash,
+            "prompt": test_case["prompt"],
+            "response": test_case["response"],
+            "prompt_tokens": test_case["prompt_tokens"],
+            "completion_tokens": test_case["completion_tokens"],
+        }
 
-        assert entry["prompt"] == test_case["prompt"]
-        assert entry["response"] == test_case["response"]
-        assert entry["prompt_tokens"] == test_case["prompt_tokens"]
-        assert entry["completion_tokens"] == test_case["completion_tokens"]
+        # A new manager reads the legacy YAML responses and the recorded responses
+        index = RecordReplayManager(record_mode=False, base_dir=str(tmp_path))._load_index(
+            response_file
+        )
+        if test_case["validate_existing"]:
+            assert "existing_hash" in index["unknown_caller"]
+        assert index["unknown_caller"][truncated_hash]["response"] == test_case["response"]
 
     @staticmethod
     def test_load_recorded_response_direct_hash_hit(tmp_path):
@@ -1084,3 +1150,65 @@ class TestResponseHandling:
 
         # Verify results
         assert result is None
+
+    @staticmethod
+    def test_recorded_responses_are_replayed_from_the_index(tmp_path):
+        """
+        Test that responses are appended to the JSONL record file, and replayed from the in-memory index
+        without reading the file again.
+        """
+        recorder = RecordReplayManager(record_mode=True, base_dir=str(tmp_path))
+        recorder._calculate_files_hash = Mock(return_value="hash123")
+        for i in range(3):
+            recorder.record_response(
+                "source.py", "test.py", {"user": f"prompt {i}"}, f"response {i}", i, i
+            )
+        record_file = recorder._get_record_file_path(
+            recorder._get_response_file_path("source.py", "test.py")
+        )
+        assert len(record_file.read_text().splitlines()) == 4  # The metadata and one line per response
+
+        replayer = RecordReplayManager(record_mode=False, base_dir=str(tmp_path))
+        replayer._calculate_files_hash = Mock(return_value="hash123")
+        assert replayer.has_response_file("source.py", "test.py")
+        assert replayer.load_recorded_response(
+            "source.py", "test.py", {"user": "prompt 0"}, fuzzy_lookup=False
+        ) == ("response 0", 0, 0)
+        with patch("builtins.open", side_effect=AssertionError("file read again")):
+            assert replayer.load_recorded_response(
+                "source.py", "test.py", {"user": "prompt 2"}, fuzzy_lookup=False
+            ) == ("response 2", 2, 2)
+
+    @staticmethod
+    def test_recorded_responses_override_legacy_yaml_responses(tmp_path):
+        """
+        Test that responses recorded in the JSONL record file take precedence over the responses of the
+        legacy YAML file, and that a truncated last line is skipped.
+        """
+        manager = RecordReplayManager(record_mode=False, base_dir=str(tmp_path))
+        manager._calculate_files_hash = Mock(return_value="hash123")
+        prompt = {"user": "test prompt"}
+        prompt_hash = hashlib.sha256(str(prompt).encode()).hexdigest()[
+            : RecordReplayManager.HASH_DISPLAY_LENGTH
+        ]
+        response_file = manager._get_response_file_path("source.py", "test.py")
+        legacy_entry = {
+            "prompt": prompt,
+            "response": "legacy response",
+            "prompt_tokens": 1,
+            "completion_tokens": 2,
+        }
+        with open(response_file, "w") as f:
+            yaml.safe_dump(
+                {"metadata": {"files_hash": "hash123"}, "test_caller": {prompt_hash: legacy_entry}},
+                f,
+            )
+        with open(manager._get_record_file_path(response_file), "w") as f:
+            f.write(json.dumps({"metadata": {"files_hash": "hash123"}}) + "\n")
+            record = {"caller": "test_caller", "prompt_hash": prompt_hash, **legacy_entry}
+            f.write(json.dumps({**record, "response": "new response"}) + "\n")
+            f.write('{"caller": "test_caller", "prompt_ha')
+
+        assert manager.load_recorded_response(
+            "source.py", "test.py", prompt, caller_name="test_caller"
+        ) == ("new response", 1, 2)
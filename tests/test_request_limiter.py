@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from coverage_ai.request_limiter import RequestLimiter
+
+
+class TestRequestLimiter:
+    """Test suite for the RequestLimiter class."""
+
+    def test_bounds_concurrent_requests(self):
+        running = []
+        max_running = []
+
+        async def request(limiter):
+            async with limiter.request("gpt-4o"):
+                running.append(1)
+                max_running.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+
+        async def main():
+            limiter = RequestLimiter(max_concurrent_requests=2)
+            await asyncio.gather(*(request(limiter) for _ in range(6)))
+
+        asyncio.run(main())
+        assert max(max_running) == 2
+
+    def test_spaces_out_requests_per_provider(self):
+        start_times = {}
+
+        async def request(limiter, model):
+            async with limiter.request(model):
+                start_times.setdefault(model, []).append(time.monotonic())
+
+        async def main():
+            limiter = RequestLimiter(
+                max_concurrent_requests=10,
+                provider_requests_per_minute={"bedrock": 600},
+            )
+            await asyncio.gather(
+                *(request(limiter, "bedrock/claude") for _ in range(3)),
+                *(request(limiter, "gpt-4o") for _ in range(3)),
+            )
+
+        asyncio.run(main())
+        bedrock_times = start_times["bedrock/claude"]
+        # 600 requests per minute: one request every 0.1 seconds
+        assert bedrock_times[2] - bedrock_times[0] >= 0.19
+        assert start_times["gpt-4o"][2] - start_times["gpt-4o"][0] < 0.1
+
+    def test_shared_per_event_loop(self):
+        async def get_limiters():
+            return RequestLimiter.for_current_loop(), RequestLimiter.for_current_loop()
+
+        first, second = asyncio.run(get_limiters())
+        assert first is second
+        assert asyncio.run(get_limiters())[0] is not first
+
+    def test_get_provider(self):
+        assert RequestLimiter.get_provider("bedrock/anthropic.claude-3") == "bedrock"
+        assert RequestLimiter.get_provider("gpt-4o-2024-11-20") == "openai"
+        assert RequestLimiter.get_provider("claude-3-5-sonnet") == "anthropic"
@@ -0,0 +1,58 @@
+from unittest.mock import patch
+
+from coverage_ai.response_cache import ResponseCache
+
+
+class TestResponseCache:
+    """Test suite for the ResponseCache class."""
+
+    def test_hits_and_misses(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "cache" / "responses.sqlite"))
+        key = ResponseCache.make_key("gpt-4o", 0.2, [{"role": "user", "content": "hi"}])
+        assert cache.get(key) is None
+        cache.put(key, "gpt-4o", "response", 2, 10)
+        assert cache.get(key) == ("response", 2, 10)
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1, "max_entries": 1000}
+
+    def test_persists_across_instances(self, tmp_path):
+        path = str(tmp_path / "responses.sqlite")
+        ResponseCache(path).put("key", "gpt-4o", "response", 2, 10)
+        assert ResponseCache(path).get("key") == ("response", 2, 10)
+
+    def test_make_key(self):
+        messages = [{"role": "user", "content": "hi"}]
+        key = ResponseCache.make_key("gpt-4o", 0.2, messages)
+        assert key == ResponseCache.make_key("gpt-4o", 0.2, [dict(messages[0])])
+        assert key != ResponseCache.make_key("gpt-4o", 1, messages)
+        assert key != ResponseCache.make_key("gpt-4o-mini", 0.2, messages)
+        assert key != ResponseCache.make_key(
+            "gpt-4o", 0.2, [{"role": "user", "content": "hello"}]
+        )
+
+    def test_expired_entries(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite"), ttl_sec=60)
+        with patch("coverage_ai.response_cache.time.time", return_value=1000):
+            cache.put("key", "gpt-4o", "response", 2, 10)
+        with patch("coverage_ai.response_cache.time.time", return_value=1059):
+            assert cache.get("key") == ("response", 2, 10)
+        with patch("coverage_ai.response_cache.time.time", return_value=1061):
+            assert cache.get("key") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite"), ttl_sec=0, max_entries=2)
+        with patch("coverage_ai.response_cache.time.time", side_effect=[1, 2, 3, 4]):
+            cache.put("a", "gpt-4o", "response a", 1, 1)
+            cache.put("b", "gpt-4o", "response b", 1, 1)
+            cache.get("a")  # "b" is now the least recently used entry
+            cache.put("c", "gpt-4o", "response c", 1, 1)
+        assert cache.get("b") is None
+        assert cache.get("a") == ("response a", 1, 1)
+        assert cache.get("c") == ("response c", 1, 1)
+
+    def test_clear(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "responses.sqlite"))
+        cache.put("key", "gpt-4o", "response", 2, 10)
+        cache.get("key")
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "entries": 0, "max_entries": 1000}
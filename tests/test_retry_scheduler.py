@@ -0,0 +1,156 @@
+import asyncio
+
+from unittest.mock import patch
+
+import httpx
+import litellm
+import pytest
+
+from coverage_ai.retry_scheduler import (
+    FATAL,
+    OTHER,
+    RATE_LIMIT,
+    TRANSIENT,
+    RetryBudget,
+    RetryScheduler,
+    classify_error,
+    get_retry_after,
+)
+
+
+def rate_limit_error(headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers=headers or {}, request=request)
+    return litellm.RateLimitError(
+        "rate limited", llm_provider="openai", model="gpt-4o", response=response
+    )
+
+
+def bad_request_error():
+    return litellm.BadRequestError("bad request", model="gpt-4o", llm_provider="openai")
+
+
+class FlakyCall:
+    """A call failing with the given errors before succeeding."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "response"
+
+
+class TestRetryScheduler:
+    """Test suite for the RetryScheduler class."""
+
+    def test_classify_error(self):
+        assert classify_error(rate_limit_error()) == RATE_LIMIT
+        assert classify_error(bad_request_error()) == FATAL
+        assert (
+            classify_error(litellm.Timeout("timeout", model="gpt-4o", llm_provider="openai"))
+            == TRANSIENT
+        )
+        assert classify_error(ValueError("broken stream")) == OTHER
+
+    def test_get_retry_after(self):
+        assert get_retry_after(rate_limit_error({"retry-after": "2"})) == 2.0
+        assert get_retry_after(rate_limit_error({"retry-after-ms": "1500"})) == 1.5
+        assert get_retry_after(rate_limit_error({"retry-after": "not a date"})) is None
+        assert get_retry_after(rate_limit_error()) is None
+
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_retries_until_success_with_jittered_backoff(self, mock_sleep):
+        scheduler = RetryScheduler(max_attempts=3, base_delay_sec=1.0)
+        call = FlakyCall(ValueError("broken stream"), ValueError("broken stream"))
+
+        assert scheduler.call("gpt-4o", call) == "response"
+        assert call.calls == 3
+        delays = [args[0] for args, _ in mock_sleep.call_args_list]
+        assert len(delays) == 2
+        assert 0 <= delays[0] <= 1.0 and 0 <= delays[1] <= 2.0
+        stats = scheduler.stats()["gpt-4o"]
+        assert stats["attempts"] == 3
+        assert stats["retries"] == 2
+        assert stats["wait_sec"] == pytest.approx(sum(delays))
+
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_does_not_retry_fatal_errors(self, mock_sleep):
+        scheduler = RetryScheduler(max_attempts=3)
+        call = FlakyCall(bad_request_error())
+
+        with pytest.raises(litellm.BadRequestError):
+            scheduler.call("gpt-4o", call)
+        assert call.calls == 1
+        mock_sleep.assert_not_called()
+
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_raises_after_max_attempts(self, mock_sleep):
+        scheduler = RetryScheduler(max_attempts=2)
+        call = FlakyCall(*[ValueError("broken stream")] * 3)
+
+        with pytest.raises(ValueError):
+            scheduler.call("gpt-4o", call)
+        assert call.calls == 2
+
+    @patch("coverage_ai.retry_scheduler.random.uniform", return_value=0.0)
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_retry_after_pauses_every_call_to_the_model(self, mock_sleep, mock_uniform):
+        scheduler = RetryScheduler(max_attempts=3)
+        call = FlakyCall(rate_limit_error({"retry-after": "5"}))
+
+        assert scheduler.call("gpt-4o", call) == "response"
+        assert mock_sleep.call_args_list[0].args[0] == pytest.approx(5.0)
+        assert scheduler.stats()["gpt-4o"]["rate_limited"] == 1
+
+        # Another call to the same model waits for the rest of the pause, other models do not
+        mock_sleep.reset_mock()
+        scheduler.call("gpt-4o", FlakyCall())
+        assert mock_sleep.call_args.args[0] == pytest.approx(5.0, abs=0.5)
+        mock_sleep.reset_mock()
+        scheduler.call("claude-3-5-sonnet", FlakyCall())
+        mock_sleep.assert_not_called()
+
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_retry_budget_stops_retry_storms(self, mock_sleep):
+        scheduler = RetryScheduler(max_attempts=3, budget_tokens=4)
+        failing_calls = [FlakyCall(*[ValueError("down")] * 3) for _ in range(3)]
+        for call in failing_calls:
+            with pytest.raises(ValueError):
+                scheduler.call("gpt-4o", call)
+
+        # The first call retries once, then the spent budget refuses every other retry
+        assert [call.calls for call in failing_calls] == [2, 1, 1]
+        assert scheduler.stats()["gpt-4o"]["throttled"] == 3
+
+    @patch("coverage_ai.retry_scheduler.time.sleep")
+    def test_fatal_errors_do_not_spend_the_retry_budget(self, mock_sleep):
+        scheduler = RetryScheduler(max_attempts=3, budget_tokens=4)
+        for _ in range(5):
+            with pytest.raises(litellm.BadRequestError):
+                scheduler.call("gpt-4o", FlakyCall(bad_request_error()))
+
+        assert scheduler._get_budget("gpt-4o").tokens == 4
+        # A transient error is still retried
+        assert scheduler.call("gpt-4o", FlakyCall(ValueError("down"))) == "response"
+        assert scheduler.stats()["gpt-4o"]["throttled"] == 0
+
+    def test_retry_budget_refills_on_success(self):
+        budget = RetryBudget(max_tokens=4, token_ratio=2)
+        assert budget.on_failure()
+        assert not budget.on_failure()
+        budget.on_success()
+        assert budget.on_failure()
+
+    def test_async_call_retries(self):
+        scheduler = RetryScheduler(max_attempts=2, base_delay_sec=0.01)
+        call = FlakyCall(ValueError("broken stream"))
+
+        async def attempt():
+            return call()
+
+        assert asyncio.run(scheduler.acall("gpt-4o", attempt)) == "response"
+        assert call.calls == 2
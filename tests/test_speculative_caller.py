@@ -0,0 +1,178 @@
+import threading
+import time
+
+from concurrent.futures import wait
+
+import pytest
+
+from coverage_ai.speculative_caller import ModelRouter, SpeculativeCaller
+
+
+class FakeCaller:
+    """An AICaller stand-in answering after a delay."""
+
+    def __init__(self, model, response, delay=0.0, error=None, release=None):
+        self.model = model
+        self.response = response
+        self.delay = delay
+        self.error = error
+        # Set once a call is sent; a call only answers once `release` is set, if given
+        self.started = threading.Event()
+        self.release = release
+        self.calls = []
+        self.last_cached_prompt_tokens = 0
+        self.total_cached_prompt_tokens = 0
+        self.total_saved_prompt_tokens = 0
+        self.total_saved_completion_tokens = 0
+
+    def call_model(self, prompt, stream=True, cache_prefix=None, caller_name=None):
+        self.calls.append(caller_name)
+        self.started.set()
+        time.sleep(self.delay)
+        if self.release:
+            self.release.wait()
+        if self.error:
+            raise self.error
+        return self.response, 10, 20
+
+
+def is_useful(response):
+    return response.startswith("new_tests")
+
+
+class TestModelRouter:
+    """Test suite for the ModelRouter class."""
+
+    def test_ranks_unexplored_models_first_then_by_acceptance_rate(self):
+        router = ModelRouter(min_samples=2)
+        router.record_validation("fast", "python", generated=4, accepted=1)
+        router.record_validation("strong", "python", generated=4, accepted=3)
+        assert router.rank(["fast", "strong", "new"], "python") == ["new", "strong", "fast"]
+        # Statistics are kept per language
+        assert router.rank(["fast", "strong"], "java") == ["fast", "strong"]
+
+    def test_ranks_equal_acceptance_rates_by_latency(self):
+        router = ModelRouter(min_samples=0)
+        router.record_call("slow", "python", 4.0, useful=True)
+        router.record_call("fast", "python", 1.0, useful=True)
+        assert router.rank(["slow", "fast"], "python") == ["fast", "slow"]
+        assert router.mean_latency("slow", "python") == 4.0
+
+    def test_saves_and_loads_statistics(self, tmp_path):
+        path = str(tmp_path / "stats" / "model_stats.json")
+        router = ModelRouter(path=path)
+        router.record_call("fast", "python", 2.0, useful=True)
+        router.record_validation("fast", "python", generated=4, accepted=2)
+
+        reloaded = ModelRouter(path=path)
+        assert reloaded.acceptance_rate("fast", "python") == 0.5
+        assert reloaded.stats()["python"]["fast"]["useful"] == 1
+
+
+class TestSpeculativeCaller:
+    """Test suite for the SpeculativeCaller class."""
+
+    def generate_tests(self, caller):
+        """Call the model like `DefaultAgentCompletion.generate_tests`."""
+        return caller.call_model({"system": "", "user": "prompt"})
+
+    def test_returns_first_useful_response(self):
+        fast = FakeCaller("fast", "new_tests: fast", delay=0.0)
+        strong = FakeCaller("strong", "new_tests: strong", delay=0.2)
+        caller = SpeculativeCaller([strong, fast], is_useful=is_useful)
+
+        start_time = time.monotonic()
+        assert self.generate_tests(caller) == ("new_tests: fast", 10, 20)
+        assert time.monotonic() - start_time < 0.2
+        assert caller.last_model == "fast"
+        assert strong.calls == fast.calls == ["generate_tests"]
+        caller.cancel_pending()
+
+    def test_skips_responses_that_are_not_useful(self):
+        fast = FakeCaller("fast", "not yaml", delay=0.0)
+        failing = FakeCaller("failing", "", error=RuntimeError("boom"))
+        strong = FakeCaller("strong", "new_tests: strong", delay=0.05)
+        caller = SpeculativeCaller([fast, failing, strong], is_useful=is_useful)
+
+        assert self.generate_tests(caller) == ("new_tests: strong", 10, 20)
+        assert caller.last_model == "strong"
+        stats = caller.router.stats()["unknown"]
+        assert stats["fast"]["useful"] == 0
+        assert stats["strong"]["useful"] == 1
+
+    def test_raises_when_every_model_fails(self):
+        caller = SpeculativeCaller(
+            [FakeCaller("a", "", error=RuntimeError("boom"))] * 2, is_useful=is_useful
+        )
+        with pytest.raises(RuntimeError):
+            self.generate_tests(caller)
+
+    def test_other_callers_only_use_the_main_model(self):
+        main = FakeCaller("main", "answer")
+        other = FakeCaller("other", "answer")
+        caller = SpeculativeCaller([main, other], is_useful=is_useful)
+
+        assert caller.call_model({"system": "", "user": "prompt"}) == ("answer", 10, 20)
+        assert len(main.calls) == 1
+        assert other.calls == []
+
+    def test_yields_late_responses_until_cancelled(self):
+        fast = FakeCaller("fast", "new_tests: fast")
+        strong = FakeCaller("strong", "new_tests: strong", delay=0.05)
+        caller = SpeculativeCaller([fast, strong], is_useful=is_useful)
+        self.generate_tests(caller)
+
+        assert list(caller.late_responses()) == [("strong", "new_tests: strong", 10, 20)]
+
+        slow = FakeCaller("slow", "new_tests: slow", delay=0.5)
+        caller = SpeculativeCaller([fast, slow], is_useful=is_useful)
+        self.generate_tests(caller)
+        caller.cancel_pending()
+        assert list(caller.late_responses()) == []
+
+    def test_counts_the_tokens_of_every_finished_call(self):
+        release = threading.Event()
+        fast = FakeCaller("fast", "new_tests: fast")
+        not_useful = FakeCaller("not_useful", "not yaml")
+        slow = FakeCaller("slow", "new_tests: slow", release=release)
+        caller = SpeculativeCaller([fast, not_useful, slow], is_useful=is_useful)
+        self.generate_tests(caller)
+        # Wait until the slow call is sent, and the call that is not useful is done
+        assert slow.started.wait(5)
+        wait([future for future, model in caller._pending if model == "not_useful"])
+
+        # The response returned by call_model is counted by its caller, the response that is not
+        # useful is not
+        caller.cancel_pending()
+        assert caller.pop_unreported_tokens() == (10, 20)
+
+        # A cancelled call that was already sent is counted once it finishes
+        release.set()
+        caller.close()
+        assert caller.pop_unreported_tokens() == (10, 20)
+        assert caller.pop_unreported_tokens() == (0, 0)
+
+    def test_races_only_the_preferred_models(self):
+        router = ModelRouter(min_samples=1)
+        router.record_validation("fast", "python", generated=4, accepted=0)
+        router.record_validation("strong", "python", generated=4, accepted=4)
+        fast = FakeCaller("fast", "new_tests: fast")
+        strong = FakeCaller("strong", "new_tests: strong", delay=0.01)
+        caller = SpeculativeCaller(
+            [fast, strong], is_useful=is_useful, router=router, max_models=1
+        )
+        caller.language = "python"
+
+        assert self.generate_tests(caller)[0] == "new_tests: strong"
+        assert fast.calls == []
+
+    def test_cancel_skips_calls_not_started(self):
+        caller = SpeculativeCaller([FakeCaller("a", "new_tests")], is_useful=is_useful)
+        not_started = FakeCaller("b", "new_tests")
+        cancelled = threading.Event()
+        cancelled.set()
+        result = caller._timed_call(
+            not_started, {}, None, "generate_tests", "", cancelled
+        )
+        assert result is None
+        assert not_started.calls == []
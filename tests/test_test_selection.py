@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from coverage_ai.test_selection import build_single_test_command, pytest_node_ids
+
+TEST_FILE_CONTENT = """import app
+
+
+def test_add():
+    assert app.add(1, 2) == 3
+
+
+class TestApp:
+    # Comments at any indentation do not close the class
+    def test_sub(self):
+        assert app.sub(2, 1) == 1
+
+    class TestNested:
+        def test_mul(self):
+            assert app.mul(2, 2) == 4
+
+
+def test_div():
+    assert app.div(4, 2) == 2
+"""
+
+
+class TestTestSelection:
+    """Test suite for the test selection helpers."""
+
+    def test_pytest_node_ids(self):
+        node_ids = pytest_node_ids(
+            TEST_FILE_CONTENT,
+            "tests/test_app.py",
+            ["test_sub", "test_mul", "test_div"],
+        )
+        assert node_ids == [
+            "tests/test_app.py::TestApp::test_sub",
+            "tests/test_app.py::TestApp::TestNested::test_mul",
+            "tests/test_app.py::test_div",
+        ]
+
+    @pytest.mark.parametrize(
+        "test_command,expected",
+        [
+            (
+                "pytest --cov=. --cov-report=xml",
+                "pytest --cov=. --cov-report=xml tests/test_app.py::test_div",
+            ),
+            (
+                "pytest --cov src --cov-report=xml && echo done",
+                "pytest --cov src --cov-report=xml tests/test_app.py::test_div && echo done",
+            ),
+            (
+                "pytest tests/test_app.py --cov=. --cov-report=xml",
+                "pytest tests/test_app.py::test_div --cov=. --cov-report=xml",
+            ),
+            ("pytest tests/ --cov=. --cov-report=xml", None),
+        ],
+    )
+    def test_build_single_test_command_pytest(self, tmp_path, test_command, expected):
+        test_file_path = os.path.join(str(tmp_path), "tests", "test_app.py")
+        command = build_single_test_command(
+            test_command=test_command,
+            test_command_dir=str(tmp_path),
+            test_file_path=test_file_path,
+            test_file_content=TEST_FILE_CONTENT,
+            test_code="def test_div():\n    assert app.div(4, 2) == 2",
+            language="python",
+        )
+        assert command == expected
+
+    def test_build_single_test_command_go(self):
+        command = build_single_test_command(
+            test_command="go test -coverprofile=coverage.out ./...",
+            test_command_dir="/project",
+            test_file_path="/project/app_test.go",
+            test_file_content="",
+            test_code="func TestAdd(t *testing.T) {}\n\nfunc TestSub(t *testing.T) {}",
+            language="go",
+        )
+        assert command == "go test -run '^(TestAdd|TestSub)$' -coverprofile=coverage.out ./..."
+
+    def test_build_single_test_command_unsupported(self):
+        assert (
+            build_single_test_command(
+                test_command="npm test",
+                test_command_dir="/project",
+                test_file_path="/project/app.test.js",
+                test_file_content="",
+                test_code="test('adds', () => {});",
+                language="javascript",
+            )
+            is None
+        )
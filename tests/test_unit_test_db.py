@@ -1,4 +1,5 @@
 import os
+import sqlite3
 
 import pytest
 
@@ -59,6 +60,7 @@ class TestUnitTestDB:
             "source_file": "sample source code",
             "original_test_file": "sample test code",
             "processed_test_file": "sample new test code",
+            "newly_covered_lines": [3, 4, 5, 9],
         }
 
         # Insert the test result into the database
@@ -81,6 +83,26 @@ class TestUnitTestDB:
         assert attempt.source_file == "sample source code"
         assert attempt.original_test_file == "sample test code"
         assert attempt.processed_test_file == "sample new test code"
+        assert attempt.newly_covered_lines == "3-5, 9"
+
+    def test_add_missing_columns(self, tmp_path):
+        """
+        Test that a database created before the newly_covered_lines column existed is upgraded.
+        """
+        db_path = tmp_path / "old_unit_test_runs.db"
+        connection = sqlite3.connect(db_path)
+        connection.execute(
+            "CREATE TABLE unit_test_generation_attempts (id INTEGER PRIMARY KEY, status VARCHAR)"
+        )
+        connection.close()
+
+        db = UnitTestDB(f"sqlite:///{db_path}")
+        db.insert_attempt({"status": "PASS", "newly_covered_lines": [7]})
+        attempts = db.get_all_attempts()
+        db.engine.dispose()
+
+        assert attempts[0]["status"] == "PASS"
+        assert attempts[0]["newly_covered_lines"] == "7"
 
     def test_dump_to_report(self, unit_test_db, tmp_path):
         """
@@ -141,11 +163,13 @@ class TestUnitTestDB:
         dump_to_report_cli()
         assert os.path.exists(custom_report_filepath)
 
-    def test_dump_to_report_defaults(self, unit_test_db, tmp_path):
+    def test_dump_to_report_defaults(self, unit_test_db, tmp_path, monkeypatch):
         """
         Test the dump_to_report function with default arguments.
         Verifies that the report is generated at the default location.
         """
+        # The default database is created in the working directory
+        monkeypatch.chdir(tmp_path)
         report_filepath = tmp_path / "default_report.html"
         dump_to_report(report_filepath=str(report_filepath))
         assert os.path.exists(report_filepath)
@@ -72,3 +72,143 @@ class TestUnitTestGenerator:
             # Test with a filename that has no extension
             language = generator.get_code_language("filename")
             assert language == "unknown"
+
+    def test_generate_tests_with_prompt_budget(self, tmp_path):
+        """
+        Test generate_tests with a prompt budget.
+        This test ensures that the packed source file and only the most recent failed tests are sent.
+        """
+        source_file = tmp_path / "module.txt"
+        source_file.write_text("\n".join(f"line {i}" for i in range(1, 21)))
+        test_file = tmp_path / "test_module.txt"
+        test_file.write_text("test content")
+        agent_completion = MagicMock()
+        agent_completion.generate_tests.return_value = ("new_tests: []", 10, 5, "prompt")
+        budget = {
+            "enabled": True,
+            "source_file_tokens": 12,
+            "test_file_tokens": 0,
+            "included_files_tokens": 0,
+        }
+        with (
+            patch("coverage_ai.unit_test_generator.get_settings") as mock_settings,
+            patch(
+                "coverage_ai.prompt_packer.TokenEncoder.get_token_encoder",
+                return_value=MagicMock(encode=str.split),
+            ),
+        ):
+            mock_settings.return_value.get.side_effect = lambda key, default=None: {
+                "prompt_budget": budget,
+                "failed_test_history.max_tokens": 20,
+                "default": {"max_tests_per_run": 4},
+            }[key]
+            generator = UnitTestGenerator(
+                source_file_path=str(source_file),
+                test_file_path=str(test_file),
+                code_coverage_report_path="coverage.xml",
+                test_command="pytest",
+                llm_model="gpt-3",
+                agent_completion=agent_completion,
+                generate_log_files=False,
+            )
+            failed_test_runs = [
+                {"code": {"test_name": f"test_{i}"}, "error_message": "error"}
+                for i in range(5)
+            ]
+            generator.generate_tests(
+                failed_test_runs, "python", "pytest", "report", missed_lines=[10]
+            )
+
+        kwargs = agent_completion.generate_tests.call_args.kwargs
+        assert kwargs["source_file_numbered"].split("\n") == [
+            "... (lines 1-8 omitted)",
+            "9 line 9",
+            "10 line 10",
+            "11 line 11",
+            "... (lines 12-20 omitted)",
+        ]
+        assert kwargs["test_file"] == "test content"
+        assert "test_4" in kwargs["failed_tests_section"]
+        assert "test_0" not in kwargs["failed_tests_section"]
+
+    def test_generate_tests_reuses_the_packed_source(self, tmp_path):
+        """
+        Test generate_tests with a prompt budget over several iterations.
+        This test ensures that the source is packed against the first missed lines and kept identical
+        until the source code changes.
+        """
+        source_file = tmp_path / "module.txt"
+        source_file.write_text("\n".join(f"line {i}" for i in range(1, 21)))
+        test_file = tmp_path / "test_module.txt"
+        test_file.write_text("test content")
+        agent_completion = MagicMock()
+        agent_completion.generate_tests.return_value = ("new_tests: []", 10, 5, "prompt")
+        budget = {
+            "enabled": True,
+            "source_file_tokens": 12,
+            "test_file_tokens": 0,
+            "included_files_tokens": 0,
+        }
+        with (
+            patch("coverage_ai.unit_test_generator.get_settings") as mock_settings,
+            patch(
+                "coverage_ai.prompt_packer.TokenEncoder.get_token_encoder",
+                return_value=MagicMock(encode=str.split),
+            ),
+        ):
+            mock_settings.return_value.get.side_effect = lambda key, default=None: {
+                "prompt_budget": budget,
+                "failed_test_history.max_tokens": 0,
+                "default": {"max_tests_per_run": 4},
+            }[key]
+            generator = UnitTestGenerator(
+                source_file_path=str(source_file),
+                test_file_path=str(test_file),
+                code_coverage_report_path="coverage.xml",
+                test_command="pytest",
+                llm_model="gpt-3",
+                agent_completion=agent_completion,
+                generate_log_files=False,
+            )
+            sources = []
+            for missed_lines in ([10, 11], [11], [11]):
+                generator.generate_tests([], "python", "pytest", "report", missed_lines)
+                sources.append(
+                    agent_completion.generate_tests.call_args.kwargs["source_file_numbered"]
+                )
+            generator.source_code = "\n".join(f"new line {i}" for i in range(1, 21))
+            generator.generate_tests([], "python", "pytest", "report", [11])
+            repacked = agent_completion.generate_tests.call_args.kwargs[
+                "source_file_numbered"
+            ]
+
+        assert sources[0] == sources[1] == sources[2]
+        assert "10 line 10" in sources[0]
+        assert "11 new line 11" in repacked
+
+    def test_check_for_failed_test_runs_with_count(self):
+        """
+        Test check_for_failed_test_runs with a clustered failed test.
+        This test ensures that the number of failed tests with the same error is mentioned.
+        """
+        with (
+            tempfile.NamedTemporaryFile(suffix=".py", delete=False) as temp_source_file,
+            tempfile.NamedTemporaryFile(suffix=".py", delete=False) as temp_test_file,
+        ):
+            generator = UnitTestGenerator(
+                source_file_path=temp_source_file.name,
+                test_file_path=temp_test_file.name,
+                code_coverage_report_path="coverage.xml",
+                test_command="pytest",
+                llm_model="gpt-3",
+                agent_completion=MagicMock(),
+            )
+            generator.prompt_packer = None
+            result = generator.check_for_failed_test_runs(
+                [{"code": {"test_name": "test_a"}, "error_message": "boom", "count": 3}]
+            )
+            assert result == (
+                'Failed Test:\n```\n{"test_name": "test_a"}\n```\n'
+                "The same error occurred in 3 failed tests, only the most recent one is shown.\n"
+                "Test execution error analysis:\nboom\n\n\n"
+            )
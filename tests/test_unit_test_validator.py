@@ -1,5 +1,6 @@
 import datetime
 import os
+import sqlite3
 import tempfile
 
 from unittest.mock import MagicMock, mock_open, patch
@@ -7,6 +8,7 @@ from unittest.mock import MagicMock, mock_open, patch
 import pytest
 
 from coverage_ai.coverage_processor import CoverageProcessor
+from coverage_ai.file_coverage import FileCoverage
 from coverage_ai.runner import Runner
 from coverage_ai.settings.config_schema import CoverageType
 from coverage_ai.unit_test_validator import UnitTestValidator
@@ -502,6 +504,43 @@ class TestUnitValidator:
                 )
                 assert percentage_covered == 0.7
 
+    @pytest.mark.parametrize("use_report_coverage_feature_flag", [False, True])
+    def test_post_process_coverage_report_does_not_unpack_file_coverage(
+        self, tmp_path, use_report_coverage_feature_flag
+    ):
+        """
+        Test that `post_process_coverage_report` reads the counts and percentage of a FileCoverage
+        instead of unpacking it into line lists.
+        """
+        source_file = tmp_path / "app.py"
+        source_file.write_text("a = 1\n")
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path="test_test.py",
+            code_coverage_report_path="coverage.xml",
+            test_command="pytest",
+            test_command_dir=str(tmp_path),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=use_report_coverage_feature_flag,
+        )
+        file_coverage = FileCoverage.from_lines([1, 2, 3], [4])
+        report = {"app.py": file_coverage} if use_report_coverage_feature_flag else file_coverage
+        with (
+            patch.object(CoverageProcessor, "process_coverage_report", return_value=report),
+            patch.object(FileCoverage, "__iter__", side_effect=AssertionError("unpacked")),
+        ):
+            percentage_covered, _ = generator.post_process_coverage_report(0)
+        assert percentage_covered == 0.75
+
     def test_generate_diff_coverage_report_success(self):
         """
         Test the `generate_diff_coverage_report` method of the `UnitTestValidator` class.
@@ -599,3 +638,504 @@ class TestUnitValidator:
                 mock_logger_error.assert_called_once_with(
                     "Error running diff-cover: Mock exception"
                 )
+
+    def test_validate_tests_analyzes_repeated_errors_once(self, tmp_path):
+        """
+        Test that the failed tests of `validate_tests` are analyzed once every test is validated, with a
+        single analysis per error signature, and that the analysis is reused in later iterations. The
+        analysis is marked when it is reused for another test than the one it was made for.
+        """
+        source_file = tmp_path / "app.py"
+        source_file.write_text("def add(a, b):\n    return a + b\n")
+        test_file = tmp_path / "test_app.py"
+        test_file.write_text("import app\n\ndef test_add():\n    assert app.add(1, 2) == 3\n")
+        agent_completion = MagicMock()
+        agent_completion.analyze_test_failure.side_effect = lambda **kwargs: (
+            f"analysis of {kwargs['stdout'].splitlines()[-1]}",
+            10,
+            5,
+            "prompt",
+        )
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(tmp_path / "coverage.xml"),
+            test_command="pytest",
+            test_command_dir=str(tmp_path),
+            llm_model="gpt-3",
+            agent_completion=agent_completion,
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+            project_root=str(tmp_path),
+        )
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 4
+        generator.relevant_line_number_to_insert_imports_after = 1
+
+        def run_command(command, cwd, max_run_time_sec):
+            content = test_file.read_text()
+            error = "TypeError: unsupported operand" if "None" in content else "AssertionError: assert 5 == 4"
+            return f"E   {error}", "", 1, 0
+
+        generated_tests = [
+            {"test_code": "def test_one():\n    assert app.add(2, 2) == 5", "new_imports_code": ""},
+            {"test_code": "def test_two():\n    assert app.add(1, 3) == 5", "new_imports_code": ""},
+            {"test_code": "def test_three():\n    app.add(None, 1)", "new_imports_code": ""},
+        ]
+        with patch.object(Runner, "run_command", side_effect=run_command):
+            results = generator.validate_tests(generated_tests)
+            assert [result["status"] for result in results] == ["FAIL"] * 3
+            assert agent_completion.analyze_test_failure.call_count == 2
+            # test_two reuses the analysis of test_one, marked as made for another test
+            assert generator.failed_test_runs[0]["error_message"] == (
+                f"{UnitTestValidator.REUSED_ANALYSIS_NOTE}\n"
+                "analysis of E   AssertionError: assert 5 == 4"
+            )
+
+            generator.validate_tests(generated_tests[:1])
+            assert agent_completion.analyze_test_failure.call_count == 2
+
+        assert [failed["error_message"] for failed in generator.failed_test_runs] == [
+            "analysis of E   TypeError: unsupported operand",
+            "analysis of E   AssertionError: assert 5 == 4",
+        ]
+        assert generator.failed_test_runs[1]["count"] == 3
+        assert generator.total_input_token_count == 20
+
+    @pytest.mark.parametrize("source_name,expected", [("app.py", "hardlink"), ("app.go", "copy")])
+    def test_sandbox_copy_mode(self, tmp_path, source_name, expected):
+        """
+        Test that validation sandboxes only use hard links for Python projects, since other toolchains
+        rewrite their build outputs in place.
+        """
+        source_file = tmp_path / source_name
+        source_file.write_text("")
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(tmp_path / "test_app"),
+            code_coverage_report_path=str(tmp_path / "coverage.xml"),
+            test_command="make test",
+            test_command_dir=str(tmp_path),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+        )
+        with patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings:
+            mock_get_settings.return_value.get.return_value = "hardlink"
+            assert generator._get_sandbox_copy_mode() == expected
+
+    def test_validate_tests_in_parallel_sandboxes(self, tmp_path):
+        """
+        Test the `validate_tests` method of the `UnitTestValidator` class with parallel validation enabled.
+
+        Each candidate runs in its own sandbox. The failing candidate is recorded as a failure, while the
+        two candidates that increase coverage are merged into the real test file and accepted together.
+        """
+        project = tmp_path / "project"
+        project.mkdir()
+        source_file = project / "app.py"
+        source_file.write_text("def add(a, b):\n    return a + b\n")
+        test_file = project / "test_app.py"
+        test_file.write_text("import app\n\ndef test_add():\n    assert app.add(1, 2) == 3\n")
+
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(project / "coverage.xml"),
+            test_command="pytest",
+            test_command_dir=str(project),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+            project_root=str(project),
+        )
+        generator.current_coverage = 0.5
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 4
+        generator.relevant_line_number_to_insert_imports_after = 1
+
+        def run_command(command, cwd, max_run_time_sec):
+            with open(os.path.join(cwd, "test_app.py")) as f:
+                content = f.read()
+            exit_code = 1 if "test_broken" in content else 0
+            return "", "", exit_code, 0
+
+        def evaluate_coverage_report(coverage_processor, time_of_test_command):
+            with open(
+                os.path.join(os.path.dirname(coverage_processor.file_path), "test_app.py")
+            ) as f:
+                new_tests = f.read().count("def test_new")
+            return 0.5 + 0.1 * new_tests, {}, "report", None
+
+        settings = {"parallel_validation.enabled": True, "parallel_validation.max_workers": 3}
+        with (
+            patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings,
+            patch.object(Runner, "run_command", side_effect=run_command),
+            patch.object(
+                generator, "_evaluate_coverage_report", side_effect=evaluate_coverage_report
+            ),
+            patch.object(generator, "extract_error_message", return_value="boom"),
+        ):
+            mock_get_settings.return_value.get.side_effect = (
+                lambda key, default=None: settings.get(key, default)
+            )
+            results = generator.validate_tests(
+                [
+                    {"test_code": "def test_new_one():\n    assert app.add(2, 2) == 4", "new_imports_code": ""},
+                    {"test_code": "def test_broken():\n    assert False", "new_imports_code": ""},
+                    {"test_code": "def test_new_two():\n    assert app.add(0, 0) == 0", "new_imports_code": "import os"},
+                ]
+            )
+
+        assert [result["status"] for result in results] == ["PASS", "FAIL", "PASS"]
+        assert results[1]["reason"] == "Test failed"
+        assert generator.failed_test_runs == [
+            {"code": results[1]["test"], "error_message": "boom"}
+        ]
+        assert generator.current_coverage == pytest.approx(0.7)
+        assert generator.relevant_line_number_to_insert_tests_after == 5
+        content = test_file.read_text()
+        assert "def test_new_one" in content
+        assert "def test_new_two" in content
+        assert "test_broken" not in content
+        assert content.startswith("import app\nimport os\n")
+
+    def test_validate_tests_in_batch(self, tmp_path):
+        """
+        Test the `validate_tests` method of the `UnitTestValidator` class with batch validation enabled.
+
+        All candidates run in a single test run. The failing candidate and the candidate that covers no
+        new line are pruned, the duplicated test name is made unique, and the remaining test is kept.
+        """
+        project = tmp_path / "project"
+        project.mkdir()
+        source_file = project / "app.py"
+        source_file.write_text("def add(a, b):\n    if a:\n        return a + b\n    return b\n")
+        test_file = project / "test_app.py"
+        test_file.write_text("import app\n\ndef test_add():\n    assert app.add(0, 2) == 2\n")
+
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(project / "coverage.xml"),
+            test_command="pytest --cov=. --cov-report=xml",
+            test_command_dir=str(project),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+        )
+        generator.current_coverage = 0.75
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 4
+        generator.relevant_line_number_to_insert_imports_after = 1
+
+        covered_lines = {"test_add": b"\x14", "test_add_2": b"\x0c", "test_redundant": b"\x04"}
+        commands = []
+
+        def run_command(command, cwd, max_run_time_sec):
+            commands.append(command)
+            content = test_file.read_text()
+            names = [name for name in covered_lines if f"def {name}(" in content]
+            contexts = [""] + [f"test_app.py::{name}|run" for name in names]
+            line_bits = [(1, 1, b"\x02")] + [
+                (1, index, covered_lines[name]) for index, name in enumerate(names, 2)
+            ]
+            data_file = project / ".coverage"
+            data_file.unlink(missing_ok=True)
+            connection = sqlite3.connect(data_file)
+            connection.executescript(
+                "create table file (id integer primary key, path text);"
+                "create table context (id integer primary key, context text);"
+                "create table line_bits (file_id integer, context_id integer, numbits blob);"
+                "create table arc (file_id integer, context_id integer, fromno integer, tono integer);"
+            )
+            connection.execute("insert into file values (1, ?)", (str(source_file),))
+            connection.executemany(
+                "insert into context values (?, ?)", enumerate(contexts, 1)
+            )
+            connection.executemany("insert into line_bits values (?, ?, ?)", line_bits)
+            connection.commit()
+            connection.close()
+            if "def test_broken(" in content:
+                return "FAILED test_app.py::test_broken - assert False\n", "", 1, 0
+            return "", "", 0, 0
+
+        settings = {"batch_validation.enabled": True}
+        with (
+            patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings,
+            patch.object(Runner, "run_command", side_effect=run_command),
+            patch.object(
+                generator, "_evaluate_coverage_report", return_value=(1.0, {}, "report", None)
+            ),
+            patch.object(generator, "extract_error_message", return_value="boom"),
+        ):
+            mock_get_settings.return_value.get.side_effect = (
+                lambda key, default=None: settings.get(key, default)
+            )
+            results = generator.validate_tests(
+                [
+                    {"test_code": "def test_add():\n    assert app.add(1, 2) == 3", "new_imports_code": ""},
+                    {"test_code": "def test_broken():\n    assert False", "new_imports_code": ""},
+                    {"test_code": "def test_redundant():\n    assert app.add(0, 0) == 0", "new_imports_code": ""},
+                ]
+            )
+
+        assert [result["status"] for result in results] == ["PASS", "FAIL", "FAIL"]
+        assert results[1]["reason"] == "Test failed"
+        assert "Coverage did not increase" in results[2]["reason"]
+        assert "def test_add_2():" in results[0]["test"]["test_code"]
+        assert results[0]["newly_covered_lines"] == [3]
+        assert commands[0] == "pytest --cov=. --cov-report=xml --cov-context=test"
+        assert len(commands) == 2
+        assert generator.current_coverage == 1.0
+        content = test_file.read_text()
+        assert "def test_add_2():" in content
+        assert "test_broken" not in content
+        assert "test_redundant" not in content
+
+    def test_validate_tests_in_batch_attributes_contexts_by_node_id(self, tmp_path):
+        """
+        Test that batch validation attributes coverage contexts to the generated tests by node id, so
+        that an existing test of another file with the same function name is not taken for one of them.
+        """
+        project = tmp_path / "project"
+        project.mkdir()
+        source_file = project / "app.py"
+        source_file.write_text("def add(a, b):\n    if a:\n        return a + b\n    return b\n")
+        test_file = project / "test_app.py"
+        test_file.write_text("import app\n")
+
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(project / "coverage.xml"),
+            test_command="pytest --cov=. --cov-report=xml",
+            test_command_dir=str(project),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+        )
+        generator.current_coverage = 0.25
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 1
+        generator.relevant_line_number_to_insert_imports_after = 1
+
+        def run_command(command, cwd, max_run_time_sec):
+            # pytest runs from the parent directory (its rootdir), so node ids start with "project/"
+            contexts = [
+                "",
+                "project/test_other.py::test_one|run",
+                "project/test_app.py::test_one|run",
+                "project/test_app.py::test_two|run",
+            ]
+            line_bits = [(1, 1, b"\x02"), (1, 2, b"\x04"), (1, 3, b"\x04"), (1, 4, b"\x08")]
+            data_file = project / ".coverage"
+            data_file.unlink(missing_ok=True)
+            connection = sqlite3.connect(data_file)
+            connection.executescript(
+                "create table file (id integer primary key, path text);"
+                "create table context (id integer primary key, context text);"
+                "create table line_bits (file_id integer, context_id integer, numbits blob);"
+                "create table arc (file_id integer, context_id integer, fromno integer, tono integer);"
+            )
+            connection.execute("insert into file values (1, ?)", (str(source_file),))
+            connection.executemany(
+                "insert into context values (?, ?)", enumerate(contexts, 1)
+            )
+            connection.executemany("insert into line_bits values (?, ?, ?)", line_bits)
+            connection.commit()
+            connection.close()
+            return "", "", 0, 0
+
+        settings = {"batch_validation.enabled": True}
+        with (
+            patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings,
+            patch.object(Runner, "run_command", side_effect=run_command),
+            patch.object(
+                generator, "_evaluate_coverage_report", return_value=(0.5, {}, "report", None)
+            ),
+        ):
+            mock_get_settings.return_value.get.side_effect = (
+                lambda key, default=None: settings.get(key, default)
+            )
+            results = generator.validate_tests(
+                [
+                    {"test_code": "def test_one():\n    assert app.add(1, 2) == 3", "new_imports_code": ""},
+                    {"test_code": "def test_two():\n    assert app.add(0, 2) == 2", "new_imports_code": ""},
+                ]
+            )
+
+        # Line 2 is already covered by test_other.py::test_one, so only test_two covers a new line
+        assert [result["status"] for result in results] == ["FAIL", "PASS"]
+        assert "Coverage did not increase" in results[0]["reason"]
+        assert results[1]["newly_covered_lines"] == [3]
+
+    def test_validate_test_with_test_selection(self, tmp_path):
+        """
+        Test the `validate_test` method of the `UnitTestValidator` class with test selection enabled.
+
+        Only the new test is run, and the lines it covers are merged into the baseline line coverage.
+        """
+        source_file = tmp_path / "app.py"
+        source_file.write_text("def add(a, b):\n    if a:\n        return a + b\n    return b\n")
+        test_file = tmp_path / "test_app.py"
+        test_file.write_text("import app\n\ndef test_add():\n    assert app.add(0, 2) == 2\n")
+
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(tmp_path / "coverage.xml"),
+            test_command="pytest --cov=. --cov-report=xml",
+            test_command_dir=str(tmp_path),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+        )
+        generator.current_coverage = 0.75
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 4
+        generator.relevant_line_number_to_insert_imports_after = 1
+        generator.baseline_line_coverage = FileCoverage.from_lines([1, 2, 4], [3])
+
+        with (
+            patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings,
+            patch.object(
+                Runner, "run_command", return_value=("", "", 0, 0)
+            ) as mock_run_command,
+            patch.object(
+                CoverageProcessor,
+                "process_coverage_report",
+                return_value=FileCoverage.from_lines([1, 2, 3], [4]),
+            ),
+        ):
+            mock_get_settings.return_value.get.return_value = True
+            result = generator.validate_test(
+                {"test_code": "def test_add_one():\n    assert app.add(1, 2) == 3", "new_imports_code": ""}
+            )
+
+        assert result["status"] == "PASS"
+        assert (
+            mock_run_command.call_args.kwargs["command"]
+            == "pytest --cov=. --cov-report=xml test_app.py::test_add_one"
+        )
+        assert generator.current_coverage == 1.0
+        assert result["newly_covered_lines"] == [3]
+        assert generator.baseline_line_coverage == FileCoverage.from_lines([1, 2, 3, 4], [])
+        assert generator.code_coverage_report.startswith("Lines still missed: none")
+
+    def test_validate_test_full_run_after_test_selection(self, tmp_path):
+        """
+        Test that a test accepted with test selection keeps the per-file coverage percentages of the last
+        full run, so that a later full run can log its per-file coverage increases.
+        """
+        source_file = tmp_path / "app.py"
+        source_file.write_text("def add(a, b):\n    if a:\n        return a + b\n    return b\n")
+        test_file = tmp_path / "test_app.py"
+        test_file.write_text("import app\n\ndef test_add():\n    assert app.add(0, 2) == 2\n")
+
+        generator = UnitTestValidator(
+            source_file_path=str(source_file),
+            test_file_path=str(test_file),
+            code_coverage_report_path=str(tmp_path / "coverage.xml"),
+            test_command="pytest --cov=. --cov-report=xml",
+            test_command_dir=str(tmp_path),
+            llm_model="gpt-3",
+            agent_completion=MagicMock(),
+            max_run_time_sec=30,
+            desired_coverage=90,
+            comparison_branch="main",
+            coverage_type=CoverageType.COBERTURA,
+            diff_coverage=False,
+            num_attempts=1,
+            additional_instructions="",
+            included_files=[],
+            use_report_coverage_feature_flag=False,
+        )
+        generator.current_coverage = 0.5
+        generator.last_coverage_percentages = {"app.py": 0.5, "utils.py": 0.25}
+        generator.test_headers_indentation = 0
+        generator.relevant_line_number_to_insert_tests_after = 4
+        generator.relevant_line_number_to_insert_imports_after = 1
+        generator.baseline_line_coverage = FileCoverage.from_lines([1, 4], [2, 3])
+
+        settings = {"test_selection.enabled": True}
+        with (
+            patch("coverage_ai.unit_test_validator.get_settings") as mock_get_settings,
+            patch.object(Runner, "run_command", return_value=("", "", 0, 0)),
+            patch.object(
+                CoverageProcessor,
+                "process_coverage_report",
+                return_value=FileCoverage.from_lines([1, 2], [3, 4]),
+            ),
+            patch.object(
+                generator,
+                "post_process_coverage_report",
+                return_value=(1.0, {"app.py": 1.0, "utils.py": 0.5}),
+            ),
+        ):
+            mock_get_settings.return_value.get.side_effect = (
+                lambda key, default=None: settings.get(key, default)
+            )
+            result = generator.validate_test(
+                {"test_code": "def test_add_one():\n    assert app.add(1, 2) == 3", "new_imports_code": ""}
+            )
+            assert result["status"] == "PASS"
+            assert generator.current_coverage == 0.75
+            assert generator.last_coverage_percentages == {"app.py": 0.5, "utils.py": 0.25}
+
+            # A later full run compares its per-file percentages with the ones kept
+            settings["test_selection.enabled"] = False
+            result = generator.validate_test(
+                {"test_code": "def test_add_two():\n    assert app.add(2, 2) == 4", "new_imports_code": ""}
+            )
+
+        assert result["status"] == "PASS"
+        assert generator.current_coverage == 1.0
+        assert generator.last_coverage_percentages == {"app.py": 1.0, "utils.py": 0.5}
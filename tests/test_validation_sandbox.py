@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from coverage_ai.validation_sandbox import ValidationSandbox
+
+
+class TestValidationSandbox:
+    """Test suite for the ValidationSandbox class."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """Create a small project tree to mirror."""
+        root = tmp_path / "project"
+        (root / "tests").mkdir(parents=True)
+        (root / ".git").mkdir()
+        (root / "app.py").write_text("def add(a, b):\n    return a + b\n")
+        (root / "tests" / "test_app.py").write_text("def test_add():\n    pass\n")
+        (root / ".git" / "HEAD").write_text("ref: refs/heads/main\n")
+        return root
+
+    def test_create_mirrors_tree_and_cleans_up(self, project):
+        """The sandbox holds a copy of the project without ignored paths, and is removed on exit."""
+        with ValidationSandbox(str(project), generate_log_files=False) as sandbox:
+            sandbox_dir = sandbox.sandbox_dir
+            assert sandbox_dir != str(project)
+            assert os.path.isfile(os.path.join(sandbox_dir, "app.py"))
+            assert os.path.isfile(os.path.join(sandbox_dir, "tests", "test_app.py"))
+            assert not os.path.exists(os.path.join(sandbox_dir, ".git"))
+
+            with open(sandbox.map_path(str(project / "tests" / "test_app.py")), "w") as f:
+                f.write("modified")
+
+        assert not os.path.exists(sandbox_dir)
+        assert (project / "tests" / "test_app.py").read_text() == "def test_add():\n    pass\n"
+
+    def test_hardlink_mode_copies_writable_paths(self, project):
+        """Hard links are used for read-only files, real copies for writable ones."""
+        test_file = project / "tests" / "test_app.py"
+        with ValidationSandbox(
+            str(project),
+            writable_paths=[str(test_file)],
+            copy_mode="hardlink",
+            generate_log_files=False,
+        ) as sandbox:
+            linked = os.stat(sandbox.map_path(str(project / "app.py")))
+            copied = os.stat(sandbox.map_path(str(test_file)))
+            assert linked.st_ino == os.stat(project / "app.py").st_ino
+            assert copied.st_ino != os.stat(test_file).st_ino
+
+    def test_hardlink_mode_copies_files_matching_copy_patterns(self, project):
+        """Coverage data files and the pytest cache are copied, so writing to them leaves the project as is."""
+        (project / ".coverage").write_text("coverage data")
+        (project / ".pytest_cache" / "v").mkdir(parents=True)
+        (project / ".pytest_cache" / "v" / "lastfailed").write_text("{}")
+        with ValidationSandbox(
+            str(project), copy_mode="hardlink", generate_log_files=False
+        ) as sandbox:
+            for path in [".coverage", ".pytest_cache/v/lastfailed"]:
+                with open(sandbox.map_path(str(project / path)), "w") as f:
+                    f.write("modified")
+            assert os.stat(sandbox.map_path(str(project / "app.py"))).st_ino == (
+                os.stat(project / "app.py").st_ino
+            )
+
+        assert (project / ".coverage").read_text() == "coverage data"
+        assert (project / ".pytest_cache" / "v" / "lastfailed").read_text() == "{}"
+
+    def test_map_path_and_command(self, project, tmp_path):
+        """Paths and commands that reference the project root are rewritten to the sandbox."""
+        with ValidationSandbox(str(project), generate_log_files=False) as sandbox:
+            assert sandbox.map_path(str(project)) == sandbox.sandbox_dir
+            assert (
+                sandbox.map_command(f"pytest {project}/tests --cov={project}")
+                == f"pytest {sandbox.sandbox_dir}/tests --cov={sandbox.sandbox_dir}"
+            )
+            with pytest.raises(ValueError):
+                sandbox.map_path(str(tmp_path / "elsewhere.py"))
+
+    def test_map_command_keeps_sibling_paths_with_the_same_prefix(self, project):
+        """Directories next to the project whose name starts with the project name are not rewritten."""
+        with ValidationSandbox(str(project), generate_log_files=False) as sandbox:
+            command = (
+                f"{project}-venv/bin/pytest {project}/tests '{project}' "
+                f"--rootdir={project} --cov={project}lication/src"
+            )
+            assert sandbox.map_command(command) == (
+                f"{project}-venv/bin/pytest {sandbox.sandbox_dir}/tests '{sandbox.sandbox_dir}' "
+                f"--rootdir={sandbox.sandbox_dir} --cov={project}lication/src"
+            )
+
+    def test_invalid_copy_mode(self, project):
+        """An unknown copy mode is rejected."""
+        with pytest.raises(ValueError) as exc_info:
+            ValidationSandbox(str(project), copy_mode="symlink", generate_log_files=False)
+        assert "Unsupported sandbox copy mode" in str(exc_info.value)
@@ -0,0 +1,143 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+from unittest.mock import patch
+
+import pytest
+
+from coverage_ai.runner import Runner
+from coverage_ai.warm_runner import WarmTestRunner
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+
+
+class TestWarmTestRunner:
+    """Test suite for the WarmTestRunner class."""
+
+    @pytest.fixture
+    def project(self, tmp_path):
+        """Create a small project with a passing and a slow test."""
+        (tmp_path / "app.py").write_text("def add(a, b):\n    return a + b\n")
+        (tmp_path / "test_app.py").write_text(
+            "import time\n\nimport app\n\n\n"
+            "def test_add():\n    assert app.add(1, 2) == 3\n\n\n"
+            "def test_slow():\n    time.sleep(5)\n"
+        )
+        return tmp_path
+
+    @pytest.fixture
+    def warm_runner(self):
+        runner = WarmTestRunner(sys.executable, generate_log_files=False)
+        yield runner
+        runner.close()
+
+    @pytest.mark.parametrize(
+        "command,expected",
+        [
+            ("pytest --cov=. tests/", (["--cov=.", "tests/"], False)),
+            ("python3 -m pytest -q", (["-q"], True)),
+            ("/usr/bin/python -m pytest 'a b.py'", (["a b.py"], True)),
+            ("pytest && coverage xml", None),
+            ("cd tests && pytest", None),
+            ("go test ./...", None),
+        ],
+    )
+    def test_parse_pytest_command(self, command, expected):
+        assert WarmTestRunner.parse_pytest_command(command) == expected
+
+    def test_run_reuses_worker(self, project, warm_runner):
+        args = ["-p", "no:cacheprovider", "test_app.py::test_add"]
+        stdout, stderr, exit_code = warm_runner.run(args, str(project), 30, True)
+        pid = warm_runner.processes[0].pid
+        assert exit_code == 0
+        assert "1 passed" in stdout
+
+        (project / "test_app.py").write_text("def test_fail():\n    assert False\n")
+        stdout, stderr, exit_code = warm_runner.run(
+            ["-p", "no:cacheprovider", "test_app.py"], str(project), 30, True
+        )
+        assert exit_code == 1
+        assert "1 failed" in stdout
+        assert [process.pid for process in warm_runner.processes] == [pid]
+
+    def test_run_timeout(self, project, warm_runner):
+        args = ["-p", "no:cacheprovider", "test_app.py::test_slow"]
+        assert warm_runner.run(args, str(project), 1, True) == (
+            "",
+            "Command timed out",
+            -1,
+        )
+
+    def test_concurrent_runs_use_separate_workers(self, project, warm_runner):
+        (project / "test_wait.py").write_text(
+            "import time\n\n\ndef test_wait():\n    time.sleep(2)\n"
+        )
+        args = ["-p", "no:cacheprovider", "test_wait.py"]
+        warm_runner.run(args, str(project), 30, True)  # Start a first worker
+        results = []
+
+        def run():
+            results.append(warm_runner.run(args, str(project), 30, True)[2])
+
+        threads = [threading.Thread(target=run) for _ in range(2)]
+        start_time = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [0, 0]
+        assert len(warm_runner.processes) == 2
+        # The runs were not serialized
+        assert time.monotonic() - start_time < 3.5
+
+    def test_run_timeout_kills_processes_started_by_tests(self, project, warm_runner):
+        pid_file = project / "sleep.pid"
+        (project / "test_spawn.py").write_text(
+            "import subprocess\nimport time\n\n\ndef test_spawn():\n"
+            "    process = subprocess.Popen(['sleep', '60'])\n"
+            f"    open({str(pid_file)!r}, 'w').write(str(process.pid))\n"
+            "    time.sleep(30)\n"
+        )
+        args = ["-p", "no:cacheprovider", "test_spawn.py"]
+        assert warm_runner.run(args, str(project), 2, True)[2] == -1
+
+        sleep_pid = int(pid_file.read_text())
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            try:
+                os.kill(sleep_pid, 0)
+            except ProcessLookupError:
+                break
+            time.sleep(0.05)
+        else:
+            pytest.fail("The process started by the test is still running")
+
+    def test_unresponsive_worker_is_killed(self, project, warm_runner):
+        args = ["-p", "no:cacheprovider", "test_app.py::test_add"]
+        warm_runner.run(args, str(project), 30, True)
+        worker = warm_runner.processes[0]
+        os.kill(worker.pid, signal.SIGSTOP)
+
+        with patch.object(WarmTestRunner, "RESPONSE_MARGIN_SEC", 0.5):
+            start_time = time.monotonic()
+            result = warm_runner.run(args, str(project), 0, True)
+
+        assert result == ("", "Command timed out", -1)
+        assert time.monotonic() - start_time < 5
+        assert worker.poll() is not None
+        assert warm_runner.processes == []
+
+    def test_unavailable_worker_falls_back_to_shell(self, project):
+        settings = {"enabled": True, "python_executable": "python-does-not-exist"}
+        with patch("coverage_ai.runner.get_settings") as mock_get_settings:
+            mock_get_settings.return_value.get.return_value = settings
+            assert Runner.run_in_warm_worker("pytest", 10, str(project)) is None
+            stdout, stderr, exit_code, _ = Runner.run_command(
+                "echo shell", max_run_time_sec=10, cwd=str(project)
+            )
+        assert stdout.strip() == "shell"
+        assert WarmTestRunner.shared("python-does-not-exist", []).available is False